@@ -62,15 +62,62 @@ def main() -> int:
     if spotify_secret and "PROVIDERS__SPOTIFYPROVIDER__1__CLIENT_SECRET" not in os.environ:
         os.environ["PROVIDERS__SPOTIFYPROVIDER__1__CLIENT_SECRET"] = spotify_secret
 
+    from lidarrmetadata import startup_profile
+    startup_profile.install_import_timer()
+    from lidarrmetadata import runtime
+    runtime.install_policy()
+    startup_profile.mark("environment")
+
     # Register overlay config (adds BRIDGE to CONFIGS)
     import lidarrmetadata.bridge_config  # noqa: F401
+    startup_profile.mark("bridge config")
+
+    # Optional subsystems are only imported and registered when their flag is on.
+    from lidarrmetadata.env_utils import env_flag
+    metrics_enabled = env_flag("LIMBO_METRICS_ENABLED", True)
 
     from lidarrmetadata import version_patch
     version_patch.register_version_route()
+    startup_profile.register_startup_route()
+    if metrics_enabled:
+        from lidarrmetadata import metrics
+        metrics.register_metrics_route()
+    if env_flag("LIMBO_LOOP_MONITOR_ENABLED", True):
+        from lidarrmetadata import loop_monitor
+        loop_monitor.register_loop_monitor()
+    from lidarrmetadata import workers
+    workers.register_worker_routes()
     from lidarrmetadata import root_patch
     root_patch.register_root_route()
     from lidarrmetadata import config_patch
     config_patch.register_config_routes()
+    from lidarrmetadata import filter_sync
+    filter_sync.register_sync()
+    from lidarrmetadata import jobs
+    jobs.register_job_routes()
+    from lidarrmetadata import cache_invalidation
+    cache_invalidation.register_invalidation_routes()
+    from lidarrmetadata import cache_stats
+    cache_stats.register_stats_routes()
+    if env_flag("LIMBO_CACHE_GC_ENABLED", True):
+        from lidarrmetadata import cache_gc
+        cache_gc.register_gc()
+    if env_flag("LIMBO_EVENTS_ENABLED", True):
+        from lidarrmetadata import events
+        events.register_events()
+    if env_flag("LIMBO_LIDARR_INDEX_ENABLED", True):
+        from lidarrmetadata import lidarr_index
+        lidarr_index.register_index()
+    from lidarrmetadata import warmup
+    warmup.register_warmup()
+    if env_flag("LIMBO_WARM_ENABLED", False):
+        from lidarrmetadata import cache_warmer
+        cache_warmer.register_warmer()
+    if env_flag("LIMBO_PREFETCH_ENABLED", False):
+        from lidarrmetadata import album_prefetch
+        album_prefetch.register_prefetch()
+
+    startup_profile.mark("routes")
 
     # Optional runtime patches (auto-enable if MITM hook configured)
     apply_env = os.environ.get("LIMBO_APPLY_PATCHES")
@@ -92,8 +139,29 @@ def main() -> int:
 
         app_patch.apply()
 
+    startup_profile.mark("runtime patches")
+
+    cache_stats.install()
+    if metrics_enabled:
+        metrics.install()
+    from lidarrmetadata import background
+    background.install()
+    from lidarrmetadata import state_store
+    state_store.install()
+    from lidarrmetadata import http_client
+    http_client.install()
+    runtime.install()
+    from lidarrmetadata import shutdown
+    shutdown.install()
+    startup_profile.install()
+    startup_profile.mark("install hooks")
+
+    if workers.configured_workers() > 0:
+        return workers.run()
+
     # Then import the upstream server entrypoint
     from lidarrmetadata.server import main as upstream_main
+    startup_profile.mark("upstream server import")
 
     return upstream_main()
 
@@ -0,0 +1,182 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, Optional, Set, Tuple
+
+from lidarrmetadata import background
+from lidarrmetadata import cache_stats
+from lidarrmetadata import cache_tables
+from lidarrmetadata import workers
+from lidarrmetadata.env_utils import env_flag, env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+_QUEUE: Optional["asyncio.Queue[Tuple[str, str]]"] = None
+_QUEUED: Set[str] = set()
+_RECENT_ARTISTS: Dict[str, float] = {}
+_INFLIGHT_REQUESTS = 0
+_STATS: Dict[str, int] = {
+    "artists_seen": 0,
+    "artists_deduped": 0,
+    "enqueued": 0,
+    "skipped_cached": 0,
+    "loaded": 0,
+    "dropped_full": 0,
+    "cancelled_load": 0,
+    "errors": 0,
+}
+
+
+def is_enabled() -> bool:
+    return env_flag("LIMBO_PREFETCH_ENABLED", False)
+
+
+def _dedupe_seconds() -> float:
+    return env_float("LIMBO_PREFETCH_DEDUPE_SECONDS", 600.0, 0.0)
+
+
+def _max_inflight() -> int:
+    return env_int("LIMBO_PREFETCH_MAX_INFLIGHT", 16, 1)
+
+
+def _get_queue() -> "asyncio.Queue[Tuple[str, str]]":
+    global _QUEUE
+    if _QUEUE is None:
+        _QUEUE = asyncio.Queue(maxsize=env_int("LIMBO_PREFETCH_QUEUE", 500, 1))
+    return _QUEUE
+
+
+def _under_load() -> bool:
+    return _INFLIGHT_REQUESTS > _max_inflight()
+
+
+def _cancel_pending() -> None:
+    queue = _get_queue()
+    dropped = 0
+    while True:
+        try:
+            _artist_id, album_id = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            break
+        _QUEUED.discard(album_id)
+        queue.task_done()
+        dropped += 1
+    if dropped:
+        _STATS["cancelled_load"] += dropped
+
+
+def schedule_artist(artist_mbid: str, artist: Any) -> None:
+    """
+    Queue an artist's release groups for background loading into ALBUM_CACHE.
+    """
+    if not is_enabled() or not artist_mbid:
+        return
+    _STATS["artists_seen"] += 1
+    now = time.monotonic()
+    last = _RECENT_ARTISTS.get(artist_mbid)
+    if last is not None and (now - last) < _dedupe_seconds():
+        _STATS["artists_deduped"] += 1
+        return
+    _RECENT_ARTISTS[artist_mbid] = now
+    if len(_RECENT_ARTISTS) > 5000:
+        cutoff = now - _dedupe_seconds()
+        for key in [k for k, v in _RECENT_ARTISTS.items() if v < cutoff]:
+            _RECENT_ARTISTS.pop(key, None)
+
+    if _under_load():
+        return
+
+    queue = _get_queue()
+    for album_id in cache_tables.album_ids(artist):
+        if album_id in _QUEUED:
+            continue
+        try:
+            queue.put_nowait((artist_mbid, album_id))
+        except asyncio.QueueFull:
+            _STATS["dropped_full"] += 1
+            break
+        _QUEUED.add(album_id)
+        _STATS["enqueued"] += 1
+
+
+async def _is_cached(album_id: str) -> bool:
+    from lidarrmetadata import provider as provider_api
+    from lidarrmetadata import util
+
+    try:
+        with cache_stats.uncounted():
+            cached, expiry = await util.ALBUM_CACHE.get(album_id)
+    except Exception:
+        return False
+    return bool(cached) and expiry > provider_api.utcnow()
+
+
+async def _worker() -> None:
+    from lidarrmetadata import cache_warmer
+
+    queue = _get_queue()
+    while True:
+        _artist_id, album_id = await queue.get()
+        try:
+            if _under_load():
+                _STATS["cancelled_load"] += 1
+                _cancel_pending()
+                continue
+            if await _is_cached(album_id):
+                _STATS["skipped_cached"] += 1
+                continue
+            await cache_warmer.warm_release_group(album_id)
+            _STATS["loaded"] += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            _STATS["errors"] += 1
+            logger.debug("Limbo prefetch: album %s failed: %s", album_id, exc)
+        finally:
+            _QUEUED.discard(album_id)
+            queue.task_done()
+
+
+async def _run_workers() -> None:
+    count = env_int("LIMBO_PREFETCH_WORKERS", 2, 1)
+    await asyncio.gather(*(_worker() for _ in range(count)))
+
+
+def get_status() -> Dict[str, Any]:
+    data: Dict[str, Any] = dict(_STATS)
+    data["enabled"] = is_enabled()
+    data["worker"] = workers.worker_id()
+    data["queued"] = _QUEUE.qsize() if _QUEUE is not None else 0
+    data["inflight_requests"] = _INFLIGHT_REQUESTS
+    return data
+
+
+def register_prefetch() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import jsonify
+
+    if not is_enabled():
+        return
+
+    background.register("album-prefetch", _run_workers)
+
+    if not getattr(upstream_app.app, "_limbo_prefetch_inflight", False):
+        upstream_app.app._limbo_prefetch_inflight = True
+
+        @upstream_app.app.before_request
+        async def _limbo_prefetch_request_start():
+            global _INFLIGHT_REQUESTS
+            _INFLIGHT_REQUESTS += 1
+
+        @upstream_app.app.teardown_request
+        async def _limbo_prefetch_request_end(_exc=None):
+            global _INFLIGHT_REQUESTS
+            _INFLIGHT_REQUESTS = max(0, _INFLIGHT_REQUESTS - 1)
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/cache/prefetch":
+            return
+
+    @upstream_app.app.route("/cache/prefetch", methods=["GET"])
+    async def _limbo_cache_prefetch():
+        return jsonify(get_status())
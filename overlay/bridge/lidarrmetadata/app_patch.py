@@ -1,7 +1,23 @@
 import os
+import contextlib
 import contextvars
+import logging
+from pathlib import Path
+
+from lidarrmetadata.env_utils import env_flag
+
+logger = logging.getLogger(__name__)
 
 _CACHE_STATUS = contextvars.ContextVar("limbo_cache_status", default=None)
+# Bumped whenever rows written by an older Limbo must not be served as they are.
+_ALBUM_CACHE_FORMAT = "unfiltered-1"
+_ALBUM_CACHE_FORMAT_FILE = (
+    Path(os.environ.get("LIMBO_INIT_STATE_DIR", "/metadata/init-state")) / "album_cache_format"
+)
+
+
+def _untimed(_histogram, *_labels):
+    return contextlib.nullcontext()
 
 
 def _record_cache_event(hit: bool) -> None:
@@ -34,6 +50,28 @@ async def safe_spotify_set(spotify_id, albumid):
         upstream_app.app.logger.debug(f"Skipping caching invalid Spotify ID: {spotify_id}")
 
 
+async def _expire_prefiltered_albums() -> None:
+    """
+    ALBUM_CACHE rows written before release filtering moved to read time hold filtered
+    release groups, so later filter changes cannot bring the removed releases back.
+    Expire them once, so they are refetched whole, and record the new format.
+    """
+    from lidarrmetadata import cache_jobs
+    from lidarrmetadata import jobs
+    from lidarrmetadata import state_store
+
+    if state_store.get("album_cache_format") == _ALBUM_CACHE_FORMAT:
+        return
+    logger.info("Limbo: expiring album cache rows written before filter-on-read")
+    job = await jobs.wait(cache_jobs.start_expire(["album"]))
+    result = job.get("result") or {}
+    if job["status"] == "done" and "album" not in result.get("skipped", []):
+        state_store.put("album_cache_format", _ALBUM_CACHE_FORMAT)
+    else:
+        # Not recorded, so the next start tries again.
+        logger.warning("Limbo: album cache upgrade expiry did not finish (%s)", job["status"])
+
+
 def apply() -> None:
     """
     Apply optional runtime patches. Currently a no-op unless enabled.
@@ -45,31 +83,77 @@ def apply() -> None:
     from lidarrmetadata import provider as provider_api
     from lidarrmetadata import util
     from lidarrmetadata import release_filters
+    from lidarrmetadata import cache_stats
+    if env_flag("LIMBO_METRICS_ENABLED", True):
+        from lidarrmetadata.metrics import DB_QUERY_SECONDS, HOOK_SECONDS, timed
+    else:
+        # Leave the metrics module unimported; the hooks below time nothing.
+        DB_QUERY_SECONDS = HOOK_SECONDS = None
+        timed = _untimed
     if mitm.is_enabled():
         @upstream_app.app.after_request
         async def _limbo_mitm_hook(response):
-            return await mitm.apply_response(response)
+            with timed(HOOK_SECONDS, "mitm"):
+                return await mitm.apply_response(response)
+
+    if not getattr(api_mod.get_release_group_info_basic, "_limbo_release_filter_wrapped", False):
+        # ALBUM_CACHE holds unfiltered release groups; filter every read, not the write.
+        # get_release_group_info reads through this module-level function, so full
+        # album lookups are filtered here too.
+        original_release_group_info_basic_unfiltered = api_mod.get_release_group_info_basic
+
+        async def _limbo_get_release_group_info_basic_filtered(*args, **kwargs):
+            result = await original_release_group_info_basic_unfiltered(*args, **kwargs)
+            try:
+                with timed(HOOK_SECONDS, "release_filter"):
+                    if isinstance(result, tuple) and result:
+                        result = (release_filters.apply_release_group_filters(result[0]),) + result[1:]
+                    else:
+                        result = release_filters.apply_release_group_filters(result)
+            except Exception:
+                pass
+            return result
+
+        _limbo_get_release_group_info_basic_filtered._limbo_release_filter_wrapped = True
+        api_mod.get_release_group_info_basic = _limbo_get_release_group_info_basic_filtered
+
+        from lidarrmetadata import background
+        from lidarrmetadata import state_store
+
+        state_store.register(
+            "album_cache_format", _ALBUM_CACHE_FORMAT_FILE, "text", newline=True
+        )
+        background.register(
+            "album-cache-upgrade", _expire_prefiltered_albums, leader_only=True
+        )
+
+    if env_flag("LIMBO_PREFETCH_ENABLED", False) and not getattr(
+        api_mod.get_artist_info, "_limbo_prefetch_wrapped", False
+    ):
+        from lidarrmetadata import album_prefetch
 
-    if not getattr(api_mod.get_release_group_info, "_limbo_release_filter_wrapped", False):
-        original_release_group_info = api_mod.get_release_group_info
+        original_artist_info = api_mod.get_artist_info
 
-        async def _limbo_get_release_group_info(*args, **kwargs):
-            release_group, expiry = await original_release_group_info(*args, **kwargs)
+        async def _limbo_get_artist_info(mbid, *args, **kwargs):
+            result = await original_artist_info(mbid, *args, **kwargs)
             try:
-                release_group = release_filters.apply_release_group_filters(release_group)
+                artist = result[0] if isinstance(result, tuple) else result
+                album_prefetch.schedule_artist(mbid, artist)
             except Exception:
                 pass
-            return release_group, expiry
+            return result
 
-        _limbo_get_release_group_info._limbo_release_filter_wrapped = True
-        api_mod.get_release_group_info = _limbo_get_release_group_info
+        _limbo_get_artist_info._limbo_prefetch_wrapped = True
+        api_mod.get_artist_info = _limbo_get_artist_info
 
     if not getattr(api_mod.get_release_group_info_basic, "_limbo_cache_status", False):
         original_release_group_info_basic = api_mod.get_release_group_info_basic
 
         async def _limbo_get_release_group_info_basic(mbid, *args, **kwargs):
             try:
-                cached, expiry = await util.ALBUM_CACHE.get(mbid)
+                # The status probe is not a cache read of its own; keep it out of the stats.
+                with cache_stats.uncounted():
+                    cached, expiry = await util.ALBUM_CACHE.get(mbid)
                 now = provider_api.utcnow()
                 if cached and expiry > now:
                     _record_cache_event(True)
@@ -125,18 +209,23 @@ def apply() -> None:
                     "sql_file": db_hooks.get_sql_file(),
                 }
 
-                new_sql, new_args, pool_key = db_hooks.apply_before(sql, args, context)
+                with timed(HOOK_SECONDS, "db_before"):
+                    new_sql, new_args, pool_key = db_hooks.apply_before(sql, args, context)
                 context["sql"] = new_sql
                 context["args"] = new_args
                 context["pool_key"] = pool_key
 
+                sql_file = context["sql_file"] or "inline"
                 if pool_key and pool_key != "default":
                     pool = await db_hooks.get_pool(self, pool_key)
                     async with pool.acquire() as _alt_conn:
-                        results = await original(self, new_sql, *new_args, _conn=_alt_conn)
+                        with timed(DB_QUERY_SECONDS, sql_file, pool_key):
+                            results = await original(self, new_sql, *new_args, _conn=_alt_conn)
                 else:
-                    results = await original(self, new_sql, *new_args, _conn=_conn)
-                return db_hooks.apply_after(results, context)
+                    with timed(DB_QUERY_SECONDS, sql_file, "default"):
+                        results = await original(self, new_sql, *new_args, _conn=_conn)
+                with timed(HOOK_SECONDS, "db_after"):
+                    return db_hooks.apply_after(results, context)
 
             _limbo_map_query._limbo_db_hooked = True
             provider_mod.MusicbrainzDbProvider.map_query = _limbo_map_query
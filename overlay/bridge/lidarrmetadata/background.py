@@ -0,0 +1,120 @@
+import asyncio
+import logging
+import os
+from typing import Awaitable, Callable, Dict, Optional, Set
+
+logger = logging.getLogger(__name__)
+
+_FACTORIES: Dict[str, Callable[[], Awaitable[None]]] = {}
+_TASKS: Dict[str, asyncio.Task] = {}
+_LEADER_ONLY: Set[str] = set()
+_INSTALLED = False
+_SERVING = False
+
+
+def is_leader() -> bool:
+    """
+    True in the process that runs once-per-service work: the only process, or worker 0
+    when the launcher runs several workers.
+    """
+    return os.environ.get("LIMBO_WORKER_ID", "0") in {"", "0"}
+
+
+def register(
+    name: str, factory: Callable[[], Awaitable[None]], leader_only: bool = False
+) -> None:
+    """
+    Register a long-running coroutine factory started when the app begins serving.
+    ``leader_only`` tasks (schedulers, resumable jobs) run in one worker only.
+    """
+    _FACTORIES[name] = factory
+    if leader_only:
+        _LEADER_ONLY.add(name)
+        if not is_leader():
+            return
+    if _SERVING:
+        spawn(name, factory())
+
+
+def spawn(name: str, coro: Awaitable[None]) -> Optional[asyncio.Task]:
+    """
+    Run a coroutine as a named background task; a still-running task of the same name wins.
+    """
+    existing = _TASKS.get(name)
+    if existing is not None and not existing.done():
+        close = getattr(coro, "close", None)
+        if callable(close):
+            close()
+        return existing
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        close = getattr(coro, "close", None)
+        if callable(close):
+            close()
+        return None
+    task = loop.create_task(_run(name, coro))
+    _TASKS[name] = task
+    # Drop finished tasks so one-off jobs do not keep their coroutine and state alive.
+    task.add_done_callback(lambda done: _TASKS.pop(name, None) if _TASKS.get(name) is done else None)
+    return task
+
+
+def is_running(name: str) -> bool:
+    task = _TASKS.get(name)
+    return task is not None and not task.done()
+
+
+async def cancel(name: str, timeout: float = 5.0) -> None:
+    task = _TASKS.get(name)
+    if task is None or task.done():
+        return
+    task.cancel()
+    try:
+        await asyncio.wait_for(asyncio.shield(task), timeout)
+    except (asyncio.CancelledError, asyncio.TimeoutError):
+        pass
+    except Exception:
+        pass
+
+
+async def stop_all(timeout: float = 5.0) -> None:
+    global _SERVING
+    _SERVING = False
+    pending = [task for task in _TASKS.values() if not task.done()]
+    for task in pending:
+        task.cancel()
+    if pending:
+        await asyncio.wait(pending, timeout=timeout)
+    _TASKS.clear()
+
+
+async def _run(name: str, coro: Awaitable[None]) -> None:
+    try:
+        await coro
+    except asyncio.CancelledError:
+        raise
+    except Exception:
+        logger.exception("Limbo background task %s failed", name)
+
+
+def install() -> None:
+    global _INSTALLED
+    if _INSTALLED:
+        return
+    _INSTALLED = True
+
+    from lidarrmetadata import app as upstream_app
+
+    @upstream_app.app.before_serving
+    async def _limbo_start_background():
+        global _SERVING
+        _SERVING = True
+        for name, factory in list(_FACTORIES.items()):
+            if name in _LEADER_ONLY and not is_leader():
+                continue
+            spawn(name, factory())
+
+    @upstream_app.app.after_serving
+    async def _limbo_stop_background():
+        await stop_all()
@@ -0,0 +1,175 @@
+import asyncio
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from lidarrmetadata import background
+from lidarrmetadata import cache_tables
+from lidarrmetadata import jobs
+from lidarrmetadata import state_store
+from lidarrmetadata.env_utils import env_flag, env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+_STATE_DIR = Path(os.environ.get("LIMBO_INIT_STATE_DIR", "/metadata/init-state"))
+_STATE_FILE = Path(
+    os.environ.get("LIMBO_CACHE_GC_STATE_FILE", str(_STATE_DIR / "cache_gc_state.json"))
+)
+state_store.register("cache_gc", _STATE_FILE)
+_TASK_NAME = "cache-gc"
+_JOB_KIND = "cache-gc"
+
+
+def _gc_enabled() -> bool:
+    return env_flag("LIMBO_CACHE_GC_ENABLED", True)
+
+
+def _grace_hours() -> float:
+    return env_float("LIMBO_CACHE_GC_GRACE_HOURS", 72.0, 0.0)
+
+
+def _interval_hours() -> float:
+    return env_float("LIMBO_CACHE_GC_INTERVAL_HOURS", 24.0, 0.25)
+
+
+def _load_state() -> Dict[str, Any]:
+    data = state_store.get("cache_gc")
+    return data if isinstance(data, dict) else {}
+
+
+def _save_state(state: Dict[str, Any]) -> None:
+    state_store.put("cache_gc", state)
+
+
+def _replication_running() -> bool:
+    from lidarrmetadata import status_poller
+
+    state = status_poller.get_value("replication") or {}
+    return bool(state.get("running"))
+
+
+async def _wait_for_replication(progress: Dict[str, Any]) -> None:
+    if not _replication_running():
+        return
+    progress["paused"] = True
+    while _replication_running():
+        await asyncio.sleep(15.0)
+    progress["paused"] = False
+
+
+async def _collect_table(job: Dict[str, Any], name: str, cache: object) -> Dict[str, Any]:
+    """
+    Delete rows expired for longer than the grace period, walking the table in
+    primary-key batches.
+    """
+    table = cache._db_table
+    progress = job["progress"].setdefault(
+        name, {"scanned": 0, "deleted": 0, "paused": False, "done": False}
+    )
+    pool = await cache_tables.get_pool(cache)
+    batch_size = env_int("LIMBO_CACHE_GC_BATCH", 2000, 1)
+    pause = env_float("LIMBO_CACHE_GC_PAUSE", 0.1, 0.0)
+    grace_seconds = _grace_hours() * 3600.0
+    cursor = ""
+    while True:
+        await _wait_for_replication(progress)
+        async with pool.acquire() as conn:
+            batch = await cache_tables.next_key_batch(conn, table, cursor, batch_size)
+            if batch is None:
+                break
+            upper, keys = batch
+            status = await conn.execute(
+                f"DELETE FROM {table} WHERE key > $1 AND key <= $2 "
+                f"AND expires < current_timestamp - make_interval(secs => $3)",
+                cursor,
+                upper,
+                grace_seconds,
+            )
+        progress["scanned"] += keys
+        progress["deleted"] += cache_tables.rows_affected(status)
+        cursor = upper
+        if pause:
+            await asyncio.sleep(pause)
+    progress["done"] = True
+    return progress
+
+
+async def _gc_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    deleted: Dict[str, int] = {}
+    errors: Dict[str, str] = {}
+    # One table at a time: GC is never urgent and should stay out of the way.
+    for name, cache in cache_tables.postgres_cache_targets():
+        try:
+            progress = await _collect_table(job, name, cache)
+            deleted[name] = progress["deleted"]
+        except asyncio.CancelledError:
+            raise
+        except Exception as exc:
+            logger.warning("Limbo cache GC: %s failed: %s", name, exc)
+            errors[name] = str(exc)
+    result = {
+        "deleted": deleted,
+        "total_deleted": sum(deleted.values()),
+        "errors": errors,
+        "grace_hours": _grace_hours(),
+    }
+    _save_state({"completed_at": time.time(), "result": result})
+    if result["total_deleted"]:
+        logger.info("Limbo cache GC: removed %s expired rows %s", result["total_deleted"], deleted)
+    return result
+
+
+def start_gc() -> Dict[str, Any]:
+    return jobs.find_active(_JOB_KIND) or jobs.create(
+        _JOB_KIND, _gc_job, {"grace_hours": _grace_hours()}
+    )
+
+
+async def _gc_loop() -> None:
+    while True:
+        completed_at = float(_load_state().get("completed_at") or 0)
+        due_in = completed_at + _interval_hours() * 3600.0 - time.time()
+        if due_in > 0:
+            await asyncio.sleep(min(due_in, 900.0))
+            continue
+        await jobs.wait(start_gc())
+        # A failed run does not record completion; back off before retrying.
+        await asyncio.sleep(300.0)
+
+
+def get_status() -> Dict[str, Any]:
+    state = _load_state()
+    active: Optional[Dict[str, Any]] = jobs.find_active(_JOB_KIND)
+    return {
+        "enabled": _gc_enabled(),
+        "grace_hours": _grace_hours(),
+        "interval_hours": _interval_hours(),
+        "last_completed_at": state.get("completed_at"),
+        "last_result": state.get("result"),
+        "job": jobs.describe(active) if active else None,
+    }
+
+
+def register_gc() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import jsonify, request
+
+    if _gc_enabled():
+        background.register(_TASK_NAME, _gc_loop, leader_only=True)
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/cache/gc":
+            return
+
+    @upstream_app.app.route("/cache/gc", methods=["GET", "POST"])
+    async def _limbo_cache_gc():
+        if request.method == "GET":
+            return jsonify(get_status())
+        if request.headers.get("authorization") != upstream_app.app.config.get(
+            "LIMBO_APIKEY"
+        ):
+            return jsonify("Unauthorized"), 401
+        job = start_gc()
+        return jsonify({"ok": True, "job": jobs.describe(job)}), 202
@@ -0,0 +1,187 @@
+import logging
+import re
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from lidarrmetadata import cache_jobs
+from lidarrmetadata import cache_stats
+from lidarrmetadata import cache_tables
+from lidarrmetadata import jobs
+
+logger = logging.getLogger(__name__)
+
+_MBID_RE = re.compile(
+    r"^[0-9a-f]{8}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{4}-[0-9a-f]{12}$", re.IGNORECASE
+)
+
+# Tables keyed directly by artist or release-group MBID. Spotify rows are keyed by
+# Spotify id and Wikipedia rows by article URL, so those can only be expired as a
+# whole provider.
+_ARTIST_TABLES = ("artist", "fanart", "tadb")
+_RELEASE_GROUP_TABLES = ("album", "fanart")
+
+
+def is_mbid(value: Any) -> bool:
+    return isinstance(value, str) and bool(_MBID_RE.match(value.strip()))
+
+
+def _normalize_mbids(values: Any) -> Optional[List[str]]:
+    if values is None:
+        return []
+    if isinstance(values, str):
+        values = [values]
+    if not isinstance(values, (list, tuple)):
+        return None
+    mbids = []
+    for value in values:
+        if not is_mbid(value):
+            return None
+        mbid = value.strip().lower()
+        if mbid not in mbids:
+            mbids.append(mbid)
+    return mbids
+
+
+async def expire_keys(name: str, keys: Iterable[str]) -> int:
+    """
+    Expire the given keys in one cache table and return how many rows changed.
+    """
+    keys = list(keys)
+    if not keys:
+        return 0
+    cache = cache_tables.get_postgres_cache(name)
+    if cache is None:
+        return 0
+    pool = await cache_tables.get_pool(cache)
+    async with pool.acquire() as conn:
+        status = await conn.execute(
+            f"UPDATE {cache._db_table} SET expires = current_timestamp "
+            f"WHERE key = ANY($1::text[]) "
+            f"AND (expires IS NULL OR expires > current_timestamp)",
+            keys,
+        )
+    return cache_tables.rows_affected(status)
+
+
+async def release_groups_for_artist(artist_mbid: str) -> List[str]:
+    """
+    Return the release-group MBIDs for an artist, from the cached artist record when
+    there is one and from the MusicBrainz provider otherwise.
+    """
+    from lidarrmetadata import provider
+    from lidarrmetadata import util
+
+    try:
+        with cache_stats.uncounted():
+            cached, _expiry = await util.ARTIST_CACHE.get(artist_mbid)
+    except Exception:
+        cached = None
+    album_ids = cache_tables.album_ids(cached) if cached else []
+    if album_ids:
+        return album_ids
+
+    providers = provider.get_providers_implementing(provider.ReleaseGroupByArtistMixin)
+    if not providers:
+        return []
+    release_groups = await cache_tables.maybe_await(
+        providers[0].get_release_groups_by_artist(artist_mbid)
+    )
+    return [str(item["Id"]) for item in release_groups or [] if item.get("Id")]
+
+
+async def invalidate(
+    artists: Iterable[str] = (),
+    release_groups: Iterable[str] = (),
+    cascade: bool = False,
+) -> Dict[str, Any]:
+    """
+    Expire the cache rows for the given artist and release-group MBIDs. With ``cascade``
+    each artist's release groups are expired too.
+    """
+    artist_keys: Set[str] = set(artists)
+    release_group_keys: Set[str] = set(release_groups)
+    cascaded = 0
+    errors: Dict[str, str] = {}
+    if cascade:
+        for artist_mbid in sorted(artist_keys):
+            try:
+                found = await release_groups_for_artist(artist_mbid)
+            except Exception as exc:
+                errors[f"cascade:{artist_mbid}"] = str(exc)
+                continue
+            before = len(release_group_keys)
+            release_group_keys.update(mbid.lower() for mbid in found)
+            cascaded += len(release_group_keys) - before
+
+    keys_by_table: Dict[str, Set[str]] = {}
+    for name in _ARTIST_TABLES:
+        keys_by_table.setdefault(name, set()).update(artist_keys)
+    for name in _RELEASE_GROUP_TABLES:
+        keys_by_table.setdefault(name, set()).update(release_group_keys)
+
+    expired: Dict[str, int] = {}
+    for name, keys in keys_by_table.items():
+        try:
+            expired[name] = await expire_keys(name, sorted(keys))
+        except Exception as exc:
+            logger.warning("Limbo cache invalidation: %s failed: %s", name, exc)
+            errors[name] = str(exc)
+    return {
+        "artists": len(artist_keys),
+        "release_groups": len(release_group_keys),
+        "cascaded_release_groups": cascaded,
+        "expired": expired,
+        "errors": errors,
+    }
+
+
+def register_invalidation_routes() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import jsonify, request
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/cache/invalidate":
+            return
+
+    @upstream_app.app.route("/cache/invalidate", methods=["POST"])
+    async def _limbo_cache_invalidate():
+        if request.headers.get("authorization") != upstream_app.app.config.get(
+            "LIMBO_APIKEY"
+        ):
+            return jsonify("Unauthorized"), 401
+        payload = await request.get_json(silent=True) or {}
+        if not isinstance(payload, dict):
+            return jsonify({"ok": False, "error": "Expected a JSON object."}), 400
+
+        artists = _normalize_mbids(payload.get("artists"))
+        release_groups = _normalize_mbids(payload.get("release_groups"))
+        if artists is None or release_groups is None:
+            return jsonify({"ok": False, "error": "Expected lists of MBIDs."}), 400
+
+        providers = payload.get("providers") or []
+        if isinstance(providers, str):
+            providers = [providers]
+        known = {name for name, _cache in cache_tables.cache_targets()}
+        unknown = [name for name in providers if name not in known]
+        if unknown:
+            return (
+                jsonify(
+                    {
+                        "ok": False,
+                        "error": f"Unknown providers: {', '.join(map(str, unknown))}",
+                        "providers": sorted(known),
+                    }
+                ),
+                400,
+            )
+        if not artists and not release_groups and not providers:
+            return jsonify({"ok": False, "error": "Nothing to invalidate."}), 400
+
+        response: Dict[str, Any] = {"ok": True}
+        if artists or release_groups:
+            response.update(
+                await invalidate(artists, release_groups, bool(payload.get("cascade")))
+            )
+        if providers:
+            job = cache_jobs.start_expire(providers)
+            response["job"] = jobs.describe(job)
+        return jsonify(response)
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from lidarrmetadata import cache_tables
+from lidarrmetadata import jobs
+from lidarrmetadata.env_utils import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+
+def _batch_size() -> int:
+    return env_int("LIMBO_CACHE_JOB_BATCH", 5000, 1)
+
+
+def _pause() -> float:
+    return env_float("LIMBO_CACHE_JOB_PAUSE", 0.05, 0.0)
+
+
+def _parallel() -> int:
+    return env_int("LIMBO_CACHE_JOB_PARALLEL", 3, 1)
+
+
+async def _expire_table(job: Dict[str, Any], name: str, cache: object) -> Dict[str, Any]:
+    """
+    Expire one table in key-range batches, one short autocommit statement per batch.
+    """
+    table = cache._db_table
+    progress = job["progress"].setdefault(name, {"scanned": 0, "expired": 0, "done": False})
+    pool = await cache_tables.get_pool(cache)
+    batch_size = _batch_size()
+    pause = _pause()
+    cursor = ""
+    while True:
+        async with pool.acquire() as conn:
+            batch = await cache_tables.next_key_batch(conn, table, cursor, batch_size)
+            if batch is None:
+                break
+            upper, keys = batch
+            status = await conn.execute(
+                f"UPDATE {table} SET expires = current_timestamp "
+                f"WHERE key > $1 AND key <= $2 "
+                f"AND (expires IS NULL OR expires > current_timestamp)",
+                cursor,
+                upper,
+            )
+        progress["scanned"] += keys
+        progress["expired"] += cache_tables.rows_affected(status)
+        cursor = upper
+        if pause:
+            await asyncio.sleep(pause)
+    progress["done"] = True
+    return progress
+
+
+async def _clear_table(job: Dict[str, Any], name: str, cache: object) -> Dict[str, Any]:
+    progress = job["progress"].setdefault(name, {"method": None, "done": False})
+    try:
+        pool = await cache_tables.get_pool(cache)
+        async with pool.acquire() as conn:
+            await conn.execute(f"TRUNCATE {cache._db_table}")
+        progress["method"] = "truncate"
+    except Exception as exc:
+        # TRUNCATE needs table ownership; fall back to the cache's own clear().
+        logger.info("Limbo cache clear: TRUNCATE %s failed (%s); using clear()", name, exc)
+        await cache_tables.maybe_await(cache.clear())
+        progress["method"] = "clear"
+    progress["done"] = True
+    return progress
+
+
+async def _run_tables(job: Dict[str, Any], action) -> Dict[str, Any]:
+    semaphore = asyncio.Semaphore(_parallel())
+    done: List[str] = []
+    skipped: List[str] = []
+
+    async def _one(name: str, cache: object) -> Tuple[str, bool]:
+        async with semaphore:
+            try:
+                await action(job, name, cache)
+                return name, True
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                logger.warning("Limbo cache job %s: table %s failed: %s", job["kind"], name, exc)
+                job["progress"].setdefault(name, {})["error"] = str(exc)
+                return name, False
+
+    tables = job["params"].get("tables")
+    targets = [
+        (name, cache)
+        for name, cache in cache_tables.postgres_cache_targets()
+        if not tables or name in tables
+    ]
+    for name, ok in await asyncio.gather(*(_one(name, cache) for name, cache in targets)):
+        (done if ok else skipped).append(name)
+    return {"tables": done, "skipped": skipped}
+
+
+async def _expire_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    result = await _run_tables(job, _expire_table)
+    return {"expired": result["tables"], "skipped": result["skipped"]}
+
+
+async def _clear_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    result = await _run_tables(job, _clear_table)
+    cleared = set(result["tables"])
+    skipped = list(result["skipped"])
+    for name, cache in cache_tables.cache_targets():
+        if name in cleared or name in skipped:
+            continue
+        skipped.append(name)
+    return {"cleared": result["tables"], "skipped": skipped}
+
+
+def start_expire(tables: Optional[Iterable[str]] = None) -> Dict[str, Any]:
+    """
+    Start (or join) a job expiring every row of the named tables, or of all tables.
+    """
+    params = {"tables": sorted(set(tables))} if tables else {}
+    for job in jobs.list_active("cache-expire"):
+        if job["params"] == params:
+            return job
+    return jobs.create("cache-expire", _expire_job, params)
+
+
+def start_clear() -> Dict[str, Any]:
+    return jobs.find_active("cache-clear") or jobs.create("cache-clear", _clear_job)
@@ -0,0 +1,296 @@
+import bisect
+import contextvars
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from lidarrmetadata import cache_tables
+from lidarrmetadata import workers
+from lidarrmetadata.env_utils import env_flag, env_float, env_int
+from lidarrmetadata.json_utils import jsonable
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (ms) of the cumulative latency buckets; percentiles report a bound.
+_LATENCY_BUCKETS_MS = (0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+_COUNTERS: Dict[str, Dict[str, int]] = {}
+# (cache, op) -> per-bucket counts, the last one for anything slower than every bound.
+_LATENCY: Dict[Tuple[str, str], List[int]] = {}
+_MAX_MS: Dict[Tuple[str, str], float] = {}
+_UNCOUNTED: "contextvars.ContextVar[bool]" = contextvars.ContextVar(
+    "limbo_cache_stats_uncounted", default=False
+)
+_STARTED = time.time()
+_INSTALLED = False
+
+
+def is_enabled() -> bool:
+    return env_flag("LIMBO_CACHE_STATS_ENABLED", True)
+
+
+def _counters(name: str) -> Dict[str, int]:
+    counters = _COUNTERS.get(name)
+    if counters is None:
+        counters = {"hits": 0, "stale": 0, "misses": 0, "writes": 0, "errors": 0}
+        _COUNTERS[name] = counters
+    return counters
+
+
+@contextmanager
+def uncounted() -> Iterator[None]:
+    """
+    Cache reads inside this block (prefetch probes, invalidation lookups, status
+    checks) are not Lidarr traffic and stay out of the counters.
+    """
+    token = _UNCOUNTED.set(True)
+    try:
+        yield
+    finally:
+        _UNCOUNTED.reset(token)
+
+
+def _record_latency(name: str, op: str, seconds: float) -> None:
+    key = (name, op)
+    counts = _LATENCY.get(key)
+    if counts is None:
+        counts = [0] * (len(_LATENCY_BUCKETS_MS) + 1)
+        _LATENCY[key] = counts
+    millis = seconds * 1000.0
+    counts[bisect.bisect_left(_LATENCY_BUCKETS_MS, millis)] += 1
+    _MAX_MS[key] = max(_MAX_MS.get(key, 0.0), millis)
+
+
+def _classify(result: Any) -> str:
+    from lidarrmetadata import provider as provider_api
+
+    if not isinstance(result, tuple) or len(result) != 2:
+        return "hits" if result is not None else "misses"
+    value, expiry = result
+    if value is None:
+        return "misses"
+    try:
+        if expiry is not None and expiry <= provider_api.utcnow():
+            return "stale"
+    except TypeError:
+        pass
+    return "hits"
+
+
+def _wrap_get(name: str, func):
+    async def _limbo_stats_get(*args, **kwargs):
+        if _UNCOUNTED.get():
+            return await func(*args, **kwargs)
+        started = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            _counters(name)["errors"] += 1
+            raise
+        _record_latency(name, "read", time.perf_counter() - started)
+        _counters(name)[_classify(result)] += 1
+        return result
+
+    return _limbo_stats_get
+
+
+def _wrap_set(name: str, func):
+    async def _limbo_stats_set(*args, **kwargs):
+        started = time.perf_counter()
+        try:
+            result = await func(*args, **kwargs)
+        except Exception:
+            _counters(name)["errors"] += 1
+            raise
+        _record_latency(name, "write", time.perf_counter() - started)
+        _counters(name)["writes"] += 1
+        return result
+
+    return _limbo_stats_set
+
+
+def install() -> None:
+    """
+    Wrap get/set on each cache object with hit/miss counters and latency sampling.
+    """
+    global _INSTALLED
+    if _INSTALLED or not is_enabled():
+        return
+    _INSTALLED = True
+    for name, cache in cache_tables.cache_targets():
+        if getattr(cache, "_limbo_stats_wrapped", False):
+            continue
+        try:
+            cache.get = _wrap_get(name, cache.get)
+            cache.set = _wrap_set(name, cache.set)
+            cache._limbo_stats_wrapped = True
+        except Exception:
+            logger.warning("Limbo cache stats: cannot instrument %s cache", name)
+        _counters(name)
+
+
+def _percentiles(name: str, op: str) -> Dict[str, Optional[float]]:
+    """
+    Percentiles since startup, as the upper bound of the bucket each one falls in.
+    """
+    counts = _LATENCY.get((name, op))
+    total = sum(counts) if counts else 0
+    if not total:
+        return {"p50": None, "p95": None, "p99": None}
+    result: Dict[str, Optional[float]] = {}
+    for label, fraction in (("p50", 0.50), ("p95", 0.95), ("p99", 0.99)):
+        target = fraction * total
+        seen = 0
+        for index, count in enumerate(counts):
+            seen += count
+            if seen >= target:
+                break
+        if index < len(_LATENCY_BUCKETS_MS):
+            result[label] = float(_LATENCY_BUCKETS_MS[index])
+        else:
+            result[label] = round(_MAX_MS[(name, op)], 3)
+    return result
+
+
+def get_process_stats() -> Dict[str, Dict[str, Any]]:
+    stats: Dict[str, Dict[str, Any]] = {}
+    for name, counters in _COUNTERS.items():
+        reads = counters["hits"] + counters["stale"] + counters["misses"]
+        stats[name] = {
+            **counters,
+            "reads": reads,
+            "hit_rate": round(counters["hits"] / reads, 4) if reads else None,
+            "read_ms": _percentiles(name, "read"),
+            "write_ms": _percentiles(name, "write"),
+        }
+    return stats
+
+
+async def _table_stats(cache: object) -> Dict[str, Any]:
+    table = cache._db_table
+    pool = await cache_tables.get_pool(cache)
+    async with pool.acquire() as conn:
+        row = await conn.fetchrow(
+            "SELECT c.reltuples::bigint AS estimated_rows, "
+            "pg_total_relation_size(c.oid) AS total_bytes, "
+            "pg_relation_size(c.oid) AS table_bytes, "
+            "s.n_live_tup, s.n_dead_tup, s.last_autovacuum, s.last_autoanalyze "
+            "FROM pg_class c LEFT JOIN pg_stat_user_tables s ON s.relid = c.oid "
+            "WHERE c.oid = to_regclass($1::text)",
+            table,
+        )
+        if row is None:
+            return {"error": "table not found"}
+        rows = row["n_live_tup"]
+        if rows is None or (rows == 0 and (row["estimated_rows"] or 0) > 0):
+            rows = max(0, row["estimated_rows"] or 0)
+
+        # Small tables are read in full; larger ones through a block sample.
+        sample_sql = (
+            f"SELECT count(*) AS sampled, "
+            f"count(*) FILTER (WHERE expires <= current_timestamp) AS expired, "
+            f"avg(octet_length(value)) AS avg_bytes FROM {table}"
+        )
+        full_scan = rows <= env_int("LIMBO_CACHE_STATS_FULL_SCAN_ROWS", 20000, 0)
+        if full_scan:
+            sample = await conn.fetchrow(sample_sql)
+        else:
+            percent = env_float("LIMBO_CACHE_STATS_SAMPLE_PERCENT", 1.0, 0.01)
+            sample = await conn.fetchrow(
+                f"{sample_sql} TABLESAMPLE SYSTEM ($1::real)", min(percent, 100.0)
+            )
+
+    sampled = sample["sampled"] or 0
+    return {
+        "rows": int(sample["sampled"]) if full_scan else int(rows),
+        "total_bytes": row["total_bytes"],
+        "table_bytes": row["table_bytes"],
+        "dead_rows": row["n_dead_tup"],
+        "last_autovacuum": row["last_autovacuum"],
+        "last_autoanalyze": row["last_autoanalyze"],
+        "sampled_rows": int(sampled),
+        "exact": full_scan,
+        "expired_fraction": round(sample["expired"] / sampled, 4) if sampled else None,
+        "avg_entry_bytes": round(float(sample["avg_bytes"]), 1)
+        if sample["avg_bytes"] is not None
+        else None,
+    }
+
+
+async def collect_table_stats() -> Dict[str, Dict[str, Any]]:
+    """
+    Read row counts, sizes and a sampled expired fraction for every Postgres cache table.
+    """
+    stats: Dict[str, Dict[str, Any]] = {}
+    for name, cache in cache_tables.postgres_cache_targets():
+        try:
+            stats[name] = await _table_stats(cache)
+        except Exception as exc:
+            logger.debug("Limbo cache stats: %s failed: %s", name, exc)
+            stats[name] = {"error": str(exc) or exc.__class__.__name__}
+    return stats
+
+
+def build_stats() -> Dict[str, Any]:
+    from lidarrmetadata import status_poller
+
+    tables = status_poller.get_value("cache") or {}
+    process = get_process_stats()
+    names = [name for name, _cache in cache_tables.cache_targets()]
+    return {
+        "since": _STARTED,
+        "worker": workers.worker_id(),
+        "tables_updated": status_poller.get_snapshot().get("cache", {}).get("updated"),
+        "caches": {
+            name: {"table": tables.get(name), "process": process.get(name)}
+            for name in names
+        },
+    }
+
+
+def _format_bytes(value: Optional[float]) -> str:
+    if value is None:
+        return "?"
+    for unit in ("B", "KB", "MB", "GB"):
+        if value < 1024 or unit == "GB":
+            return f"{value:.0f} {unit}" if unit == "B" else f"{value:.1f} {unit}"
+        value /= 1024.0
+    return "?"
+
+
+def summary_rows() -> List[Tuple[str, str]]:
+    """
+    One (label, text) line per cache for the root page.
+    """
+    rows = []
+    for name, entry in build_stats()["caches"].items():
+        table = entry["table"] or {}
+        process = entry["process"] or {}
+        parts = []
+        if table.get("error"):
+            parts.append("stats unavailable")
+        elif table:
+            parts.append(f"{table.get('rows', 0):,} rows")
+            parts.append(_format_bytes(table.get("total_bytes")))
+            if table.get("expired_fraction") is not None:
+                parts.append(f"{table['expired_fraction']:.0%} expired")
+        if process.get("hit_rate") is not None:
+            parts.append(f"{process['hit_rate']:.0%} hit")
+        rows.append((name.capitalize(), " · ".join(parts) or "no data yet"))
+    return rows
+
+
+def register_stats_routes() -> None:
+    from lidarrmetadata import app as upstream_app
+    from lidarrmetadata import status_poller
+    from quart import jsonify, request
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/cache/stats":
+            return
+
+    @upstream_app.app.route("/cache/stats", methods=["GET"])
+    async def _limbo_cache_stats():
+        if str(request.args.get("refresh") or "").lower() in {"1", "true", "yes"}:
+            await status_poller.refresh("cache")
+        return jsonify(jsonable(build_stats()))
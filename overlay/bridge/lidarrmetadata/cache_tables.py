@@ -0,0 +1,101 @@
+import inspect
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+
+def cache_targets() -> Iterable[Tuple[str, object]]:
+    from lidarrmetadata import util
+
+    return (
+        ("artist", util.ARTIST_CACHE),
+        ("album", util.ALBUM_CACHE),
+        ("spotify", util.SPOTIFY_CACHE),
+        ("fanart", util.FANART_CACHE),
+        ("tadb", util.TADB_CACHE),
+        ("wikipedia", util.WIKI_CACHE),
+    )
+
+
+def postgres_cache_targets() -> Iterable[Tuple[str, object]]:
+    for name, cache in cache_targets():
+        if hasattr(cache, "_get_pool") and hasattr(cache, "_db_table"):
+            yield name, cache
+
+
+def get_postgres_cache(name: str) -> Optional[object]:
+    for target_name, cache in postgres_cache_targets():
+        if target_name == name:
+            return cache
+    return None
+
+
+def known_pools() -> List[Tuple[str, Any]]:
+    """
+    Cache pools that already exist, named ``cache:<tables>`` after the tables each serves.
+    """
+    pools: Dict[int, Tuple[Any, List[str]]] = {}
+    for name, cache in postgres_cache_targets():
+        pool = getattr(cache, "_pool", None)
+        if pool is not None and hasattr(pool, "get_size"):
+            # Caches usually share one pool.
+            pools.setdefault(id(pool), (pool, []))[1].append(name)
+    return [("cache:" + ",".join(sorted(names)), pool) for pool, names in pools.values()]
+
+
+async def maybe_await(value: object) -> object:
+    if inspect.isawaitable(value):
+        return await value
+    return value
+
+
+async def get_pool(cache: object):
+    return await maybe_await(cache._get_pool())
+
+
+def album_ids(artist: object) -> List[str]:
+    """
+    Release-group MBIDs listed in a cached artist record.
+    """
+    if not isinstance(artist, dict):
+        return []
+    albums = artist.get("Albums")
+    if albums is None:
+        albums = artist.get("albums")
+    ids: List[str] = []
+    for album in albums or []:
+        if not isinstance(album, dict):
+            continue
+        album_id = album.get("Id") or album.get("id")
+        if album_id:
+            ids.append(str(album_id))
+    return ids
+
+
+def rows_affected(status: Optional[str]) -> int:
+    """
+    Parse the row count from an asyncpg command status such as ``UPDATE 42``.
+    """
+    if not status:
+        return 0
+    try:
+        return int(str(status).rsplit(" ", 1)[-1])
+    except ValueError:
+        return 0
+
+
+async def next_key_batch(
+    conn, table: str, after: str, batch_size: int
+) -> Optional[Tuple[str, int]]:
+    """
+    Return the largest key and the number of keys in the next batch of up to
+    ``batch_size`` keys after ``after``, or None when the table has no more keys. Walks
+    the primary-key index only.
+    """
+    row = await conn.fetchrow(
+        f"SELECT max(key) AS bound, count(*) AS keys FROM (SELECT key FROM {table} "
+        f"WHERE key > $1 ORDER BY key LIMIT $2) AS batch",
+        after,
+        batch_size,
+    )
+    if row is None or row["bound"] is None:
+        return None
+    return row["bound"], int(row["keys"])
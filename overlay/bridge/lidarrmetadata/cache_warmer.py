@@ -0,0 +1,345 @@
+import asyncio
+import logging
+import os
+import time
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from lidarrmetadata import background
+from lidarrmetadata import state_store
+from lidarrmetadata.env_utils import env_flag, env_float, env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+_STATE_DIR = Path(os.environ.get("LIMBO_INIT_STATE_DIR", "/metadata/init-state"))
+_STATE_FILE = Path(
+    os.environ.get(
+        "LIMBO_WARM_STATE_FILE",
+        str(_STATE_DIR / "cache_warm_state.json"),
+    )
+)
+state_store.register("cache_warm", _STATE_FILE)
+_TASK_NAME = "cache-warmer"
+_CHECKPOINT_EVERY = 25
+
+_STATUS: Dict[str, Any] = {
+    "enabled": False,
+    "running": False,
+    "phase": "idle",
+    "window": "",
+    "total": 0,
+    "done": 0,
+    "errors": 0,
+    "started_at": None,
+    "finished_at": None,
+    "last_error": None,
+}
+
+
+def _warm_enabled() -> bool:
+    return env_flag("LIMBO_WARM_ENABLED", False)
+
+
+_DEFAULT_WINDOW = "02:00-05:00"
+# _parse_window result for a value that is neither a window nor "any".
+_INVALID = object()
+_WARNED_WINDOWS: Set[str] = set()
+
+
+def _warm_window() -> str:
+    return env_str("LIMBO_WARM_WINDOW", _DEFAULT_WINDOW)
+
+
+def _parse_clock(value: str) -> Optional[Tuple[int, int]]:
+    try:
+        hour_text, minute_text = value.strip().split(":", 1)
+        hour, minute = int(hour_text), int(minute_text)
+    except (ValueError, AttributeError):
+        return None
+    if not (0 <= hour <= 23 and 0 <= minute <= 59):
+        return None
+    return hour, minute
+
+
+def _parse_window(value: str) -> Any:
+    """
+    ``(start, end)`` clock pairs, None for "any", or ``_INVALID``.
+    """
+    if not value or value.lower() in {"any", "always", "*"}:
+        return None
+    if "-" not in value:
+        return _INVALID
+    start_text, end_text = value.split("-", 1)
+    start = _parse_clock(start_text)
+    end = _parse_clock(end_text)
+    if start is None or end is None:
+        return _INVALID
+    return start, end
+
+
+def _current_window() -> Optional[Tuple[Tuple[int, int], Tuple[int, int]]]:
+    """
+    The configured window; a typo falls back to the default rather than running all day.
+    """
+    value = _warm_window()
+    window = _parse_window(value)
+    if window is _INVALID:
+        if value not in _WARNED_WINDOWS:
+            _WARNED_WINDOWS.add(value)
+            logger.warning(
+                "Limbo cache warmer: invalid LIMBO_WARM_WINDOW %r; using %s",
+                value,
+                _DEFAULT_WINDOW,
+            )
+        window = _parse_window(_DEFAULT_WINDOW)
+    return window
+
+
+def _in_window(now: datetime, window: Optional[Tuple[Tuple[int, int], Tuple[int, int]]]) -> bool:
+    if window is None:
+        return True
+    start, end = window
+    minutes = now.hour * 60 + now.minute
+    start_minutes = start[0] * 60 + start[1]
+    end_minutes = end[0] * 60 + end[1]
+    if start_minutes == end_minutes:
+        return True
+    if start_minutes < end_minutes:
+        return start_minutes <= minutes < end_minutes
+    return minutes >= start_minutes or minutes < end_minutes
+
+
+def _seconds_until_window(now: datetime, window: Optional[Tuple[Tuple[int, int], Tuple[int, int]]]) -> float:
+    if window is None or _in_window(now, window):
+        return 0.0
+    start = window[0]
+    target = now.replace(hour=start[0], minute=start[1], second=0, microsecond=0)
+    if target <= now:
+        target += timedelta(days=1)
+    return max(1.0, (target - now).total_seconds())
+
+
+def _load_state() -> Dict[str, Any]:
+    data = state_store.get("cache_warm")
+    return data if isinstance(data, dict) else {}
+
+
+def _save_state(state: Dict[str, Any]) -> None:
+    state_store.put("cache_warm", state)
+
+
+async def _fetch_lidarr_library(base_url: str, api_key: str) -> List[List[str]]:
+    from lidarrmetadata import http_client
+
+    headers = {"X-Api-Key": api_key}
+    timeout = env_float("LIMBO_WARM_LIDARR_TIMEOUT", 60.0, 1.0)
+    items: List[List[str]] = []
+    result = await http_client.request(
+        "GET", base_url.rstrip("/") + "/api/v1/artist", headers=headers, timeout=timeout
+    )
+    if result.status != 200:
+        raise RuntimeError(f"Lidarr artist list: status {result.status}")
+    artists = result.data
+    result = await http_client.request(
+        "GET", base_url.rstrip("/") + "/api/v1/album", headers=headers, timeout=timeout
+    )
+    if result.status != 200:
+        raise RuntimeError(f"Lidarr album list: status {result.status}")
+    albums = result.data
+
+    seen = set()
+    for artist in artists or []:
+        mbid = str(artist.get("foreignArtistId") or "").strip()
+        if mbid and ("artist", mbid) not in seen:
+            seen.add(("artist", mbid))
+            items.append(["artist", mbid])
+    for album in albums or []:
+        mbid = str(album.get("foreignAlbumId") or "").strip()
+        if mbid and ("album", mbid) not in seen:
+            seen.add(("album", mbid))
+            items.append(["album", mbid])
+    return items
+
+
+async def warm_artist(mbid: str) -> None:
+    """
+    Load an artist through the upstream API so ARTIST_CACHE and the provider caches fill.
+    """
+    from lidarrmetadata import api as api_mod
+
+    await api_mod.get_artist_info(mbid)
+
+
+async def warm_release_group(mbid: str) -> None:
+    """
+    Load a release group through the upstream API so ALBUM_CACHE and the provider caches fill.
+    """
+    from lidarrmetadata import api as api_mod
+
+    await api_mod.get_release_group_info(mbid)
+
+
+async def _warm_item(kind: str, mbid: str) -> None:
+    if kind == "artist":
+        await warm_artist(mbid)
+    else:
+        await warm_release_group(mbid)
+
+
+async def run_pass(force: bool = False) -> None:
+    """
+    Warm every artist and album from the Lidarr library, resuming a previous pass if one
+    was interrupted. Outside the configured window the pass stops at a checkpoint unless
+    forced.
+    """
+    from lidarrmetadata import root_patch
+
+    window = _current_window()
+    state = _load_state()
+    items = state.get("items") if isinstance(state.get("items"), list) else None
+    cursor = int(state.get("cursor") or 0)
+
+    _STATUS.update(
+        {
+            "running": True,
+            "phase": "listing",
+            "started_at": datetime.now().astimezone().isoformat(),
+            "finished_at": None,
+            "errors": 0,
+            "last_error": None,
+        }
+    )
+    pending: List[asyncio.Task] = []
+    try:
+        if not items or cursor >= len(items):
+            base_url = root_patch.get_lidarr_base_url()
+            api_key = root_patch.get_lidarr_api_key()
+            if not base_url or not api_key:
+                _STATUS["phase"] = "waiting for Lidarr config"
+                return
+            items = await _fetch_lidarr_library(base_url, api_key)
+            cursor = 0
+            state = {"items": items, "cursor": 0, "created_at": time.time()}
+            _save_state(state)
+
+        _STATUS.update({"phase": "warming", "total": len(items), "done": cursor})
+        rate = env_float("LIMBO_WARM_RATE", 2.0, 0.0)
+        interval = 1.0 / rate if rate > 0 else 0.0
+        concurrency = env_int("LIMBO_WARM_CONCURRENCY", 2, 1)
+        semaphore = asyncio.Semaphore(concurrency)
+        next_at = time.monotonic()
+
+        async def _guarded(kind: str, mbid: str) -> None:
+            try:
+                await _warm_item(kind, mbid)
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                _STATUS["errors"] += 1
+                _STATUS["last_error"] = f"{kind} {mbid}: {exc}"
+            finally:
+                semaphore.release()
+
+        while cursor < len(items):
+            if not force and not _in_window(datetime.now(), window):
+                _STATUS["phase"] = "paused (outside window)"
+                break
+            delay = next_at - time.monotonic()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            next_at = max(next_at, time.monotonic()) + interval
+            await semaphore.acquire()
+            kind, mbid = items[cursor]
+            pending.append(asyncio.ensure_future(_guarded(kind, mbid)))
+            pending = [task for task in pending if not task.done()]
+            cursor += 1
+            _STATUS["done"] = cursor
+            if cursor % _CHECKPOINT_EVERY == 0:
+                state["cursor"] = cursor
+                _save_state(state)
+
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        state["cursor"] = cursor
+        if cursor >= len(items):
+            state["completed_at"] = time.time()
+            _STATUS["phase"] = "complete"
+        _save_state(state)
+    except asyncio.CancelledError:
+        unfinished = [task for task in pending if not task.done()]
+        for task in unfinished:
+            task.cancel()
+        # Items still in flight were not warmed; resume from the earliest of them.
+        state["cursor"] = max(0, cursor - len(unfinished))
+        _save_state(state)
+        raise
+    except Exception as exc:
+        _STATUS["phase"] = "failed"
+        _STATUS["last_error"] = str(exc)
+        logger.warning("Limbo cache warmer: pass failed: %s", exc)
+    finally:
+        _STATUS["running"] = False
+        _STATUS["finished_at"] = datetime.now().astimezone().isoformat()
+
+
+async def _warm_loop() -> None:
+    interval_hours = env_float("LIMBO_WARM_INTERVAL_HOURS", 24.0, 1.0)
+    while True:
+        window = _current_window()
+        wait = _seconds_until_window(datetime.now(), window)
+        if wait > 0:
+            _STATUS["phase"] = "waiting for window"
+            await asyncio.sleep(min(wait, 900.0))
+            continue
+
+        state = _load_state()
+        items = state.get("items") or []
+        cursor = int(state.get("cursor") or 0)
+        completed_at = float(state.get("completed_at") or 0)
+        resume = bool(items) and cursor < len(items)
+        due = (time.time() - completed_at) >= interval_hours * 3600
+        if (resume or due) and not _STATUS["running"]:
+            if resume:
+                logger.info("Limbo cache warmer: resuming pass at %s/%s", cursor, len(items))
+            await run_pass()
+        await asyncio.sleep(300.0)
+
+
+def get_status() -> Dict[str, Any]:
+    data = dict(_STATUS)
+    data["enabled"] = _warm_enabled()
+    data["window"] = _warm_window()
+    return data
+
+
+def register_warmer() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import jsonify, request
+
+    if _warm_enabled():
+        background.register(_TASK_NAME, _warm_loop, leader_only=True)
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/cache/warm":
+            return
+
+    @upstream_app.app.route("/cache/warm", methods=["GET", "POST"])
+    async def _limbo_cache_warm():
+        if request.method == "GET":
+            return jsonify(get_status())
+        if request.headers.get("authorization") != upstream_app.app.config.get(
+            "LIMBO_APIKEY"
+        ):
+            return jsonify("Unauthorized"), 401
+        payload = await request.get_json(silent=True) or {}
+        if not isinstance(payload, dict):
+            payload = {}
+        if _STATUS["running"]:
+            return jsonify({"ok": False, "error": "Warm pass already running."}), 409
+        if payload.get("restart"):
+            state = _load_state()
+            state["cursor"] = len(state.get("items") or [])
+            _save_state(state)
+        background.spawn("cache-warm-pass", run_pass(force=True))
+        return jsonify({"ok": True, "status": get_status()})
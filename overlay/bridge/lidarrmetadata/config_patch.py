@@ -1,15 +1,17 @@
-import json
 import os
 from pathlib import Path
 from typing import Any, Dict, Optional, List, Tuple
 
-import aiohttp
-
 from quart import jsonify, request
 
 from lidarrmetadata import app as upstream_app
+from lidarrmetadata import filter_sync
+from lidarrmetadata import jobs
+from lidarrmetadata import lidarr_index
+from lidarrmetadata import lidarr_refresh
 from lidarrmetadata import release_filters
 from lidarrmetadata import root_patch
+from lidarrmetadata import state_store
 
 _STATE_DIR = Path(os.environ.get("LIMBO_INIT_STATE_DIR", "/metadata/init-state"))
 _STATE_FILE = Path(
@@ -18,6 +20,7 @@ _STATE_FILE = Path(
         str(_STATE_DIR / "release-filter.json"),
     )
 )
+state_store.register("release_filter", _STATE_FILE, "json", pretty=True)
 
 
 def register_config_routes() -> None:
@@ -38,6 +41,8 @@ def register_config_routes() -> None:
                 "keep_only_media_count": release_filters.get_runtime_media_keep_only(),
                 "prefer": release_filters.get_runtime_media_prefer(),
                 "prefer_value": prefer_value,
+                "generation": release_filters.get_generation(),
+                "sync": filter_sync.get_status(),
             }
             data.update(
                 {
@@ -117,6 +122,8 @@ def register_config_routes() -> None:
             }
         )
 
+    lidarr_refresh.register_resume()
+
     for rule in upstream_app.app.url_map.iter_rules():
         if rule.rule == "/config/refresh-releases":
             return
@@ -132,95 +139,12 @@ def register_config_routes() -> None:
         if not base_url or not api_key:
             return jsonify({"ok": False, "error": "Missing Lidarr base URL or API key."}), 400
 
-        resolved_ids: List[int] = []
-        resolved_artist_ids: List[int] = []
-        missing_mbids: List[str] = []
-        errors: List[str] = []
-        timeout = aiohttp.ClientTimeout(total=5)
-        headers = {"X-Api-Key": api_key}
-
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            for mbid in mbids:
-                url = base_url.rstrip("/") + "/api/v1/album"
-                try:
-                    async with session.get(url, headers=headers, params={"foreignAlbumId": mbid}) as resp:
-                        if resp.status != 200:
-                            errors.append(f"MBID {mbid}: status {resp.status}")
-                            continue
-                        data = await resp.json()
-                except Exception as exc:
-                    errors.append(f"MBID {mbid}: {exc}")
-                    continue
-                if data:
-                    for item in data:
-                        album_id = item.get("id")
-                        if isinstance(album_id, int):
-                            resolved_ids.append(album_id)
-                    continue
-
-                artist_url = base_url.rstrip("/") + "/api/v1/artist"
-                try:
-                    async with session.get(artist_url, headers=headers, params={"mbId": mbid}) as resp:
-                        if resp.status != 200:
-                            errors.append(f"Artist MBID {mbid}: status {resp.status}")
-                            continue
-                        artist_data = await resp.json()
-                except Exception as exc:
-                    errors.append(f"Artist MBID {mbid}: {exc}")
-                    continue
-                if not artist_data:
-                    missing_mbids.append(mbid)
-                    continue
-                for artist in artist_data:
-                    artist_id = artist.get("id")
-                    if isinstance(artist_id, int):
-                        resolved_artist_ids.append(artist_id)
-
-            artist_ids_unique = sorted(set(resolved_artist_ids))
-            for artist_id in artist_ids_unique:
-                try:
-                    async with session.get(
-                        base_url.rstrip("/") + "/api/v1/album",
-                        headers=headers,
-                        params={"artistId": artist_id},
-                    ) as resp:
-                        if resp.status != 200:
-                            errors.append(f"Artist {artist_id}: status {resp.status}")
-                            continue
-                        albums = await resp.json()
-                except Exception as exc:
-                    errors.append(f"Artist {artist_id}: {exc}")
-                    continue
-                for item in albums or []:
-                    album_id = item.get("id")
-                    if isinstance(album_id, int):
-                        resolved_ids.append(album_id)
-
-            all_ids = sorted(set(lidarr_ids + resolved_ids))
-            queued: List[int] = []
-            for album_id in all_ids:
-                try:
-                    cmd_url = base_url.rstrip("/") + "/api/v1/command"
-                    payload = {"name": "RefreshAlbum", "albumId": album_id}
-                    async with session.post(cmd_url, headers=headers, json=payload) as resp:
-                        if resp.status not in {200, 201}:
-                            errors.append(f"Album {album_id}: status {resp.status}")
-                            continue
-                    queued.append(album_id)
-                except Exception as exc:
-                    errors.append(f"Album {album_id}: {exc}")
-
-        return jsonify(
-            {
-                "ok": True,
-                "requested_ids": lidarr_ids,
-                "resolved_ids": resolved_ids,
-                "queued_ids": queued,
-                "resolved_artist_ids": artist_ids_unique,
-                "missing_mbids": missing_mbids,
-                "errors": errors,
-            }
-        )
+        job = lidarr_refresh.start_refresh(lidarr_ids, mbids)
+        if root_patch._wants_wait(request):
+            await jobs.wait(job)
+            if job["status"] == "done":
+                return jsonify({**job["result"], "job": jobs.describe(job)})
+        return jsonify({"ok": True, "job": jobs.describe(job)}), 202
 
 
 def _is_truthy(value) -> bool:
@@ -396,11 +320,15 @@ def _parse_mbid_list(values) -> List[str]:
 
 
 def _load_persisted_config() -> None:
-    try:
-        data = json.loads(_STATE_FILE.read_text(encoding="utf-8"))
-    except Exception:
-        return
+    data = state_store.get("release_filter")
+    if isinstance(data, dict):
+        apply_config(data)
+
 
+def apply_config(data: Dict[str, Any]) -> None:
+    """
+    Apply a persisted (or peer-published) release-filter config to this process.
+    """
     enabled = bool(data.get("enabled", True))
     exclude = data.get("exclude_media_formats") or []
     include = data.get("include_media_formats") or []
@@ -417,14 +345,6 @@ def _load_persisted_config() -> None:
     release_filters.set_runtime_media_keep_only(keep_only_count)
     release_filters.set_runtime_media_prefer(prefer)
 
-
-def _read_enabled_flag() -> bool:
-    try:
-        data = json.loads(_STATE_FILE.read_text(encoding="utf-8"))
-    except Exception:
-        return True
-    return bool(data.get("enabled", True))
-
     lidarr_version = (data.get("lidarr_version") or "").strip()
     if lidarr_version:
         root_patch.set_lidarr_version(lidarr_version)
@@ -442,9 +362,15 @@ def _read_enabled_flag() -> bool:
         root_patch.set_lidarr_client_ip(str(lidarr_client_ip))
 
 
+def _read_enabled_flag() -> bool:
+    data = state_store.get("release_filter")
+    if not isinstance(data, dict):
+        return True
+    return bool(data.get("enabled", True))
+
+
 def _persist_config(data: Dict[str, Any]) -> None:
     try:
-        _STATE_FILE.parent.mkdir(parents=True, exist_ok=True)
         payload = {
             "enabled": bool(data.get("enabled", True)),
             "exclude_media_formats": data.get("exclude_media_formats") or [],
@@ -469,6 +395,8 @@ def _persist_config(data: Dict[str, Any]) -> None:
         if data.get("lidarr_client_ip") is not None:
             payload["lidarr_client_ip"] = str(data.get("lidarr_client_ip") or "").strip()
             root_patch.set_lidarr_client_ip(payload["lidarr_client_ip"])
-        _STATE_FILE.write_text(json.dumps(payload, indent=2, sort_keys=True) + "\n", encoding="utf-8")
+        state_store.put("release_filter", payload)
+        filter_sync.publish(payload)
+        lidarr_index.request_sync()
     except Exception:
         return
@@ -2,7 +2,7 @@ import importlib
 import importlib.util
 import logging
 import os
-from typing import Any, Callable, Dict, Optional, Tuple
+from typing import Any, Callable, Dict, List, Optional, Tuple
 
 import asyncio
 import asyncpg
@@ -200,6 +200,24 @@ def _pool_env(pool_key: str, suffix: str) -> Optional[str]:
     return os.environ.get(f"LIMBO_DB_POOL_{key}_{suffix}")
 
 
+def known_pools() -> List[Tuple[str, Any]]:
+    """
+    MusicBrainz pools that already exist: ``default`` and one per opened pool key.
+    """
+    from lidarrmetadata import provider
+
+    pools: List[Tuple[str, Any]] = []
+    try:
+        for mb_provider in provider.get_providers_implementing(provider.DataVintageMixin):
+            default_pool = getattr(mb_provider, "_pool", None)
+            if default_pool is not None and hasattr(default_pool, "get_size"):
+                pools.append(("default", default_pool))
+            pools.extend(sorted((getattr(mb_provider, "_limbo_pools", None) or {}).items()))
+    except Exception:
+        pass
+    return pools
+
+
 async def get_pool(provider, pool_key: str):
     if pool_key == "default":
         return await provider._get_pool()
@@ -0,0 +1,155 @@
+import asyncio
+import json
+import logging
+import sys
+import time
+from typing import Any, Dict, Optional, Set
+
+from lidarrmetadata import background
+from lidarrmetadata import shutdown
+from lidarrmetadata.env_utils import env_flag, env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+_TASK_NAME = "events:watcher"
+_SUBSCRIBERS: Set[asyncio.Queue] = set()
+# Last message sent per key, so unchanged state is not re-sent and new clients start
+# from the current state.
+_LAST: Dict[str, str] = {}
+
+
+def is_enabled() -> bool:
+    return env_flag("LIMBO_EVENTS_ENABLED", True)
+
+
+def _format(event: str, text: str) -> str:
+    return f"event: {event}\ndata: {text}\n\n"
+
+
+def publish(event: str, data: Any, key: Optional[str] = None) -> None:
+    """
+    Send ``data`` to every connected client, unless it equals the last value sent
+    under ``key`` (defaults to the event name).
+    """
+    key = key or event
+    text = json.dumps(data, default=str, sort_keys=True)
+    message = _format(event, text)
+    if _LAST.get(key) == message:
+        return
+    _LAST[key] = message
+    for queue in list(_SUBSCRIBERS):
+        _offer(queue, message)
+
+
+def _offer(queue: asyncio.Queue, message: Optional[str]) -> None:
+    if queue.full():
+        # Slow client: drop its oldest message rather than block the watcher.
+        try:
+            queue.get_nowait()
+        except asyncio.QueueEmpty:
+            pass
+    queue.put_nowait(message)
+
+
+def _close_streams() -> None:
+    """
+    End every open stream when the process starts draining, so none of them holds
+    shutdown until the graceful timeout. Browsers reconnect to another process.
+    """
+    for queue in list(_SUBSCRIBERS):
+        _offer(queue, None)
+
+
+def _collect() -> None:
+    from lidarrmetadata import jobs
+    from lidarrmetadata import root_patch
+    from lidarrmetadata import status_poller
+
+    replication = status_poller.get_value("replication")
+    if replication is not None:
+        publish("replication", root_patch.replication_payload(replication))
+    current = set()
+    for job in jobs.list_jobs():
+        current.add(f"job:{job['id']}")
+        publish("job", job, key=f"job:{job['id']}")
+    for key in [key for key in _LAST if key.startswith("job:") and key not in current]:
+        _LAST.pop(key, None)
+    # The launcher loads the warmer only when it is enabled.
+    cache_warmer = sys.modules.get("lidarrmetadata.cache_warmer")
+    if cache_warmer is not None:
+        publish("warm", cache_warmer.get_status())
+
+
+async def _watch() -> None:
+    """
+    One shared watcher for every connected dashboard: while anyone is listening it
+    keeps the replication snapshot fresh and publishes whatever changed.
+    """
+    from lidarrmetadata import status_poller
+
+    interval = env_float("LIMBO_EVENTS_INTERVAL", 1.0, 0.1)
+    replication_interval = env_float("LIMBO_EVENTS_REPLICATION_INTERVAL", 5.0, 1.0)
+    last_replication_refresh = 0.0
+    while True:
+        if _SUBSCRIBERS:
+            now = time.monotonic()
+            if now - last_replication_refresh >= replication_interval:
+                status_poller.request_refresh("replication")
+                last_replication_refresh = now
+            try:
+                _collect()
+            except Exception:
+                logger.debug("Limbo events: collect failed", exc_info=True)
+        await asyncio.sleep(interval)
+
+
+def register_events() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import jsonify, make_response
+
+    if not is_enabled():
+        return
+
+    background.register(_TASK_NAME, _watch)
+    shutdown.on_drain(_close_streams)
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/events":
+            return
+
+    @upstream_app.app.route("/events", methods=["GET"])
+    async def _limbo_events():
+        if shutdown.is_draining():
+            return jsonify({"error": "shutting down"}), 503
+        if len(_SUBSCRIBERS) >= env_int("LIMBO_EVENTS_MAX_CLIENTS", 50, 1):
+            return jsonify({"error": "too many event stream clients"}), 503
+        queue: asyncio.Queue = asyncio.Queue(maxsize=env_int("LIMBO_EVENTS_QUEUE", 100, 1))
+        for message in list(_LAST.values())[-queue.maxsize :]:
+            queue.put_nowait(message)
+        _SUBSCRIBERS.add(queue)
+        keepalive = env_float("LIMBO_EVENTS_KEEPALIVE", 15.0, 1.0)
+
+        async def _stream():
+            try:
+                yield "retry: 5000\n\n".encode("utf-8")
+                while True:
+                    try:
+                        message = await asyncio.wait_for(queue.get(), keepalive)
+                    except asyncio.TimeoutError:
+                        message = ": keepalive\n\n"
+                    if message is None:
+                        break
+                    yield message.encode("utf-8")
+            finally:
+                _SUBSCRIBERS.discard(queue)
+
+        response = await make_response(
+            _stream(),
+            {
+                "Content-Type": "text/event-stream",
+                "Cache-Control": "no-cache",
+                "X-Accel-Buffering": "no",
+            },
+        )
+        response.timeout = None
+        return response
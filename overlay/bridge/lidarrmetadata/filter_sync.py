@@ -0,0 +1,259 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from typing import Any, Dict, Optional
+
+from lidarrmetadata import background
+from lidarrmetadata import cache_tables
+from lidarrmetadata import state_store
+from lidarrmetadata.env_utils import env_float, env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+_TASK_NAME = "filter-sync"
+_PUBLISH_TASK_NAME = "filter-sync:publish"
+_TABLE = "limbo_config"
+_CHANNEL = "limbo_config"
+_KEY = "release_filter"
+# Only the filter settings travel through the shared table; Lidarr credentials stay local.
+_SHARED_FIELDS = (
+    "enabled",
+    "exclude_media_formats",
+    "include_media_formats",
+    "keep_only_media_count",
+    "prefer",
+)
+
+_CREATE_SQL = f"""
+CREATE TABLE IF NOT EXISTS {_TABLE} (
+    key text PRIMARY KEY,
+    version bigint NOT NULL,
+    value jsonb NOT NULL,
+    updated_at timestamptz NOT NULL DEFAULT current_timestamp
+)
+"""
+
+_PUBLISH_SQL = f"""
+INSERT INTO {_TABLE} (key, version, value) VALUES ($1, 1, $2::jsonb)
+ON CONFLICT (key) DO UPDATE
+SET version = {_TABLE}.version + 1, value = EXCLUDED.value, updated_at = current_timestamp
+RETURNING version
+"""
+
+_STATE: Dict[str, Any] = {
+    "mode": None,
+    "version": 0,
+    "applied_at": None,
+    "published_at": None,
+    "last_error": None,
+}
+_PENDING: Dict[str, Any] = {}
+_TABLE_READY = False
+
+
+def _mode() -> str:
+    """
+    "file" (watch the shared state file), "postgres" (LISTEN/NOTIFY through the cache DB,
+    for replicas on several hosts, with the file watch as fallback) or "off".
+    """
+    mode = env_str("LIMBO_FILTER_SYNC", "file").strip().lower()
+    return mode if mode in {"postgres", "file", "off"} else "file"
+
+
+def _cache_pool_source() -> Optional[object]:
+    for _name, cache in cache_tables.postgres_cache_targets():
+        return cache
+    return None
+
+
+def _shared(config: Dict[str, Any]) -> Dict[str, Any]:
+    return {field: config.get(field) for field in _SHARED_FIELDS if field in config}
+
+
+def _apply(data: Any, source: str) -> None:
+    from lidarrmetadata import config_patch
+
+    if not isinstance(data, dict):
+        return
+    config_patch.apply_config(data)
+    if source == "postgres":
+        # Keep the local file current so a restart without the cache DB starts from it;
+        # the local-only fields (Lidarr URL, key, versions) are kept.
+        local = state_store.get(_KEY)
+        merged = dict(local) if isinstance(local, dict) else {}
+        merged.update(_shared(data))
+        state_store.put(_KEY, merged)
+    _STATE["applied_at"] = time.time()
+    logger.info("Limbo filter sync: applied config from %s", source)
+
+
+def publish(config: Dict[str, Any]) -> None:
+    """
+    Share a config change made in this process with every other worker and replica.
+    """
+    if _mode() != "postgres" or _cache_pool_source() is None:
+        # The state file write is the channel; peers pick it up by watching it.
+        return
+    _PENDING[_KEY] = _shared(config)
+    background.spawn(_PUBLISH_TASK_NAME, _publish_pending())
+
+
+async def _publish_pending() -> None:
+    if not _TABLE_READY:
+        # The listener creates the table, then publishes whatever is pending.
+        return
+    pool = await cache_tables.get_pool(_cache_pool_source())
+    while _PENDING:
+        value = _PENDING.pop(_KEY)
+        try:
+            async with pool.acquire() as conn:
+                version = await conn.fetchval(_PUBLISH_SQL, _KEY, json.dumps(value))
+                await conn.execute("SELECT pg_notify($1, $2)", _CHANNEL, str(version))
+            _STATE["version"] = max(_STATE["version"], int(version))
+            _STATE["published_at"] = time.time()
+        except Exception as exc:
+            _STATE["last_error"] = str(exc) or exc.__class__.__name__
+            logger.warning("Limbo filter sync: publish failed: %s", exc)
+            # Keep it (unless superseded) so it is published once the DB is back.
+            _PENDING.setdefault(_KEY, value)
+            return
+
+
+async def flush() -> None:
+    """
+    Publish a change still waiting for the cache DB, e.g. before shutdown.
+    """
+    if _PENDING and _cache_pool_source() is not None:
+        await _publish_pending()
+
+
+async def _fetch_and_apply(conn, source: str) -> None:
+    row = await conn.fetchrow(f"SELECT version, value FROM {_TABLE} WHERE key = $1", _KEY)
+    if row is None or row["version"] <= _STATE["version"]:
+        return
+    _STATE["version"] = row["version"]
+    value = row["value"]
+    _apply(json.loads(value) if isinstance(value, str) else value, source)
+
+
+async def _connect():
+    """
+    A dedicated cache-DB connection for LISTEN, so the cache pool keeps its full size.
+    """
+    import asyncpg
+
+    dsn = env_str("LIMBO_FILTER_SYNC_DSN", "")
+    if dsn:
+        return await asyncpg.connect(dsn)
+    return await asyncpg.connect(
+        host=env_str("POSTGRES_CACHE_HOST", "db"),
+        port=env_int("POSTGRES_CACHE_PORT", 5432, 1),
+        user=os.environ.get("POSTGRES_CACHE_USER") or os.environ.get("LIMBO_CACHE_USER") or "abc",
+        password=os.environ.get("POSTGRES_CACHE_PASSWORD")
+        or os.environ.get("LIMBO_CACHE_PASSWORD")
+        or "abc",
+        database=os.environ.get("POSTGRES_CACHE_DB")
+        or os.environ.get("LIMBO_CACHE_DB")
+        or "lm_cache_db",
+    )
+
+
+async def _listen() -> None:
+    """
+    Hold one cache-DB connection with LISTEN on the config channel. A notification only
+    carries the version; the row is read back so a missed or merged notify is harmless,
+    and the row is also re-checked on a slow poll.
+    """
+    global _TABLE_READY
+    poll = env_float("LIMBO_FILTER_SYNC_POLL", 60.0, 1.0)
+    wake = asyncio.Event()
+
+    def _on_notify(_conn, _pid, _channel, payload) -> None:
+        try:
+            if int(payload) > _STATE["version"]:
+                wake.set()
+        except (TypeError, ValueError):
+            wake.set()
+
+    conn = await _connect()
+    try:
+        if not _TABLE_READY:
+            await conn.execute(_CREATE_SQL)
+            _TABLE_READY = True
+        if await conn.fetchval(f"SELECT 1 FROM {_TABLE} WHERE key = $1", _KEY) is None:
+            # First node on this cache DB: seed the row from the local config.
+            local = state_store.get(_KEY)
+            if isinstance(local, dict):
+                publish(local)
+        await conn.add_listener(_CHANNEL, _on_notify)
+        if _PENDING:
+            # A change made while the DB was unreachable beats the stored row.
+            await _publish_pending()
+        _STATE["mode"] = "postgres"
+        _STATE["last_error"] = None
+        try:
+            while True:
+                await _fetch_and_apply(conn, "postgres")
+                wake.clear()
+                try:
+                    await asyncio.wait_for(wake.wait(), poll)
+                except asyncio.TimeoutError:
+                    pass
+        finally:
+            await conn.remove_listener(_CHANNEL, _on_notify)
+    finally:
+        await conn.close()
+
+
+async def _watch_file() -> None:
+    """
+    Fallback channel: workers sharing LIMBO_INIT_STATE_DIR see each other's writes.
+    """
+    _STATE["mode"] = "file"
+    interval = env_float("LIMBO_FILTER_SYNC_FILE_POLL", 5.0, 0.5)
+    last_seen = state_store.modified_at(_KEY)
+    while True:
+        await asyncio.sleep(interval)
+        current = state_store.modified_at(_KEY)
+        if current is None or current == last_seen:
+            continue
+        last_seen = current
+        _apply(state_store.reload(_KEY), "file")
+
+
+async def _sync_loop() -> None:
+    mode = _mode()
+    while True:
+        if mode == "postgres" and _cache_pool_source() is not None:
+            try:
+                await _listen()
+            except asyncio.CancelledError:
+                raise
+            except Exception as exc:
+                _STATE["last_error"] = str(exc) or exc.__class__.__name__
+                logger.warning("Limbo filter sync: LISTEN failed (%s); watching the file", exc)
+            # Cover the outage with the file watch, then try Postgres again.
+            try:
+                retry = env_float("LIMBO_FILTER_SYNC_RETRY", 30.0, 1.0)
+                await asyncio.wait_for(_watch_file(), retry)
+            except asyncio.TimeoutError:
+                pass
+            continue
+        await _watch_file()
+
+
+def get_status() -> Dict[str, Any]:
+    return {
+        "mode": _STATE["mode"] or _mode(),
+        "version": _STATE["version"],
+        "applied_at": _STATE["applied_at"],
+        "published_at": _STATE["published_at"],
+        "last_error": _STATE["last_error"],
+    }
+
+
+def register_sync() -> None:
+    if _mode() != "off":
+        background.register(_TASK_NAME, _sync_loop)
@@ -0,0 +1,152 @@
+import asyncio
+import logging
+from typing import Any, Dict, NamedTuple, Optional
+
+try:
+    import aiohttp
+except Exception:  # pragma: no cover - runtime dependency may be missing
+    aiohttp = None
+
+from lidarrmetadata.env_utils import env_flag, env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+_SESSION: Optional["aiohttp.ClientSession"] = None
+_SESSION_LOCK: Optional[asyncio.Lock] = None
+_INSTALLED = False
+_RETRY_STATUSES = {502, 503, 504}
+_IDEMPOTENT_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+
+class HttpResult(NamedTuple):
+    status: int
+    data: Any
+
+
+def is_available() -> bool:
+    return aiohttp is not None
+
+
+def _new_session() -> "aiohttp.ClientSession":
+    trace_configs = []
+    if env_flag("LIMBO_METRICS_ENABLED", True):
+        from lidarrmetadata import metrics
+
+        trace_configs = metrics.trace_configs()
+    connector = aiohttp.TCPConnector(
+        limit=env_int("LIMBO_HTTP_POOL_LIMIT", 100, 1),
+        limit_per_host=env_int("LIMBO_HTTP_POOL_PER_HOST", 10, 0),
+        ttl_dns_cache=env_int("LIMBO_HTTP_DNS_TTL", 300, 0),
+        keepalive_timeout=env_float("LIMBO_HTTP_KEEPALIVE", 30.0, 0.0),
+        enable_cleanup_closed=True,
+    )
+    timeout = aiohttp.ClientTimeout(total=env_float("LIMBO_HTTP_TIMEOUT", 10.0, 0.1))
+    return aiohttp.ClientSession(
+        connector=connector,
+        timeout=timeout,
+        headers={"User-Agent": "limbo"},
+        trace_configs=trace_configs,
+    )
+
+
+async def get_session() -> "aiohttp.ClientSession":
+    """
+    Return the application-wide session, creating it on first use.
+    """
+    global _SESSION, _SESSION_LOCK
+    if aiohttp is None:
+        raise RuntimeError("aiohttp not installed")
+    if _SESSION is not None and not _SESSION.closed:
+        return _SESSION
+    if _SESSION_LOCK is None:
+        _SESSION_LOCK = asyncio.Lock()
+    async with _SESSION_LOCK:
+        if _SESSION is None or _SESSION.closed:
+            _SESSION = _new_session()
+    return _SESSION
+
+
+async def close() -> None:
+    global _SESSION
+    session, _SESSION = _SESSION, None
+    if session is not None and not session.closed:
+        await session.close()
+
+
+async def request(
+    method: str,
+    url: str,
+    *,
+    headers: Optional[Dict[str, str]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    json: Any = None,
+    timeout: Optional[float] = None,
+    retries: Optional[int] = None,
+    read: str = "json",
+) -> HttpResult:
+    """
+    Issue a request on the shared session and read the body as JSON (``read="json"``)
+    or text. Idempotent requests are retried on connection errors and 502/503/504.
+    Errors after the last attempt are raised to the caller.
+    """
+    session = await get_session()
+    method = method.upper()
+    if retries is None:
+        retries = env_int("LIMBO_HTTP_RETRIES", 2, 0)
+    if method not in _IDEMPOTENT_METHODS:
+        retries = 0
+    request_timeout = aiohttp.ClientTimeout(total=timeout) if timeout else None
+    backoff = env_float("LIMBO_HTTP_RETRY_BACKOFF", 0.25, 0.0)
+
+    attempt = 0
+    while True:
+        try:
+            async with session.request(
+                method,
+                url,
+                headers=headers,
+                params=params,
+                json=json,
+                timeout=request_timeout,
+            ) as resp:
+                if resp.status in _RETRY_STATUSES and attempt < retries:
+                    raise _RetryableStatus(resp.status)
+                if read == "json":
+                    try:
+                        data = await resp.json(content_type=None)
+                    except Exception:
+                        data = None
+                else:
+                    data = await resp.text()
+                return HttpResult(resp.status, data)
+        except (_RetryableStatus, aiohttp.ClientConnectionError, asyncio.TimeoutError) as exc:
+            if attempt >= retries:
+                if isinstance(exc, _RetryableStatus):
+                    return HttpResult(exc.status, None)
+                raise
+            attempt += 1
+            logger.debug("Limbo HTTP: retrying %s %s (%s)", method, url, exc)
+            await asyncio.sleep(backoff * (2 ** (attempt - 1)))
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, status: int) -> None:
+        super().__init__(f"status {status}")
+        self.status = status
+
+
+def install() -> None:
+    global _INSTALLED
+    if _INSTALLED or aiohttp is None:
+        return
+    _INSTALLED = True
+
+    from lidarrmetadata import app as upstream_app
+
+    @upstream_app.app.before_serving
+    async def _limbo_http_client_start():
+        await get_session()
+
+    @upstream_app.app.after_serving
+    async def _limbo_http_client_stop():
+        await close()
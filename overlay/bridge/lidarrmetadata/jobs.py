@@ -0,0 +1,357 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+from lidarrmetadata import background
+from lidarrmetadata import workers
+from lidarrmetadata.env_utils import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+_JOBS: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_TERMINAL = {"done", "failed", "cancelled"}
+_MIRROR_TASK_NAME = "jobs-mirror"
+_SAFE_ID = re.compile(r"^[\w-]+$")
+# Pruned job ids whose mirrored records still need deleting.
+_FORGOTTEN: List[str] = []
+
+
+def _public(job: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: value for key, value in job.items() if not key.startswith("_")}
+
+
+def _prune() -> None:
+    keep = env_int("LIMBO_JOB_HISTORY", 50, 1)
+    finished = [job_id for job_id, job in _JOBS.items() if job["status"] in _TERMINAL]
+    for job_id in finished[: max(0, len(finished) - keep)]:
+        _JOBS.pop(job_id, None)
+        if workers.worker_id() is not None:
+            _FORGOTTEN.append(job_id)
+
+
+def create(
+    kind: str,
+    runner: Callable[[Dict[str, Any]], Awaitable[Any]],
+    params: Optional[Dict[str, Any]] = None,
+    job_id: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    Start ``runner(job)`` in the background and return its job record.
+
+    The runner reports progress by mutating ``job["progress"]`` (or calling update())
+    and returns the job result.
+    """
+    job: Dict[str, Any] = {
+        "id": job_id or uuid.uuid4().hex[:12],
+        "kind": kind,
+        "status": "queued",
+        "params": params or {},
+        "progress": {},
+        "result": None,
+        "error": None,
+        "created_at": time.time(),
+        "started_at": None,
+        "finished_at": None,
+    }
+    if workers.worker_id() is not None:
+        job["worker"] = workers.worker_id()
+    _JOBS[job["id"]] = job
+    _prune()
+    task = background.spawn(f"job:{job['id']}", _run(job, runner))
+    job["_task"] = task
+    return job
+
+
+async def _run(job: Dict[str, Any], runner: Callable[[Dict[str, Any]], Awaitable[Any]]) -> None:
+    job["status"] = "running"
+    job["started_at"] = time.time()
+    try:
+        job["result"] = await runner(job)
+        job["status"] = "done"
+    except asyncio.CancelledError:
+        job["status"] = "cancelled"
+    except Exception as exc:
+        job["status"] = "failed"
+        job["error"] = str(exc) or exc.__class__.__name__
+        logger.exception("Limbo job %s (%s) failed", job["id"], job["kind"])
+    finally:
+        job["finished_at"] = time.time()
+
+
+def update(job: Dict[str, Any], **progress: Any) -> None:
+    job["progress"].update(progress)
+
+
+def _mirror_interval() -> float:
+    return env_float("LIMBO_JOB_MIRROR_INTERVAL", 1.0, 0.1)
+
+
+def _record_path(directory: Path, job_id: str, suffix: str = ".json") -> Path:
+    return directory / f"{job_id}{suffix}"
+
+
+def _read_record(path: Path) -> Optional[Dict[str, Any]]:
+    """
+    Another worker's mirrored job. An active record its owner stopped refreshing
+    belongs to a worker that exited, so it is reported as failed.
+    """
+    try:
+        record = json.loads(path.read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+    if not isinstance(record, dict) or "id" not in record:
+        return None
+    if record.get("worker") == workers.worker_id():
+        # This worker's own jobs are served from memory; older records are leftovers.
+        return None
+    stale_after = max(10.0, _mirror_interval() * 10)
+    if (
+        record.get("status") not in _TERMINAL
+        and time.time() - float(record.get("mirrored_at") or 0) > stale_after
+    ):
+        record["status"] = "failed"
+        record["error"] = "worker stopped before the job finished"
+    record["_remote"] = True
+    return record
+
+
+def _remote_records() -> List[Dict[str, Any]]:
+    directory = workers.shared_dir("jobs")
+    if directory is None:
+        return []
+    records = []
+    for path in sorted(directory.glob("*.json")):
+        record = _read_record(path)
+        if record is not None and record["id"] not in _JOBS:
+            records.append(record)
+    return records
+
+
+def get(job_id: str) -> Optional[Dict[str, Any]]:
+    job = _JOBS.get(job_id)
+    directory = workers.shared_dir("jobs")
+    if job is None and directory is not None and _SAFE_ID.match(job_id):
+        job = _read_record(_record_path(directory, job_id))
+    return job
+
+
+def list_active(kind: str) -> List[Dict[str, Any]]:
+    return [
+        job
+        for job in [*_JOBS.values(), *_remote_records()]
+        if job["kind"] == kind and job["status"] not in _TERMINAL
+    ]
+
+
+def find_active(kind: str) -> Optional[Dict[str, Any]]:
+    active = list_active(kind)
+    return active[0] if active else None
+
+
+def list_jobs(kind: Optional[str] = None) -> List[Dict[str, Any]]:
+    found = [*_JOBS.values(), *_remote_records()]
+    found.sort(key=lambda job: float(job.get("created_at") or 0))
+    return [_public(job) for job in found if kind is None or job["kind"] == kind]
+
+
+def describe(job: Dict[str, Any]) -> Dict[str, Any]:
+    return _public(job)
+
+
+async def _wait_remote(job: Dict[str, Any], timeout: Optional[float]) -> Dict[str, Any]:
+    directory = workers.shared_dir("jobs")
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while directory is not None and job["status"] not in _TERMINAL:
+        delay = _mirror_interval()
+        if deadline is not None:
+            delay = min(delay, deadline - time.monotonic())
+            if delay <= 0:
+                break
+        await asyncio.sleep(delay)
+        record = _read_record(_record_path(directory, job["id"]))
+        if record is None:
+            break
+        job.update(record)
+    return job
+
+
+async def wait(job: Dict[str, Any], timeout: Optional[float] = None) -> Dict[str, Any]:
+    """
+    Wait for a job to finish. Another worker's job is followed through its mirrored
+    record, which is updated in place.
+    """
+    if job.get("_remote"):
+        return await _wait_remote(job, timeout)
+    task = job.get("_task")
+    if task is not None and not task.done():
+        try:
+            await asyncio.wait_for(asyncio.shield(task), timeout)
+        except asyncio.TimeoutError:
+            pass
+    return job
+
+
+def cancel(job_id: str) -> bool:
+    job = _JOBS.get(job_id)
+    if job is None:
+        remote = get(job_id)
+        directory = workers.shared_dir("jobs")
+        if remote is None or directory is None or remote["status"] in _TERMINAL:
+            return False
+        # The owning worker picks the marker up on its next mirror pass.
+        _record_path(directory, job_id, ".cancel").touch()
+        return True
+    if job["status"] in _TERMINAL:
+        return False
+    # Lets runners tell a user cancel apart from shutdown cancelling every task.
+    job["_cancel_requested"] = True
+    task = job.get("_task")
+    if task is not None and not task.done():
+        task.cancel()
+    if job["status"] == "queued":
+        job["status"] = "cancelled"
+        job["finished_at"] = time.time()
+    return True
+
+
+def _collect() -> Tuple[List[Tuple[str, str, bool]], List[str]]:
+    """
+    Records to mirror: active jobs every pass (their timestamp shows the owner is alive),
+    finished ones once.
+    """
+    now = time.time()
+    records = []
+    for job_id, job in _JOBS.items():
+        finished = job["status"] in _TERMINAL
+        if finished and job.get("_mirrored"):
+            continue
+        text = json.dumps({**_public(job), "mirrored_at": now}, default=str)
+        records.append((job_id, text, finished))
+    forgotten = list(_FORGOTTEN)
+    _FORGOTTEN.clear()
+    return records, forgotten
+
+
+def _unlink(path: Path) -> None:
+    try:
+        path.unlink()
+    except OSError:
+        pass
+
+
+def _sync_dir(
+    directory: Path,
+    records: List[Tuple[str, str, bool]],
+    forgotten: List[str],
+    local_ids: Set[str],
+) -> List[str]:
+    """
+    Write this worker's records and return (consuming) cancel markers for its jobs.
+    """
+    directory.mkdir(parents=True, exist_ok=True)
+    for job_id, text, _finished in records:
+        path = _record_path(directory, job_id)
+        tmp_path = _record_path(directory, job_id, f".{os.getpid()}.tmp")
+        tmp_path.write_text(text, encoding="utf-8")
+        tmp_path.replace(path)
+    for job_id in forgotten:
+        _unlink(_record_path(directory, job_id))
+        _unlink(_record_path(directory, job_id, ".cancel"))
+    cancelled = []
+    for path in directory.glob("*.cancel"):
+        job_id = path.name[: -len(".cancel")]
+        if job_id in local_ids:
+            cancelled.append(job_id)
+            _unlink(path)
+    return cancelled
+
+
+def _clear_own(directory: Path) -> None:
+    """
+    Remove records a previous process with this worker index left behind.
+    """
+    for path in directory.glob("*.json"):
+        try:
+            record = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        if isinstance(record, dict) and record.get("worker") == workers.worker_id():
+            _unlink(path)
+
+
+async def _mirror_once(loop: asyncio.AbstractEventLoop, directory: Path) -> None:
+    records, forgotten = _collect()
+    try:
+        cancelled = await loop.run_in_executor(
+            None, _sync_dir, directory, records, forgotten, set(_JOBS)
+        )
+    except OSError:
+        logger.debug("Limbo jobs: mirroring to %s failed", directory, exc_info=True)
+        return
+    for job_id, _text, finished in records:
+        if finished and job_id in _JOBS:
+            _JOBS[job_id]["_mirrored"] = True
+    for job_id in cancelled:
+        cancel(job_id)
+
+
+async def _mirror_loop() -> None:
+    """
+    Under workers, publish this worker's jobs to the shared state directory so any
+    worker can answer /jobs requests and cancel them.
+    """
+    directory = workers.shared_dir("jobs")
+    if directory is None:
+        return
+    loop = asyncio.get_running_loop()
+    directory.mkdir(parents=True, exist_ok=True)
+    await loop.run_in_executor(None, _clear_own, directory)
+    try:
+        while True:
+            await _mirror_once(loop, directory)
+            await asyncio.sleep(_mirror_interval())
+    finally:
+        records, forgotten = _collect()
+        try:
+            _sync_dir(directory, records, forgotten, set())
+        except OSError:
+            pass
+
+
+def register_job_routes() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import jsonify, request
+
+    background.register(_MIRROR_TASK_NAME, _mirror_loop)
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/jobs":
+            return
+
+    @upstream_app.app.route("/jobs", methods=["GET"])
+    async def _limbo_jobs():
+        return jsonify({"jobs": list_jobs(request.args.get("kind") or None)})
+
+    @upstream_app.app.route("/jobs/<job_id>", methods=["GET"])
+    async def _limbo_job(job_id):
+        job = get(job_id)
+        if job is None:
+            return jsonify({"error": "unknown job"}), 404
+        return jsonify(describe(job))
+
+    @upstream_app.app.route("/jobs/<job_id>/cancel", methods=["POST"])
+    async def _limbo_job_cancel(job_id):
+        if request.headers.get("authorization") != upstream_app.app.config.get(
+            "LIMBO_APIKEY"
+        ):
+            return jsonify("Unauthorized"), 401
+        if get(job_id) is None:
+            return jsonify({"error": "unknown job"}), 404
+        return jsonify({"ok": cancel(job_id)})
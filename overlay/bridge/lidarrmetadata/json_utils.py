@@ -0,0 +1,15 @@
+from datetime import datetime
+from typing import Any
+
+
+def jsonable(value: Any) -> Any:
+    """
+    Convert datetimes (at any depth in dicts, lists and tuples) to ISO strings for jsonify.
+    """
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {key: jsonable(item) for key, item in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [jsonable(item) for item in value]
+    return value
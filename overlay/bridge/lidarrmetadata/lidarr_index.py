@@ -0,0 +1,436 @@
+import asyncio
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from lidarrmetadata import background
+from lidarrmetadata import http_client
+from lidarrmetadata.env_utils import env_flag, env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+_TASK_NAME = "lidarr-index"
+_WATCH_TASK_NAME = "lidarr-index:watch"
+_SYNC_TASK_NAME = "lidarr-index:sync"
+_STATE_DIR = Path(os.environ.get("LIMBO_INIT_STATE_DIR", "/metadata/init-state"))
+_SNAPSHOT_FILE = Path(
+    os.environ.get("LIMBO_LIDARR_INDEX_FILE", str(_STATE_DIR / "lidarr_index.json"))
+)
+
+# MBID / artist ID -> Lidarr IDs, for the Lidarr instance in _STATE["base_url"].
+_ALBUMS: Dict[str, List[int]] = {}
+_ARTISTS: Dict[str, List[int]] = {}
+_ARTIST_ALBUMS: Dict[int, List[int]] = {}
+_STATE: Dict[str, Any] = {
+    "base_url": None,
+    "synced_at": None,
+    "refreshed_at": None,
+    "duration": None,
+    "last_error": None,
+    "source": None,
+}
+
+
+def _enabled() -> bool:
+    return env_flag("LIMBO_LIDARR_INDEX_ENABLED", True)
+
+
+def _interval() -> float:
+    return env_float("LIMBO_LIDARR_INDEX_INTERVAL", 900.0, 30.0)
+
+
+def _full_interval() -> float:
+    """
+    Seconds between full rebuilds; 0 rebuilds only on demand.
+    """
+    return env_float("LIMBO_LIDARR_INDEX_FULL_INTERVAL", 86400.0, 0.0)
+
+
+def _credentials() -> Optional[Dict[str, str]]:
+    from lidarrmetadata import root_patch
+
+    base_url = root_patch.get_lidarr_base_url()
+    api_key = root_patch.get_lidarr_api_key()
+    if not base_url or not api_key:
+        return None
+    return {"base_url": base_url.rstrip("/"), "api_key": api_key}
+
+
+def is_ready(base_url: Optional[str] = None) -> bool:
+    """
+    True once a sync has completed for ``base_url`` (or the configured Lidarr).
+    """
+    if _STATE["synced_at"] is None:
+        return False
+    if base_url is None:
+        credentials = _credentials()
+        base_url = credentials["base_url"] if credentials else None
+    return base_url is not None and base_url.rstrip("/") == _STATE["base_url"]
+
+
+def lookup_album(mbid: str) -> List[int]:
+    return list(_ALBUMS.get(mbid.lower(), []))
+
+
+def lookup_artist(mbid: str) -> List[int]:
+    return list(_ARTISTS.get(mbid.lower(), []))
+
+
+def artist_albums(artist_id: int) -> Optional[List[int]]:
+    albums = _ARTIST_ALBUMS.get(artist_id)
+    return list(albums) if albums is not None else None
+
+
+def _add(index: Dict[Any, List[int]], key: Any, value: int) -> None:
+    values = index.setdefault(key, [])
+    if value not in values:
+        values.append(value)
+
+
+def remember_album(mbid: str, album_id: int, artist_id: Optional[int] = None) -> None:
+    """
+    Fold an album found by a direct lookup into the index between syncs.
+    """
+    _add(_ALBUMS, mbid.lower(), album_id)
+    if artist_id is not None and artist_id in _ARTIST_ALBUMS:
+        _add(_ARTIST_ALBUMS, artist_id, album_id)
+
+
+def remember_artist(mbid: str, artist_id: int) -> None:
+    _add(_ARTISTS, mbid.lower(), artist_id)
+
+
+def remember_artist_albums(artist_id: int, album_ids: List[int]) -> None:
+    _ARTIST_ALBUMS[artist_id] = list(album_ids)
+
+
+async def _fetch(
+    base_url: str, api_key: str, path: str, params: Optional[Dict[str, Any]] = None
+) -> List[Dict[str, Any]]:
+    result = await http_client.request(
+        "GET",
+        base_url + path,
+        headers={"X-Api-Key": api_key},
+        params=params,
+        timeout=env_float("LIMBO_LIDARR_INDEX_TIMEOUT", 120.0, 5.0),
+    )
+    if result.status != 200:
+        raise RuntimeError(f"{path}: status {result.status}")
+    return [item for item in result.data or [] if isinstance(item, dict)]
+
+
+def _index_artists(
+    artists: Iterable[Dict[str, Any]]
+) -> Tuple[Dict[str, List[int]], Set[int]]:
+    artist_index: Dict[str, List[int]] = {}
+    artist_ids: Set[int] = set()
+    for artist in artists:
+        artist_id = artist.get("id")
+        mbid = artist.get("foreignArtistId")
+        if isinstance(artist_id, int):
+            artist_ids.add(artist_id)
+            if mbid:
+                _add(artist_index, str(mbid).lower(), artist_id)
+    return artist_index, artist_ids
+
+
+def _index_albums(
+    albums: Iterable[Dict[str, Any]],
+    album_index: Dict[str, List[int]],
+    artist_albums_index: Dict[int, List[int]],
+) -> None:
+    for album in albums:
+        album_id = album.get("id")
+        mbid = album.get("foreignAlbumId")
+        if not isinstance(album_id, int):
+            continue
+        if mbid:
+            _add(album_index, str(mbid).lower(), album_id)
+        artist_id = album.get("artistId")
+        if isinstance(artist_id, int):
+            _add(artist_albums_index, artist_id, album_id)
+
+
+def _swap(
+    albums: Dict[str, List[int]],
+    artists: Dict[str, List[int]],
+    artist_albums_index: Dict[int, List[int]],
+    **state: Any,
+) -> None:
+    # Swap in whole dicts so readers never see a half-built index.
+    global _ALBUMS, _ARTISTS, _ARTIST_ALBUMS
+    _ALBUMS, _ARTISTS, _ARTIST_ALBUMS = albums, artists, artist_albums_index
+    _STATE.update(state)
+
+
+def _write_snapshot(payload: Dict[str, Any]) -> None:
+    _SNAPSHOT_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = _SNAPSHOT_FILE.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+    tmp_path.replace(_SNAPSHOT_FILE)
+
+
+async def _save_snapshot() -> None:
+    """
+    Share the index with the other workers and keep it across restarts.
+    """
+    payload = {
+        "base_url": _STATE["base_url"],
+        "synced_at": _STATE["synced_at"],
+        "refreshed_at": _STATE["refreshed_at"],
+        "albums": dict(_ALBUMS),
+        "artists": dict(_ARTISTS),
+        "artist_albums": {str(key): value for key, value in _ARTIST_ALBUMS.items()},
+    }
+    try:
+        await asyncio.get_running_loop().run_in_executor(None, _write_snapshot, payload)
+    except Exception:
+        logger.warning("Limbo Lidarr index: failed to write %s", _SNAPSHOT_FILE, exc_info=True)
+
+
+def _snapshot_mtime() -> Optional[float]:
+    try:
+        return _SNAPSHOT_FILE.stat().st_mtime
+    except OSError:
+        return None
+
+
+async def load_snapshot() -> bool:
+    """
+    Replace the in-memory index with the last snapshot written by any worker.
+    """
+    loop = asyncio.get_running_loop()
+    try:
+        raw = await loop.run_in_executor(None, _SNAPSHOT_FILE.read_text, "utf-8")
+        data = json.loads(raw)
+    except (OSError, ValueError):
+        return False
+    if not isinstance(data, dict) or not data.get("base_url") or not data.get("synced_at"):
+        return False
+    _swap(
+        {str(key): list(value) for key, value in (data.get("albums") or {}).items()},
+        {str(key): list(value) for key, value in (data.get("artists") or {}).items()},
+        {int(key): list(value) for key, value in (data.get("artist_albums") or {}).items()},
+        base_url=data["base_url"],
+        synced_at=data["synced_at"],
+        refreshed_at=data.get("refreshed_at") or data["synced_at"],
+        source="snapshot",
+    )
+    return True
+
+
+async def sync() -> Dict[str, Any]:
+    """
+    Rebuild the index from one bulk artist and album fetch against the configured Lidarr.
+    """
+    credentials = _credentials()
+    if credentials is None:
+        raise RuntimeError("Missing Lidarr base URL or API key.")
+    base_url = credentials["base_url"]
+    started = time.monotonic()
+    try:
+        artists, albums = await asyncio.gather(
+            _fetch(base_url, credentials["api_key"], "/api/v1/artist"),
+            _fetch(base_url, credentials["api_key"], "/api/v1/album"),
+        )
+    except Exception as exc:
+        _STATE["last_error"] = str(exc) or exc.__class__.__name__
+        raise
+
+    artist_index, artist_ids = _index_artists(artists)
+    artist_albums_index: Dict[int, List[int]] = {artist_id: [] for artist_id in artist_ids}
+    album_index: Dict[str, List[int]] = {}
+    _index_albums(albums, album_index, artist_albums_index)
+
+    now = time.time()
+    _swap(
+        album_index,
+        artist_index,
+        artist_albums_index,
+        base_url=base_url,
+        synced_at=now,
+        refreshed_at=now,
+        duration=round(time.monotonic() - started, 3),
+        last_error=None,
+        source="full",
+    )
+    logger.info(
+        "Limbo Lidarr index: %s artists, %s albums in %.1fs",
+        len(artists),
+        len(albums),
+        _STATE["duration"],
+    )
+    await _save_snapshot()
+    return get_status()
+
+
+async def refresh() -> Dict[str, Any]:
+    """
+    Bring the index up to date from one artist listing plus an album listing for each
+    artist added since the last sync. Albums Lidarr adds to a known artist are picked up
+    by the direct-lookup fallback in release refresh and by the next full rebuild.
+    """
+    credentials = _credentials()
+    if credentials is None:
+        raise RuntimeError("Missing Lidarr base URL or API key.")
+    if not is_ready(credentials["base_url"]):
+        return await sync()
+    base_url, api_key = credentials["base_url"], credentials["api_key"]
+    started = time.monotonic()
+    try:
+        artists = await _fetch(base_url, api_key, "/api/v1/artist")
+        artist_index, artist_ids = _index_artists(artists)
+        added = sorted(artist_ids - set(_ARTIST_ALBUMS))
+        if len(added) > env_int("LIMBO_LIDARR_INDEX_INCREMENTAL_LIMIT", 200, 1):
+            # A bulk import or a different library: one full fetch is cheaper.
+            return await sync()
+        semaphore = asyncio.Semaphore(4)
+
+        async def _albums(artist_id: int) -> List[Dict[str, Any]]:
+            async with semaphore:
+                return await _fetch(base_url, api_key, "/api/v1/album", {"artistId": artist_id})
+
+        added_albums = await asyncio.gather(*(_albums(artist_id) for artist_id in added))
+    except Exception as exc:
+        _STATE["last_error"] = str(exc) or exc.__class__.__name__
+        raise
+
+    removed = set(_ARTIST_ALBUMS) - artist_ids
+    gone = {album_id for artist_id in removed for album_id in _ARTIST_ALBUMS[artist_id]}
+    artist_albums_index = {
+        artist_id: list(album_ids)
+        for artist_id, album_ids in _ARTIST_ALBUMS.items()
+        if artist_id not in removed
+    }
+    album_index: Dict[str, List[int]] = {}
+    for mbid, album_ids in _ALBUMS.items():
+        kept = [album_id for album_id in album_ids if album_id not in gone]
+        if kept:
+            album_index[mbid] = kept
+    for artist_id, albums in zip(added, added_albums):
+        artist_albums_index.setdefault(artist_id, [])
+        _index_albums(albums, album_index, artist_albums_index)
+
+    _swap(
+        album_index,
+        artist_index,
+        artist_albums_index,
+        refreshed_at=time.time(),
+        duration=round(time.monotonic() - started, 3),
+        last_error=None,
+        source="incremental",
+    )
+    if added or removed:
+        logger.info(
+            "Limbo Lidarr index: %s artist(s) added, %s removed", len(added), len(removed)
+        )
+        await _save_snapshot()
+    return get_status()
+
+
+def request_sync() -> None:
+    """
+    Schedule a sync when the index does not cover the configured Lidarr, e.g. after
+    the base URL changed. Other workers pick the result up from the snapshot.
+    """
+    if (
+        _enabled()
+        and background.is_leader()
+        and _credentials() is not None
+        and not is_ready()
+    ):
+        background.spawn(_SYNC_TASK_NAME, _quietly(sync))
+
+
+async def _quietly(step) -> None:
+    try:
+        await step()
+    except Exception as exc:
+        logger.warning("Limbo Lidarr index: %s failed: %s", step.__name__, exc)
+
+
+async def _index_loop() -> None:
+    """
+    Leader only: start from the last snapshot, then refresh incrementally every
+    interval and rebuild in full when the full interval has passed.
+    """
+    await load_snapshot()
+    while True:
+        if _credentials() is None:
+            await asyncio.sleep(30.0)
+            continue
+        if not is_ready():
+            await _quietly(sync)
+        else:
+            now = time.time()
+            full_interval = _full_interval()
+            if full_interval and now - float(_STATE["synced_at"]) >= full_interval:
+                await _quietly(sync)
+            elif now - float(_STATE["refreshed_at"] or 0) >= _interval():
+                await _quietly(refresh)
+            else:
+                await asyncio.sleep(min(30.0, _interval()))
+                continue
+        if _STATE["last_error"] or not is_ready():
+            await asyncio.sleep(60.0)
+
+
+async def _watch_snapshot() -> None:
+    """
+    Other workers: reload the index whenever the leader writes a new snapshot.
+    """
+    if background.is_leader():
+        return
+    interval = env_float("LIMBO_LIDARR_INDEX_WATCH", 5.0, 0.5)
+    seen: Optional[float] = None
+    while True:
+        mtime = _snapshot_mtime()
+        if mtime is not None and mtime != seen and await load_snapshot():
+            seen = mtime
+        await asyncio.sleep(interval)
+
+
+def get_status() -> Dict[str, Any]:
+    return {
+        "enabled": _enabled(),
+        "ready": is_ready(),
+        "base_url": _STATE["base_url"],
+        "synced_at": _STATE["synced_at"],
+        "refreshed_at": _STATE["refreshed_at"],
+        "source": _STATE["source"],
+        "duration": _STATE["duration"],
+        "last_error": _STATE["last_error"],
+        "interval": _interval(),
+        "full_interval": _full_interval(),
+        "albums": len(_ALBUMS),
+        "artists": len(_ARTISTS),
+    }
+
+
+def register_index() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import jsonify, request
+
+    if _enabled():
+        background.register(_TASK_NAME, _index_loop, leader_only=True)
+        background.register(_WATCH_TASK_NAME, _watch_snapshot)
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/lidarr/index":
+            return
+
+    @upstream_app.app.route("/lidarr/index", methods=["GET", "POST"])
+    async def _limbo_lidarr_index():
+        if request.method == "GET":
+            return jsonify(get_status())
+        if request.headers.get("authorization") != upstream_app.app.config.get(
+            "LIMBO_APIKEY"
+        ):
+            return jsonify("Unauthorized"), 401
+        try:
+            return jsonify({"ok": True, **(await sync())})
+        except Exception as exc:
+            return jsonify({"ok": False, "error": str(exc)}), 502
@@ -0,0 +1,393 @@
+import asyncio
+import logging
+import os
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from lidarrmetadata import background
+from lidarrmetadata import http_client
+from lidarrmetadata import jobs
+from lidarrmetadata import lidarr_index
+from lidarrmetadata import state_store
+from lidarrmetadata.env_utils import env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+_STATE_DIR = Path(os.environ.get("LIMBO_INIT_STATE_DIR", "/metadata/init-state"))
+_STATE_FILE = Path(
+    os.environ.get("LIMBO_REFRESH_STATE_FILE", str(_STATE_DIR / "refresh_releases_state.json"))
+)
+# job id -> request and the album IDs already queued, for resuming after a restart
+state_store.register("refresh_releases", _STATE_FILE, merge=True)
+_JOB_KIND = "refresh-releases"
+_RESUME_TASK_NAME = "refresh-releases:resume"
+
+# base URL -> whether Lidarr's RefreshAlbum command accepted an albumIds list
+_BATCH_SUPPORT: Dict[str, bool] = {}
+_ACTIVE_COMMAND_STATES = {"queued", "started"}
+
+
+def _concurrency() -> int:
+    return env_int("LIMBO_REFRESH_CONCURRENCY", 8, 1)
+
+
+def _timeout() -> float:
+    return env_float("LIMBO_REFRESH_TIMEOUT", 5.0, 0.5)
+
+
+class _Lidarr:
+    def __init__(self, base_url: str, api_key: str) -> None:
+        self.base_url = base_url.rstrip("/")
+        self.headers = {"X-Api-Key": api_key}
+        self.semaphore = asyncio.Semaphore(_concurrency())
+
+    async def call(self, method: str, path: str, **kwargs) -> http_client.HttpResult:
+        async with self.semaphore:
+            return await http_client.request(
+                method,
+                self.base_url + path,
+                headers=self.headers,
+                timeout=_timeout(),
+                **kwargs,
+            )
+
+
+def _album_ids(items: Any) -> List[int]:
+    ids = []
+    for item in items or []:
+        album_id = item.get("id") if isinstance(item, dict) else None
+        if isinstance(album_id, int):
+            ids.append(album_id)
+    return ids
+
+
+async def _resolve_mbid(lidarr: _Lidarr, mbid: str) -> Dict[str, Any]:
+    """
+    Resolve one MBID to Lidarr album IDs, or to artist IDs when it is not an album.
+    The local index answers first; Lidarr is only asked about MBIDs it has not seen.
+    """
+    if lidarr_index.is_ready(lidarr.base_url):
+        album_ids = lidarr_index.lookup_album(mbid)
+        if album_ids:
+            return {"album_ids": album_ids, "indexed": True}
+        artist_ids = lidarr_index.lookup_artist(mbid)
+        if artist_ids:
+            return {"artist_ids": artist_ids, "indexed": True}
+
+    try:
+        result = await lidarr.call("GET", "/api/v1/album", params={"foreignAlbumId": mbid})
+    except Exception as exc:
+        return {"error": f"MBID {mbid}: {exc}"}
+    if result.status != 200:
+        return {"error": f"MBID {mbid}: status {result.status}"}
+    if result.data:
+        album_ids = _album_ids(result.data)
+        if lidarr_index.is_ready(lidarr.base_url):
+            for album_id in album_ids:
+                lidarr_index.remember_album(mbid, album_id)
+        return {"album_ids": album_ids}
+
+    try:
+        result = await lidarr.call("GET", "/api/v1/artist", params={"mbId": mbid})
+    except Exception as exc:
+        return {"error": f"Artist MBID {mbid}: {exc}"}
+    if result.status != 200:
+        return {"error": f"Artist MBID {mbid}: status {result.status}"}
+    if not result.data:
+        return {"missing": mbid}
+    artist_ids = [
+        artist.get("id")
+        for artist in result.data
+        if isinstance(artist, dict) and isinstance(artist.get("id"), int)
+    ]
+    if lidarr_index.is_ready(lidarr.base_url):
+        for artist_id in artist_ids:
+            lidarr_index.remember_artist(mbid, artist_id)
+    return {"artist_ids": artist_ids}
+
+
+async def _artist_albums(lidarr: _Lidarr, artist_id: int) -> Dict[str, Any]:
+    if lidarr_index.is_ready(lidarr.base_url):
+        album_ids = lidarr_index.artist_albums(artist_id)
+        if album_ids is not None:
+            return {"album_ids": album_ids}
+    try:
+        result = await lidarr.call("GET", "/api/v1/album", params={"artistId": artist_id})
+    except Exception as exc:
+        return {"error": f"Artist {artist_id}: {exc}"}
+    if result.status != 200:
+        return {"error": f"Artist {artist_id}: status {result.status}"}
+    album_ids = _album_ids(result.data)
+    if lidarr_index.is_ready(lidarr.base_url):
+        lidarr_index.remember_artist_albums(artist_id, album_ids)
+    return {"album_ids": album_ids}
+
+
+async def _pending_refresh_ids(lidarr: _Lidarr) -> Set[int]:
+    """
+    Album IDs already covered by a queued or running RefreshAlbum command.
+    """
+    try:
+        result = await lidarr.call("GET", "/api/v1/command")
+    except Exception:
+        return set()
+    if result.status != 200 or not isinstance(result.data, list):
+        return set()
+    pending: Set[int] = set()
+    for command in result.data:
+        if not isinstance(command, dict) or command.get("name") != "RefreshAlbum":
+            continue
+        if str(command.get("status") or "").lower() not in _ACTIVE_COMMAND_STATES:
+            continue
+        body = command.get("body") or {}
+        if isinstance(body.get("albumId"), int):
+            pending.add(body["albumId"])
+        pending.update(value for value in body.get("albumIds") or [] if isinstance(value, int))
+    return pending
+
+
+async def _post_single(lidarr: _Lidarr, album_id: int) -> Tuple[int, Optional[str]]:
+    try:
+        result = await lidarr.call(
+            "POST", "/api/v1/command", json={"name": "RefreshAlbum", "albumId": album_id}
+        )
+    except Exception as exc:
+        return album_id, f"Album {album_id}: {exc}"
+    if result.status not in {200, 201}:
+        return album_id, f"Album {album_id}: status {result.status}"
+    return album_id, None
+
+
+async def _post_batch(lidarr: _Lidarr, album_ids: List[int]) -> Optional[bool]:
+    """
+    Post one RefreshAlbum command for several albums. ``albumId`` carries the first ID
+    so an older Lidarr that ignores ``albumIds`` still refreshes exactly that album.
+    Returns True when the batch was accepted, False when Lidarr ignored ``albumIds``
+    (only the first album was queued) and None on failure.
+    """
+    try:
+        result = await lidarr.call(
+            "POST",
+            "/api/v1/command",
+            json={"name": "RefreshAlbum", "albumId": album_ids[0], "albumIds": album_ids},
+        )
+    except Exception:
+        return None
+    if result.status not in {200, 201}:
+        return None
+    body = (result.data or {}).get("body") if isinstance(result.data, dict) else None
+    echoed = (body or {}).get("albumIds") if isinstance(body, dict) else None
+    return bool(echoed) and sorted(echoed) == sorted(album_ids)
+
+
+async def _queue_refreshes(
+    lidarr: _Lidarr,
+    album_ids: List[int],
+    errors: List[str],
+    on_queued: Optional[Callable[[Iterable[int]], None]] = None,
+) -> List[int]:
+    queued: List[int] = []
+
+    def _mark(ids: Iterable[int]) -> None:
+        ids = list(ids)
+        queued.extend(ids)
+        if on_queued is not None:
+            on_queued(ids)
+
+    remaining = list(album_ids)
+    batch_size = env_int("LIMBO_REFRESH_BATCH", 50, 1)
+    if batch_size > 1 and len(remaining) > 1 and _BATCH_SUPPORT.get(lidarr.base_url) is not False:
+        while remaining:
+            batch = remaining[:batch_size]
+            accepted = await _post_batch(lidarr, batch)
+            if accepted is None:
+                break
+            if accepted:
+                _BATCH_SUPPORT[lidarr.base_url] = True
+                _mark(batch)
+                remaining = remaining[batch_size:]
+                continue
+            logger.info("Limbo refresh: Lidarr ignores albumIds; posting one command per album")
+            _BATCH_SUPPORT[lidarr.base_url] = False
+            _mark(batch[:1])
+            remaining = remaining[1:]
+            break
+
+    results = await asyncio.gather(*(_post_single(lidarr, album_id) for album_id in remaining))
+    for album_id, error in results:
+        if error:
+            errors.append(error)
+        else:
+            _mark([album_id])
+    return queued
+
+
+async def refresh_releases(
+    base_url: str,
+    api_key: str,
+    lidarr_ids: List[int],
+    mbids: List[str],
+    on_queued: Optional[Callable[[Iterable[int]], None]] = None,
+    progress: Optional[Dict[str, Any]] = None,
+    skip_ids: Iterable[int] = (),
+) -> Dict[str, Any]:
+    """
+    Resolve MBIDs to Lidarr album IDs and queue RefreshAlbum commands for them.
+    Lookups run with bounded concurrency, albums already queued in Lidarr (or listed
+    in ``skip_ids``) are skipped and commands are batched when Lidarr accepts
+    ``albumIds``. ``progress`` is updated in place as phases complete.
+    """
+    lidarr = _Lidarr(base_url, api_key)
+    progress = progress if progress is not None else {}
+    resolved_ids: List[int] = []
+    resolved_artist_ids: List[int] = []
+    missing_mbids: List[str] = []
+    errors: List[str] = []
+    items: Dict[str, Dict[str, Any]] = {}
+
+    progress.update(phase="resolving", mbids_total=len(mbids), mbids_done=0)
+
+    async def _resolve(mbid: str) -> Dict[str, Any]:
+        outcome = await _resolve_mbid(lidarr, mbid)
+        progress["mbids_done"] += 1
+        return outcome
+
+    outcomes = await asyncio.gather(*(_resolve(mbid) for mbid in mbids))
+    for mbid, outcome in zip(mbids, outcomes):
+        items[mbid] = outcome
+        resolved_ids.extend(outcome.get("album_ids") or [])
+        resolved_artist_ids.extend(outcome.get("artist_ids") or [])
+        if outcome.get("missing"):
+            missing_mbids.append(outcome["missing"])
+        if outcome.get("error"):
+            errors.append(outcome["error"])
+
+    artist_ids_unique = sorted(set(resolved_artist_ids))
+    progress.update(phase="artists", artists_total=len(artist_ids_unique), artists_done=0)
+
+    async def _albums(artist_id: int) -> Dict[str, Any]:
+        outcome = await _artist_albums(lidarr, artist_id)
+        progress["artists_done"] += 1
+        return outcome
+
+    for outcome in await asyncio.gather(*(_albums(artist_id) for artist_id in artist_ids_unique)):
+        resolved_ids.extend(outcome.get("album_ids") or [])
+        if outcome.get("error"):
+            errors.append(outcome["error"])
+
+    skip = set(skip_ids)
+    all_ids = sorted(set(lidarr_ids + resolved_ids) - skip)
+    pending = await _pending_refresh_ids(lidarr) if all_ids else set()
+    already_queued = [album_id for album_id in all_ids if album_id in pending]
+    to_queue = [album_id for album_id in all_ids if album_id not in pending]
+    progress.update(phase="queueing", albums_total=len(to_queue), albums_queued=0)
+
+    def _queued(ids: Iterable[int]) -> None:
+        ids = list(ids)
+        progress["albums_queued"] += len(ids)
+        if on_queued is not None:
+            on_queued(ids)
+
+    queued = await _queue_refreshes(lidarr, to_queue, errors, _queued)
+    progress["phase"] = "done"
+
+    return {
+        "ok": True,
+        "requested_ids": lidarr_ids,
+        "resolved_ids": resolved_ids,
+        "queued_ids": sorted(skip) + queued,
+        "already_queued_ids": already_queued,
+        "resolved_artist_ids": artist_ids_unique,
+        "missing_mbids": missing_mbids,
+        "errors": errors,
+        "items": items,
+        "resolved_from_index": sum(1 for outcome in outcomes if outcome.get("indexed")),
+    }
+
+
+def _load_pending() -> Dict[str, Dict[str, Any]]:
+    data = state_store.get("refresh_releases")
+    return dict(data) if isinstance(data, dict) else {}
+
+
+def _save_pending(job_id: str, entry: Optional[Dict[str, Any]]) -> None:
+    pending = _load_pending()
+    if entry is None:
+        pending.pop(job_id, None)
+    else:
+        pending[job_id] = entry
+    state_store.put("refresh_releases", pending)
+
+
+async def _refresh_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    from lidarrmetadata import root_patch
+
+    params = job["params"]
+    entry = {
+        "lidarr_ids": params["lidarr_ids"],
+        "mbids": params["mbids"],
+        "queued_ids": list(params.get("queued_ids") or []),
+        "created_at": job["created_at"],
+    }
+    _save_pending(job["id"], entry)
+
+    def _checkpoint(ids: Iterable[int]) -> None:
+        entry["queued_ids"].extend(ids)
+        _save_pending(job["id"], entry)
+
+    try:
+        base_url = root_patch.get_lidarr_base_url()
+        api_key = root_patch.get_lidarr_api_key()
+        if not base_url or not api_key:
+            raise RuntimeError("Missing Lidarr base URL or API key.")
+        result = await refresh_releases(
+            base_url,
+            api_key,
+            params["lidarr_ids"],
+            params["mbids"],
+            on_queued=_checkpoint,
+            progress=job["progress"],
+            skip_ids=entry["queued_ids"],
+        )
+    except asyncio.CancelledError:
+        # Shutdown cancels every task too; keep the checkpoint so the job resumes.
+        if job.get("_cancel_requested"):
+            _save_pending(job["id"], None)
+        raise
+    except Exception:
+        _save_pending(job["id"], None)
+        raise
+    _save_pending(job["id"], None)
+    return result
+
+
+def start_refresh(
+    lidarr_ids: List[int],
+    mbids: List[str],
+    job_id: Optional[str] = None,
+    queued_ids: Optional[List[int]] = None,
+) -> Dict[str, Any]:
+    params: Dict[str, Any] = {"lidarr_ids": lidarr_ids, "mbids": mbids}
+    if queued_ids:
+        params["queued_ids"] = queued_ids
+    return jobs.create(_JOB_KIND, _refresh_job, params, job_id=job_id)
+
+
+async def _resume_pending() -> None:
+    """
+    Restart refresh jobs interrupted by a restart, skipping albums already queued.
+    """
+    for job_id, entry in _load_pending().items():
+        if jobs.get(job_id) is not None or not isinstance(entry, dict):
+            continue
+        logger.info("Limbo refresh: resuming job %s", job_id)
+        start_refresh(
+            list(entry.get("lidarr_ids") or []),
+            list(entry.get("mbids") or []),
+            job_id=job_id,
+            queued_ids=list(entry.get("queued_ids") or []),
+        )
+
+
+def register_resume() -> None:
+    background.register(_RESUME_TASK_NAME, _resume_pending, leader_only=True)
@@ -0,0 +1,171 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from lidarrmetadata import background
+from lidarrmetadata.env_utils import env_flag, env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+_TASK_NAME = "loop-monitor"
+_STACK_LIMIT = 40
+
+_LAG: Dict[str, float] = {"last": 0.0, "max": 0.0, "total": 0.0, "samples": 0}
+_HEARTBEAT: Dict[str, float] = {"at": 0.0}
+_OFFENDERS: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+
+def is_enabled() -> bool:
+    return env_flag("LIMBO_LOOP_MONITOR_ENABLED", True)
+
+
+def _interval() -> float:
+    return env_float("LIMBO_LOOP_MONITOR_INTERVAL", 0.1, 0.01)
+
+
+def _threshold() -> float:
+    return env_float("LIMBO_LOOP_BLOCK_THRESHOLD", 0.25, 0.01)
+
+
+def _format_entry(entry: traceback.FrameSummary) -> str:
+    return f"{entry.filename}:{entry.lineno} in {entry.name}"
+
+
+def _format_frame_stack(entries: List[traceback.FrameSummary]) -> List[str]:
+    lines: List[str] = []
+    for entry in entries[-_STACK_LIMIT:]:
+        lines.append(_format_entry(entry))
+        if entry.line:
+            lines.append(f"    {entry.line}")
+    return lines
+
+
+def _watchdog(loop_thread_id: int, stop: threading.Event) -> None:
+    """
+    Runs in its own thread. When the loop's heartbeat falls behind by more than the
+    threshold, snapshot whatever the loop thread is executing at that moment.
+    """
+    interval = _interval()
+    threshold = _threshold()
+    current: Optional[Dict[str, Any]] = None
+    while not stop.wait(min(interval, threshold / 2.0)):
+        behind = time.monotonic() - _HEARTBEAT["at"] - interval
+        if behind < threshold:
+            if current is not None:
+                current["ended_at"] = time.time()
+                current = None
+            continue
+        if current is not None:
+            current["blocked_seconds"] = round(behind, 3)
+            continue
+        frame = sys._current_frames().get(loop_thread_id)
+        entries = traceback.extract_stack(frame) if frame is not None else []
+        current = {
+            "detected_at": time.time(),
+            "ended_at": None,
+            "blocked_seconds": round(behind, 3),
+            "where": _format_entry(entries[-1]) if entries else "",
+            "stack": _format_frame_stack(entries),
+        }
+        _OFFENDERS.append(current)
+        logger.warning("Limbo loop monitor: event loop blocked at %s", current["where"])
+
+
+async def _heartbeat() -> None:
+    lag_histogram = None
+    if env_flag("LIMBO_METRICS_ENABLED", True):
+        from lidarrmetadata import metrics
+
+        lag_histogram = metrics.LOOP_LAG_SECONDS
+    loop = asyncio.get_running_loop()
+    interval = _interval()
+    _HEARTBEAT["at"] = time.monotonic()
+    stop = threading.Event()
+    thread = threading.Thread(
+        target=_watchdog,
+        args=(threading.get_ident(), stop),
+        name="limbo-loop-watchdog",
+        daemon=True,
+    )
+    thread.start()
+    try:
+        while True:
+            expected = loop.time() + interval
+            await asyncio.sleep(interval)
+            lag = max(0.0, loop.time() - expected)
+            _HEARTBEAT["at"] = time.monotonic()
+            _LAG["last"] = lag
+            _LAG["max"] = max(_LAG["max"], lag)
+            _LAG["total"] += lag
+            _LAG["samples"] += 1
+            if lag_histogram is not None:
+                lag_histogram.observe(lag)
+    finally:
+        stop.set()
+
+
+def get_lag() -> Dict[str, float]:
+    samples = _LAG["samples"]
+    return {
+        "last": round(_LAG["last"], 4),
+        "max": round(_LAG["max"], 4),
+        "mean": round(_LAG["total"] / samples, 4) if samples else 0.0,
+        "samples": samples,
+    }
+
+
+def get_offenders() -> List[Dict[str, Any]]:
+    return [dict(entry) for entry in reversed(_OFFENDERS)]
+
+
+def dump_tasks() -> List[Dict[str, Any]]:
+    tasks = []
+    for task in asyncio.all_tasks():
+        coro = task.get_coro()
+        stack = []
+        for frame in task.get_stack(limit=10):
+            stack.append(f"{frame.f_code.co_filename}:{frame.f_lineno} in {frame.f_code.co_name}")
+        tasks.append(
+            {
+                "name": task.get_name(),
+                "coro": getattr(coro, "__qualname__", repr(coro)),
+                "done": task.done(),
+                "stack": stack,
+            }
+        )
+    return sorted(tasks, key=lambda item: item["name"])
+
+
+def register_loop_monitor() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import jsonify, request
+
+    global _OFFENDERS
+    if is_enabled():
+        _OFFENDERS = deque(maxlen=env_int("LIMBO_LOOP_MONITOR_HISTORY", 50, 1))
+        background.register(_TASK_NAME, _heartbeat)
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/admin/loop":
+            return
+
+    @upstream_app.app.route("/admin/loop", methods=["GET"])
+    async def _limbo_admin_loop():
+        if request.headers.get("authorization") != upstream_app.app.config.get(
+            "LIMBO_APIKEY"
+        ):
+            return jsonify("Unauthorized"), 401
+        payload: Dict[str, Any] = {
+            "enabled": is_enabled(),
+            "threshold_seconds": _threshold(),
+            "lag": get_lag(),
+            "offenders": get_offenders(),
+        }
+        if str(request.args.get("tasks") or "").lower() in {"1", "true", "yes"}:
+            payload["tasks"] = dump_tasks()
+        return jsonify(payload)
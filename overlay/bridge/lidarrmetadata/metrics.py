@@ -0,0 +1,407 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+from lidarrmetadata import workers
+from lidarrmetadata.env_utils import env_flag
+
+logger = logging.getLogger(__name__)
+
+_LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+_FAST_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0)
+_LAG_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0)
+
+_INSTALLED = False
+
+
+def is_enabled() -> bool:
+    return env_flag("LIMBO_METRICS_ENABLED", True)
+
+
+def _escape(value: Any) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[Any], extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    worker = workers.worker_id()
+    if worker is not None:
+        # Each worker counts only its own traffic; keep their series apart.
+        parts.insert(0, f'worker="{worker}"')
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class Counter:
+    __slots__ = ("name", "help", "labelnames", "series")
+
+    def __init__(self, name: str, help_text: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.series: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, *labels: Any, amount: float = 1.0) -> None:
+        key = tuple(str(label) for label in labels)
+        self.series[key] = self.series.get(key, 0.0) + amount
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.series.items():
+            yield f"{self.name}{_format_labels(self.labelnames, labels)} {_format_value(value)}"
+
+
+class Histogram:
+    __slots__ = ("name", "help", "labelnames", "buckets", "series")
+
+    def __init__(
+        self,
+        name: str,
+        help_text: str,
+        labelnames: Sequence[str] = (),
+        buckets: Sequence[float] = _LATENCY_BUCKETS,
+    ) -> None:
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # labels -> [per-bucket counts..., +Inf count, sum]
+        self.series: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, *labels: Any) -> None:
+        key = tuple(str(label) for label in labels)
+        data = self.series.get(key)
+        if data is None:
+            data = [0.0] * (len(self.buckets) + 2)
+            self.series[key] = data
+        for index, bound in enumerate(self.buckets):
+            if value <= bound:
+                data[index] += 1
+                break
+        else:
+            data[len(self.buckets)] += 1
+        data[-1] += value
+
+    def render(self) -> Iterator[str]:
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        bounds = self.buckets + (float("inf"),)
+        for labels, data in self.series.items():
+            cumulative = 0.0
+            for bound, count in zip(bounds, data):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                yield (
+                    f"{self.name}_bucket{_format_labels(self.labelnames, labels, le)} "
+                    f"{_format_value(cumulative)}"
+                )
+            label_text = _format_labels(self.labelnames, labels)
+            yield f"{self.name}_sum{label_text} {_format_value(data[-1])}"
+            yield f"{self.name}_count{label_text} {_format_value(cumulative)}"
+
+
+REQUEST_SECONDS = Histogram(
+    "limbo_http_request_duration_seconds",
+    "Time spent handling HTTP requests.",
+    ("method", "route", "status"),
+)
+UPSTREAM_SECONDS = Histogram(
+    "limbo_upstream_request_duration_seconds",
+    "Outbound HTTP request latency by host.",
+    ("host", "status"),
+)
+UPSTREAM_ERRORS = Counter(
+    "limbo_upstream_request_errors_total",
+    "Outbound HTTP requests that failed without a response.",
+    ("host", "error"),
+)
+DB_QUERY_SECONDS = Histogram(
+    "limbo_db_query_duration_seconds",
+    "MusicBrainz query latency by SQL file and pool.",
+    ("sql_file", "pool"),
+)
+HOOK_SECONDS = Histogram(
+    "limbo_hook_duration_seconds",
+    "Time spent in release filters, DB hooks and MITM transforms.",
+    ("stage",),
+    _FAST_BUCKETS,
+)
+LOOP_LAG_SECONDS = Histogram(
+    "limbo_event_loop_lag_seconds",
+    "How late the event loop ran the loop monitor's heartbeat.",
+    (),
+    _LAG_BUCKETS,
+)
+
+_STATIC_METRICS = (
+    REQUEST_SECONDS,
+    UPSTREAM_SECONDS,
+    UPSTREAM_ERRORS,
+    DB_QUERY_SECONDS,
+    HOOK_SECONDS,
+    LOOP_LAG_SECONDS,
+)
+
+
+@contextmanager
+def timed(histogram: Histogram, *labels: Any) -> Iterator[None]:
+    if not _INSTALLED:
+        # Metrics are disabled; hooks that time themselves pay nothing.
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - started, *labels)
+
+
+def _gauge(name: str, help_text: str, labelnames: Sequence[str], rows: Iterable[Tuple[Tuple, float]]):
+    yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} gauge"
+    for labels, value in rows:
+        yield f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}"
+
+
+def _counter_rows(name: str, help_text: str, labelnames: Sequence[str], rows):
+    yield f"# HELP {name} {help_text}"
+    yield f"# TYPE {name} counter"
+    for labels, value in rows:
+        yield f"{name}{_format_labels(labelnames, labels)} {_format_value(value)}"
+
+
+_POOL_WAITING: Dict[int, int] = {}
+
+
+class _CountedAcquire:
+    """
+    Wraps the context ``Pool.acquire`` returns, counting callers until they hold a
+    connection. Supports both ``async with pool.acquire()`` and ``await pool.acquire()``.
+    """
+
+    __slots__ = ("_pool", "_context")
+
+    def __init__(self, pool: Any, context: Any) -> None:
+        self._pool = pool
+        self._context = context
+
+    async def _counted(self, awaitable: Any) -> Any:
+        key = id(self._pool)
+        _POOL_WAITING[key] = _POOL_WAITING.get(key, 0) + 1
+        try:
+            return await awaitable
+        finally:
+            _POOL_WAITING[key] -= 1
+
+    async def _awaited(self) -> Any:
+        return await self._context
+
+    async def __aenter__(self) -> Any:
+        return await self._counted(self._context.__aenter__())
+
+    async def __aexit__(self, *exc_info: Any) -> Any:
+        return await self._context.__aexit__(*exc_info)
+
+    def __await__(self):
+        return self._counted(self._awaited()).__await__()
+
+
+def _instrument_pool_acquire() -> None:
+    try:
+        from asyncpg.pool import Pool
+    except Exception:
+        return
+    original = Pool.acquire
+    if getattr(original, "_limbo_counted", False):
+        return
+
+    def _limbo_pool_acquire(self, *args, **kwargs):
+        return _CountedAcquire(self, original(self, *args, **kwargs))
+
+    _limbo_pool_acquire._limbo_counted = True
+    Pool.acquire = _limbo_pool_acquire
+
+
+def _pool_rows() -> Iterator[str]:
+    from lidarrmetadata import cache_tables
+    from lidarrmetadata import db_hooks
+
+    size_rows, in_use_rows, max_rows, waiting_rows = [], [], [], []
+    for name, pool in db_hooks.known_pools() + cache_tables.known_pools():
+        labels = (name,)
+        try:
+            size = pool.get_size()
+            idle = pool.get_idle_size() if hasattr(pool, "get_idle_size") else 0
+            size_rows.append((labels, size))
+            in_use_rows.append((labels, max(0, size - idle)))
+            max_rows.append((labels, pool.get_max_size()))
+            waiting_rows.append((labels, _POOL_WAITING.get(id(pool), 0)))
+        except Exception:
+            continue
+    names = ("pool",)
+    yield from _gauge("limbo_db_pool_size", "Open connections in the pool.", names, size_rows)
+    yield from _gauge("limbo_db_pool_in_use", "Connections checked out.", names, in_use_rows)
+    yield from _gauge("limbo_db_pool_max", "Configured pool maximum.", names, max_rows)
+    yield from _gauge(
+        "limbo_db_pool_waiting", "Callers waiting to acquire a connection.", names, waiting_rows
+    )
+
+
+def _cache_rows() -> Iterator[str]:
+    from lidarrmetadata import cache_stats
+
+    stats = cache_stats.get_process_stats()
+    reads = []
+    writes = []
+    errors = []
+    for name, entry in stats.items():
+        for key, result in (("hits", "hit"), ("stale", "stale"), ("misses", "miss")):
+            reads.append(((name, result), entry[key]))
+        writes.append(((name,), entry["writes"]))
+        errors.append(((name,), entry["errors"]))
+    yield from _counter_rows(
+        "limbo_cache_reads_total", "Cache reads by result.", ("cache", "result"), reads
+    )
+    yield from _counter_rows("limbo_cache_writes_total", "Cache writes.", ("cache",), writes)
+    yield from _counter_rows("limbo_cache_errors_total", "Cache read/write errors.", ("cache",), errors)
+
+
+def render() -> str:
+    lines: List[str] = []
+    for metric in _STATIC_METRICS:
+        lines.extend(metric.render())
+    if env_flag("LIMBO_LOOP_MONITOR_ENABLED", True):
+        from lidarrmetadata import loop_monitor
+
+        lines.extend(
+            _gauge(
+                "limbo_event_loop_lag_max_seconds",
+                "Largest event loop lag seen since startup.",
+                (),
+                [((), loop_monitor.get_lag()["max"])],
+            )
+        )
+    for collector in (_cache_rows, _pool_rows):
+        try:
+            lines.extend(collector())
+        except Exception:
+            logger.debug("Limbo metrics: collector %s failed", collector.__name__, exc_info=True)
+    return "\n".join(lines) + "\n"
+
+
+def _trace_config():
+    import aiohttp
+
+    async def _on_start(_session, ctx, _params):
+        ctx.limbo_started = time.perf_counter()
+
+    async def _on_end(_session, ctx, params):
+        started = getattr(ctx, "limbo_started", None)
+        if started is not None:
+            UPSTREAM_SECONDS.observe(
+                time.perf_counter() - started, params.url.host or "", params.response.status
+            )
+
+    async def _on_exception(_session, ctx, params):
+        UPSTREAM_ERRORS.inc(params.url.host or "", params.exception.__class__.__name__)
+
+    trace_config = aiohttp.TraceConfig()
+    trace_config.on_request_start.append(_on_start)
+    trace_config.on_request_end.append(_on_end)
+    trace_config.on_request_exception.append(_on_exception)
+    return trace_config
+
+
+def trace_configs() -> List[Any]:
+    """
+    Trace configs for an aiohttp session the overlay creates; empty when metrics are off.
+    """
+    return [_trace_config()] if _INSTALLED else []
+
+
+class _TracedAiohttp:
+    """
+    Stands in for ``aiohttp`` inside the upstream provider module only, so sessions the
+    providers build are traced while third-party sessions are left alone.
+    """
+
+    def __init__(self, module) -> None:
+        self._module = module
+
+    def __getattr__(self, name: str) -> Any:
+        return getattr(self._module, name)
+
+    def ClientSession(self, *args, trace_configs=None, **kwargs):  # noqa: N802
+        return self._module.ClientSession(
+            *args, trace_configs=list(trace_configs or []) + [_trace_config()], **kwargs
+        )
+
+
+def _instrument_providers() -> None:
+    try:
+        import aiohttp
+        from lidarrmetadata import provider
+    except Exception:
+        return
+    if getattr(provider, "aiohttp", None) is aiohttp:
+        provider.aiohttp = _TracedAiohttp(aiohttp)
+    if getattr(provider, "ClientSession", None) is aiohttp.ClientSession:
+        provider.ClientSession = _TracedAiohttp(aiohttp).ClientSession
+
+
+def install() -> None:
+    """
+    Hook request timing and outbound HTTP tracing for the upstream providers (the
+    overlay's own session passes ``trace_configs()`` itself).
+    """
+    global _INSTALLED
+    if _INSTALLED or not is_enabled():
+        return
+    _INSTALLED = True
+
+    from lidarrmetadata import app as upstream_app
+    from quart import g, request
+
+    _instrument_providers()
+    _instrument_pool_acquire()
+
+    @upstream_app.app.before_request
+    async def _limbo_metrics_start():
+        g._limbo_metrics_started = time.perf_counter()
+
+    @upstream_app.app.after_request
+    async def _limbo_metrics_observe(response):
+        started = getattr(g, "_limbo_metrics_started", None)
+        if started is not None:
+            rule = request.url_rule.rule if request.url_rule is not None else "<unmatched>"
+            REQUEST_SECONDS.observe(
+                time.perf_counter() - started, request.method, rule, response.status_code
+            )
+        return response
+
+
+def register_metrics_route() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import Response
+
+    if not is_enabled():
+        return
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/metrics":
+            return
+
+    @upstream_app.app.route("/metrics", methods=["GET"])
+    async def _limbo_metrics():
+        return Response(render(), content_type="text/plain; version=0.0.4; charset=utf-8")
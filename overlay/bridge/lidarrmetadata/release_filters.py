@@ -1,5 +1,4 @@
-import json
-from typing import Any, Dict, Iterable, List, Optional
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Tuple
 
 from lidarrmetadata.media_formats_meta import (
     ALIAS_MAP,
@@ -12,6 +11,21 @@ _RUNTIME_MEDIA_INCLUDE: Optional[List[str]] = None
 _RUNTIME_MEDIA_KEEP_ONLY: Optional[int] = None
 _RUNTIME_MEDIA_PREFER: Optional[str] = None
 _ALIAS_MAP = ALIAS_MAP
+_GENERATION = 0
+_PLAN: Optional["FilterPlan"] = None
+
+
+class FilterPlan(NamedTuple):
+    generation: int
+    include: Tuple[str, ...]
+    exclude: Tuple[str, ...]
+    keep_only: Optional[int]
+    prefer: Optional[str]
+    priority: Tuple[str, ...]
+
+    @property
+    def active(self) -> bool:
+        return bool(self.include or self.exclude or self.keep_only)
 
 
 def _parse_list(value: Optional[str]) -> List[str]:
@@ -116,6 +130,38 @@ def get_runtime_media_prefer() -> Optional[str]:
     return _RUNTIME_MEDIA_PREFER
 
 
+def get_plan() -> FilterPlan:
+    """
+    The current filters, normalised once per config change instead of per release
+    group. ``generation`` increases every time the effective config changes.
+    """
+    global _GENERATION, _PLAN
+    include = tuple(_RUNTIME_MEDIA_INCLUDE or ())
+    exclude = tuple(_RUNTIME_MEDIA_EXCLUDE or ())
+    plan = _PLAN
+    if plan is None or (plan.include, plan.exclude, plan.keep_only, plan.prefer) != (
+        include,
+        exclude,
+        _RUNTIME_MEDIA_KEEP_ONLY,
+        _RUNTIME_MEDIA_PREFER,
+    ):
+        _GENERATION += 1
+        plan = FilterPlan(
+            generation=_GENERATION,
+            include=include,
+            exclude=exclude,
+            keep_only=_RUNTIME_MEDIA_KEEP_ONLY,
+            prefer=_RUNTIME_MEDIA_PREFER,
+            priority=tuple(_priority_tokens()),
+        )
+        _PLAN = plan
+    return plan
+
+
+def get_generation() -> int:
+    return get_plan().generation
+
+
 def _parse_int(value: Optional[object]) -> Optional[int]:
     if value is None:
         return None
@@ -188,6 +234,7 @@ def _apply_release_filters_to_album(
     include_tokens: List[str],
     excluded_tokens: List[str],
     keep_only_count: Optional[int],
+    priority_tokens: Optional[Iterable[str]] = None,
 ) -> None:
     releases = album.get("Releases") if isinstance(album, dict) else None
     if releases is None and isinstance(album, dict):
@@ -220,7 +267,9 @@ def _apply_release_filters_to_album(
         if current is None and isinstance(album, dict):
             current = album.get("releases")
         if isinstance(current, list) and len(current) > keep_only_count:
-            priority_tokens = _priority_tokens()
+            if priority_tokens is None:
+                priority_tokens = _priority_tokens()
+            priority_tokens = list(priority_tokens)
             trimmed = sorted(
                 current,
                 key=lambda release: (
@@ -235,61 +284,30 @@ def _apply_release_filters_to_album(
 
 
 def apply_release_group_filters(release_group: Dict[str, Any]) -> Dict[str, Any]:
-    include_tokens = get_runtime_media_include() or []
-    excluded_tokens = get_runtime_media_exclude() or []
-    keep_only_count = get_runtime_media_keep_only()
-
-    if not include_tokens and not excluded_tokens and not keep_only_count:
+    """
+    Filter a release group for the response. Cached release groups are stored
+    unfiltered, so this runs on every read and works on a shallow copy; the caller's
+    object (possibly shared with a cache) is never modified.
+    """
+    plan = get_plan()
+    if not plan.active or not isinstance(release_group, dict):
         return release_group
 
-    if isinstance(release_group, dict):
-        _apply_release_filters_to_album(
-            release_group,
-            include_tokens,
-            excluded_tokens,
-            keep_only_count,
-        )
-    return release_group
+    filtered = dict(release_group)
+    _apply_release_filters_to_album(
+        filtered,
+        list(plan.include),
+        list(plan.exclude),
+        plan.keep_only,
+        plan.priority,
+    )
+    return filtered
 
 
 def after_query(results: Any, context: Dict[str, Any]) -> Any:
-    if context.get("sql_file") != "release_group_by_id.sql":
-        return None
-
-    include_tokens = get_runtime_media_include() or []
-    excluded_tokens = get_runtime_media_exclude() or []
-    keep_only_count = get_runtime_media_keep_only()
-
-    if not include_tokens and not excluded_tokens and not keep_only_count:
-        return None
-
-    updated = []
-    for row in results or []:
-        album_json = row.get("album") if isinstance(row, dict) else None
-        if not album_json:
-            updated.append(row)
-            continue
-
-        try:
-            album = json.loads(album_json) if isinstance(album_json, str) else album_json
-        except Exception:
-            updated.append(row)
-            continue
-
-        if isinstance(album, dict):
-            _apply_release_filters_to_album(
-                album,
-                include_tokens,
-                excluded_tokens,
-                keep_only_count,
-            )
-
-        try:
-            row["album"] = json.dumps(album, separators=(",", ":"))
-        except Exception:
-            updated.append(row)
-            continue
-
-        updated.append(row)
-
-    return updated
+    """
+    Leave query results untouched so ALBUM_CACHE keeps unfiltered release groups;
+    filters are applied on read by apply_release_group_filters, so a config change
+    takes effect immediately without clearing the cache.
+    """
+    return None
@@ -0,0 +1,171 @@
+import logging
+import os
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from lidarrmetadata import cache_invalidation
+from lidarrmetadata import jobs
+from lidarrmetadata import state_store
+from lidarrmetadata.env_utils import env_flag, env_float, env_int
+
+logger = logging.getLogger(__name__)
+
+_STATE_DIR = Path(os.environ.get("LIMBO_INIT_STATE_DIR", "/metadata/init-state"))
+_STATE_FILE = Path(
+    os.environ.get(
+        "LIMBO_REPLICATION_INVALIDATE_STATE_FILE",
+        str(_STATE_DIR / "replication_invalidate_state.json"),
+    )
+)
+state_store.register("replication_invalidate", _STATE_FILE)
+_JOB_KIND = "replication-invalidate"
+
+# last_updated on these rows is carried over from the master by replication, so a row
+# touched by the packet just applied has last_updated at or after the previous run.
+_ARTIST_SQL = """
+SELECT gid::text FROM artist WHERE last_updated >= $1
+UNION
+SELECT a.gid::text FROM l_artist_url l JOIN artist a ON a.id = l.entity0
+WHERE l.last_updated >= $1
+UNION
+SELECT a.gid::text FROM release_group rg
+JOIN artist_credit_name acn ON acn.artist_credit = rg.artist_credit
+JOIN artist a ON a.id = acn.artist
+WHERE rg.last_updated >= $1
+"""
+
+_RELEASE_GROUP_SQL = """
+SELECT gid::text FROM release_group WHERE last_updated >= $1
+UNION
+SELECT rg.gid::text FROM release r JOIN release_group rg ON rg.id = r.release_group
+WHERE r.last_updated >= $1
+UNION
+SELECT rg.gid::text FROM medium m
+JOIN release r ON r.id = m.release
+JOIN release_group rg ON rg.id = r.release_group
+WHERE m.last_updated >= $1
+"""
+
+# Track-level changes touch the largest tables in the schema; opt-in only.
+_TRACK_RELEASE_GROUP_SQL = """
+SELECT DISTINCT rg.gid::text FROM track t
+JOIN medium m ON m.id = t.medium
+JOIN release r ON r.id = m.release
+JOIN release_group rg ON rg.id = r.release_group
+WHERE t.last_updated >= $1
+"""
+
+
+def is_enabled() -> bool:
+    return env_flag("LIMBO_REPLICATION_INVALIDATE", True)
+
+
+def _load_state() -> Dict[str, Any]:
+    data = state_store.get("replication_invalidate")
+    return data if isinstance(data, dict) else {}
+
+
+def _save_state(state: Dict[str, Any]) -> None:
+    state_store.put("replication_invalidate", state)
+
+
+def _since(state: Dict[str, Any], now: datetime) -> datetime:
+    overlap = timedelta(minutes=env_float("LIMBO_REPLICATION_INVALIDATE_OVERLAP_MINUTES", 60.0, 0.0))
+    previous = state.get("until")
+    if previous:
+        try:
+            return datetime.fromisoformat(previous) - overlap
+        except ValueError:
+            pass
+    lookback = env_float("LIMBO_REPLICATION_INVALIDATE_LOOKBACK_HOURS", 24.0, 0.0)
+    return now - timedelta(hours=lookback) - overlap
+
+
+async def _get_mb_pool():
+    from lidarrmetadata import provider
+
+    providers = provider.get_providers_implementing(provider.DataVintageMixin)
+    if not providers or not hasattr(providers[0], "_get_pool"):
+        raise RuntimeError("MusicBrainz database provider not available")
+    return await providers[0]._get_pool()
+
+
+async def find_changed(since: datetime) -> Dict[str, List[str]]:
+    """
+    Return the artist and release-group MBIDs whose MusicBrainz rows changed since ``since``.
+    """
+    timeout = env_float("LIMBO_REPLICATION_INVALIDATE_TIMEOUT", 300.0, 1.0)
+    pool = await _get_mb_pool()
+    async with pool.acquire() as conn:
+        artists = await conn.fetch(_ARTIST_SQL, since, timeout=timeout)
+        release_groups = await conn.fetch(_RELEASE_GROUP_SQL, since, timeout=timeout)
+        if env_flag("LIMBO_REPLICATION_INVALIDATE_TRACKS", False):
+            release_groups += await conn.fetch(_TRACK_RELEASE_GROUP_SQL, since, timeout=timeout)
+    return {
+        "artists": sorted({row[0] for row in artists}),
+        "release_groups": sorted({row[0] for row in release_groups}),
+    }
+
+
+async def _invalidate_job(job: Dict[str, Any]) -> Dict[str, Any]:
+    state = _load_state()
+    until = datetime.now(timezone.utc)
+    since = _since(state, until)
+    jobs.update(job, phase="querying", since=since.isoformat())
+    changed = await find_changed(since)
+    jobs.update(
+        job,
+        phase="expiring",
+        artists=len(changed["artists"]),
+        release_groups=len(changed["release_groups"]),
+        done=0,
+    )
+
+    chunk = env_int("LIMBO_REPLICATION_INVALIDATE_CHUNK", 5000, 1)
+    expired: Dict[str, int] = {}
+    errors: Dict[str, str] = {}
+    pending = [("artists", mbid) for mbid in changed["artists"]] + [
+        ("release_groups", mbid) for mbid in changed["release_groups"]
+    ]
+    for offset in range(0, len(pending), chunk):
+        batch = pending[offset : offset + chunk]
+        result = await cache_invalidation.invalidate(
+            artists=[mbid for kind, mbid in batch if kind == "artists"],
+            release_groups=[mbid for kind, mbid in batch if kind == "release_groups"],
+        )
+        for name, count in result["expired"].items():
+            expired[name] = expired.get(name, 0) + count
+        errors.update(result["errors"])
+        jobs.update(job, done=offset + len(batch))
+
+    result = {
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "artists": len(changed["artists"]),
+        "release_groups": len(changed["release_groups"]),
+        "expired": expired,
+        "errors": errors,
+    }
+    if not errors:
+        _save_state({"until": until.isoformat(), "result": result})
+    logger.info(
+        "Limbo replication invalidation: %s artists, %s release groups changed; expired %s",
+        result["artists"],
+        result["release_groups"],
+        expired,
+    )
+    return result
+
+
+def start_invalidation(payload: Optional[Dict[str, Any]] = None) -> Optional[Dict[str, Any]]:
+    """
+    Start (or join) the post-replication invalidation job. Returns None when disabled.
+    """
+    if not is_enabled():
+        return None
+    active = jobs.find_active(_JOB_KIND)
+    if active is not None:
+        return active
+    params = {"finished_at": (payload or {}).get("finished_at")}
+    return jobs.create(_JOB_KIND, _invalidate_job, params)
@@ -1,21 +1,21 @@
 import html
-import json
 import os
 from pathlib import Path
 import re
 import time
-import asyncio
-import inspect
 from datetime import datetime, timezone
-from typing import Optional, Tuple, Iterable, Dict
+from typing import Optional, Tuple, Dict
 
-try:
-    import aiohttp
-except Exception:  # pragma: no cover - runtime dependency may be missing
-    aiohttp = None
-import subprocess
 import lidarrmetadata
-from lidarrmetadata import provider
+from lidarrmetadata import cache_jobs
+from lidarrmetadata import cache_stats
+from lidarrmetadata import http_client
+from lidarrmetadata import jobs
+from lidarrmetadata import replication_invalidation
+from lidarrmetadata import state_store
+from lidarrmetadata import root_template
+from lidarrmetadata import static_assets
+from lidarrmetadata import status_poller
 from lidarrmetadata.app import no_cache
 from lidarrmetadata.version_patch import _read_version
 
@@ -27,14 +27,12 @@ _LIDARR_VERSION_FILE = Path(
         str(_STATE_DIR / "lidarr_version.txt"),
     )
 )
-_LAST_LIDARR_VERSION: Optional[str] = None
 _PLUGIN_VERSION_FILE = Path(
     os.environ.get(
         "LIMBO_PLUGIN_VERSION_FILE",
         str(_STATE_DIR / "limbo_plugin_version.txt"),
     )
 )
-_LAST_PLUGIN_VERSION: Optional[str] = None
 _MBMS_VERSION_FILE = Path("/mbms/VERSION")
 _LIDARR_BASE_URL: Optional[str] = None
 _LIDARR_API_KEY: Optional[str] = None
@@ -47,9 +45,13 @@ _REPLICATION_NOTIFY_FILE = Path(
         str(_STATE_DIR / "replication_status.json"),
     )
 )
-_LAST_REPLICATION_NOTIFY: Optional[dict] = None
 _THEME_FILE = Path(os.getenv("LIMBO_THEME_FILE", str(_STATE_DIR / "theme.txt")))
 
+state_store.register("lidarr_version", _LIDARR_VERSION_FILE, "text", newline=True)
+state_store.register("plugin_version", _PLUGIN_VERSION_FILE, "text", newline=True)
+state_store.register("replication_notify", _REPLICATION_NOTIFY_FILE, "json")
+state_store.register("theme", _THEME_FILE, "text")
+
 
 def _normalize_version_string(value: Optional[str]) -> str:
     if not value:
@@ -61,15 +63,17 @@ def _normalize_version_string(value: Optional[str]) -> str:
     return match.group(1)
 
 
+_INLINE_SVGS = (
+    "limbo-arrows-updn.svg",
+    "limbo-settings.svg",
+    "limbo-dark.svg",
+    "limbo-light.svg",
+    "limbo-tall-arrow.svg",
+)
+
+
 def _read_inline_svg(name: str) -> str:
-    assets_dir = Path(__file__).resolve().parent / "assets"
-    svg_path = assets_dir / name
-    try:
-        content = svg_path.read_text(encoding="utf-8")
-    except Exception:
-        return ""
-    content = re.sub(r"<\\?xml[^>]*\\?>", "", content, flags=re.IGNORECASE).strip()
-    return content
+    return root_template.inline_svg(name)
 
 
 def _parse_version(value: str) -> Optional[Tuple[int, ...]]:
@@ -94,7 +98,7 @@ def _is_newer_version(current: str, latest: str) -> bool:
 
 
 async def _fetch_latest_release_version(owner: str, repo: str) -> Optional[str]:
-    if aiohttp is None:
+    if not http_client.is_available():
         return None
     key = f"{owner}/{repo}"
     now = time.time()
@@ -107,32 +111,25 @@ async def _fetch_latest_release_version(owner: str, repo: str) -> Optional[str]:
         "Accept": "application/vnd.github+json",
         "User-Agent": "limbo",
     }
-    timeout = aiohttp.ClientTimeout(total=3)
     try:
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            url = f"https://api.github.com/repos/{owner}/{repo}/releases/latest"
+        url = f"https://api.github.com/repos/{owner}/{repo}/releases/latest"
+        try:
+            result = await http_client.request("GET", url, headers=headers, timeout=3)
+            if result.status == 200 and isinstance(result.data, dict):
+                tag = result.data.get("tag_name") or result.data.get("name")
+                version = _normalize_version_string(tag) or None
+        except Exception:
+            version = None
+
+        if not version:
+            url = f"https://api.github.com/repos/{owner}/{repo}/tags?per_page=1"
             try:
-                async with session.get(url, headers=headers) as resp:
-                    if resp.status == 200:
-                        data = await resp.json()
-                        tag = data.get("tag_name") or data.get("name")
-                        version = _normalize_version_string(tag) or None
-                    elif resp.status not in (404, 422):
-                        version = None
+                result = await http_client.request("GET", url, headers=headers, timeout=3)
+                if result.status == 200 and result.data:
+                    tag = result.data[0].get("name")
+                    version = _normalize_version_string(tag) or None
             except Exception:
                 version = None
-
-            if not version:
-                url = f"https://api.github.com/repos/{owner}/{repo}/tags?per_page=1"
-                try:
-                    async with session.get(url, headers=headers) as resp:
-                        if resp.status == 200:
-                            data = await resp.json()
-                            if data:
-                                tag = data[0].get("name")
-                                version = _normalize_version_string(tag) or None
-                except Exception:
-                    version = None
     finally:
         _GITHUB_RELEASE_CACHE[key] = (now, version)
 
@@ -174,60 +171,8 @@ def get_lidarr_client_ip() -> str:
     return _LIDARR_CLIENT_IP or ""
 
 
-def _cache_targets() -> Iterable[Tuple[str, object]]:
-    from lidarrmetadata import util
-
-    return (
-        ("artist", util.ARTIST_CACHE),
-        ("album", util.ALBUM_CACHE),
-        ("spotify", util.SPOTIFY_CACHE),
-        ("fanart", util.FANART_CACHE),
-        ("tadb", util.TADB_CACHE),
-        ("wikipedia", util.WIKI_CACHE),
-    )
-
-
-def _postgres_cache_targets() -> Iterable[Tuple[str, object]]:
-    for name, cache in _cache_targets():
-        if hasattr(cache, "_get_pool") and hasattr(cache, "_db_table"):
-            yield name, cache
-
-
-async def _maybe_await(value: object) -> object:
-    if inspect.isawaitable(value):
-        return await value
-    return value
-
-
-async def _clear_all_cache_tables() -> dict:
-    cleared = []
-    skipped = []
-    tasks = []
-    for name, cache in _postgres_cache_targets():
-        if hasattr(cache, "clear"):
-            tasks.append(_maybe_await(cache.clear()))
-            cleared.append(name)
-        else:
-            skipped.append(name)
-    if tasks:
-        await asyncio.gather(*tasks)
-    return {"cleared": cleared, "skipped": skipped}
-
-
-async def _expire_all_cache_tables() -> dict:
-    expired = []
-    skipped = []
-    for name, cache in _postgres_cache_targets():
-        try:
-            pool = await _maybe_await(cache._get_pool())
-            async with pool.acquire() as conn:
-                await conn.execute(
-                    f"UPDATE {cache._db_table} SET expires = current_timestamp;"
-                )
-            expired.append(name)
-        except Exception:
-            skipped.append(name)
-    return {"expired": expired, "skipped": skipped}
+def _wants_wait(req) -> bool:
+    return str(req.args.get("wait") or "").strip().lower() in {"1", "true", "yes"}
 
 
 def _format_uptime(seconds: float) -> str:
@@ -321,45 +266,23 @@ def _read_replication_status() -> Tuple[bool, str]:
 
 
 def _read_replication_notify_state() -> Optional[dict]:
-    global _LAST_REPLICATION_NOTIFY
-    if _LAST_REPLICATION_NOTIFY is not None:
-        return _LAST_REPLICATION_NOTIFY
-    try:
-        data = json.loads(_REPLICATION_NOTIFY_FILE.read_text())
-        if isinstance(data, dict):
-            _LAST_REPLICATION_NOTIFY = data
-            return data
-    except Exception:
-        return None
-    return None
+    data = state_store.get("replication_notify")
+    return data if isinstance(data, dict) else None
 
 
 def _write_replication_notify_state(payload: dict) -> None:
-    global _LAST_REPLICATION_NOTIFY
-    try:
-        _REPLICATION_NOTIFY_FILE.parent.mkdir(parents=True, exist_ok=True)
-        _REPLICATION_NOTIFY_FILE.write_text(json.dumps(payload))
-        _LAST_REPLICATION_NOTIFY = payload
-    except Exception:
-        return
+    state_store.put("replication_notify", payload)
 
 
 def _read_theme() -> str:
-    try:
-        theme = _THEME_FILE.read_text().strip().lower()
-    except Exception:
-        return ""
+    theme = str(state_store.get("theme", "")).lower()
     return theme if theme in {"dark", "light"} else ""
 
 
 def _write_theme(theme: str) -> None:
     if theme not in {"dark", "light"}:
         return
-    try:
-        _THEME_FILE.parent.mkdir(parents=True, exist_ok=True)
-        _THEME_FILE.write_text(theme)
-    except Exception:
-        return
+    state_store.put("theme", theme)
 
 
 def _replication_remote_config() -> Tuple[bool, str, str, str]:
@@ -403,42 +326,63 @@ def _replication_auth_config(app_config: dict) -> Tuple[str, str]:
     return header, key
 
 
+def replication_payload(state: dict) -> dict:
+    """
+    Build the /replication/status body from a status_poller replication snapshot.
+    """
+    raw = state.get("raw")
+    if state.get("remote") and isinstance(raw, dict):
+        payload = dict(raw)
+    else:
+        if state.get("remote"):
+            running, started = _read_replication_status()
+        else:
+            running, started = bool(state.get("running")), state.get("started") or ""
+        payload = {"running": running}
+        if started:
+            payload["started"] = started
+    notify = _read_replication_notify_state()
+    if notify:
+        payload["last"] = notify
+    return payload
+
+
 async def _fetch_replication_status_remote(
     status_url: str, header_pair: str
 ) -> Optional[dict]:
-    if aiohttp is None:
+    if not http_client.is_available():
         return None
     headers = {}
     if header_pair and ":" in header_pair:
         name, value = header_pair.split(":", 1)
         headers[name] = value
     try:
-        timeout = aiohttp.ClientTimeout(total=2)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(status_url, headers=headers) as resp:
-                if resp.status != 200:
-                    return None
-                return await resp.json()
+        result = await http_client.request(
+            "GET", status_url, headers=headers, timeout=2, retries=0
+        )
     except Exception:
         return None
+    if result.status != 200:
+        return None
+    return result.data
 
 
 async def _fetch_lidarr_version(base_url: str, api_key: str) -> Optional[str]:
     if not base_url or not api_key:
         return None
-    if aiohttp is None:
+    if not http_client.is_available():
         return None
     url = base_url.rstrip("/") + "/api/v1/system/status"
     headers = {"X-Api-Key": api_key}
     try:
-        timeout = aiohttp.ClientTimeout(total=2)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url, headers=headers) as resp:
-                if resp.status != 200:
-                    return None
-                data = await resp.json()
+        result = await http_client.request(
+            "GET", url, headers=headers, timeout=2, retries=0
+        )
     except Exception:
         return None
+    if result.status != 200 or not isinstance(result.data, dict):
+        return None
+    data = result.data
     for key in ("version", "appVersion", "packageVersion", "buildVersion"):
         value = data.get(key)
         if value:
@@ -519,55 +463,23 @@ def _format_index_schedule() -> Optional[str]:
 
 
 def _read_last_lidarr_version() -> Optional[str]:
-    global _LAST_LIDARR_VERSION
-    if _LAST_LIDARR_VERSION is not None:
-        return _LAST_LIDARR_VERSION
-    try:
-        value = _LIDARR_VERSION_FILE.read_text().strip()
-    except OSError:
-        value = ""
-    _LAST_LIDARR_VERSION = value or None
-    return _LAST_LIDARR_VERSION
+    return state_store.get("lidarr_version")
 
 
 def set_lidarr_version(value: Optional[str]) -> None:
-    value = (value or "").strip()
-    version = value or None
-    global _LAST_LIDARR_VERSION
-    _LAST_LIDARR_VERSION = version
-    if not version:
-        return
-    try:
-        _LIDARR_VERSION_FILE.parent.mkdir(parents=True, exist_ok=True)
-        _LIDARR_VERSION_FILE.write_text(version + "\n")
-    except OSError:
-        return
+    version = (value or "").strip()
+    if version and version != state_store.get("lidarr_version"):
+        state_store.put("lidarr_version", version)
 
 
 def _read_last_plugin_version() -> Optional[str]:
-    global _LAST_PLUGIN_VERSION
-    if _LAST_PLUGIN_VERSION is not None:
-        return _LAST_PLUGIN_VERSION
-    try:
-        value = _PLUGIN_VERSION_FILE.read_text().strip()
-    except OSError:
-        value = ""
-    _LAST_PLUGIN_VERSION = value or None
-    return _LAST_PLUGIN_VERSION
+    return state_store.get("plugin_version")
 
 
 def set_plugin_version(value: Optional[str]) -> None:
-    value = (value or "").strip()
-    version = value or None
-    global _LAST_PLUGIN_VERSION
-    _LAST_PLUGIN_VERSION = version
-    if not version:
-        return
-    try:
-        _PLUGIN_VERSION_FILE.parent.mkdir(parents=True, exist_ok=True)
-        _PLUGIN_VERSION_FILE.write_text(version + "\n")
-    except OSError:
-        return
+    version = (value or "").strip()
+    if version and version != state_store.get("plugin_version"):
+        state_store.put("plugin_version", version)
 
 
 def _capture_lidarr_version(user_agent: Optional[str]) -> None:
@@ -576,18 +488,13 @@ def _capture_lidarr_version(user_agent: Optional[str]) -> None:
     match = re.search(r"\bLidarr/([0-9A-Za-z.\-]+)", user_agent)
     if not match:
         return
-    version = match.group(1)
-    global _LAST_LIDARR_VERSION
-    if _LAST_LIDARR_VERSION == version:
-        return
-    set_lidarr_version(version)
+    set_lidarr_version(match.group(1))
 
 
 def register_root_route() -> None:
     from lidarrmetadata import app as upstream_app
-    from quart import Response, request, send_file, jsonify
+    from quart import Response, request, jsonify
 
-    assets_dir = Path(__file__).resolve().parent / "assets"
     limbo_api_key = (
         os.getenv("LIMBO_APIKEY")
         or upstream_app.app.config.get("LIMBO_APIKEY")
@@ -596,70 +503,10 @@ def register_root_route() -> None:
     if limbo_api_key:
         upstream_app.app.config["LIMBO_APIKEY"] = limbo_api_key
         upstream_app.app.config["INVALIDATE_APIKEY"] = limbo_api_key
+    root_template.preload(("root.html",), _INLINE_SVGS)
 
-    for rule in upstream_app.app.url_map.iter_rules():
-        if rule.rule == "/assets/limbo-icon.png":
-            break
-    else:
-
-        @upstream_app.app.route("/assets/limbo-icon.png", methods=["GET"])
-        async def _limbo_icon():
-            return await send_file(
-                assets_dir / "limbo-icon.png", mimetype="image/png"
-            )
-
-    for rule in upstream_app.app.url_map.iter_rules():
-        if rule.rule == "/assets/limbo-settings.svg":
-            break
-    else:
-
-        @upstream_app.app.route("/assets/limbo-settings.svg", methods=["GET"])
-        async def _limbo_settings_icon():
-            return await send_file(
-                assets_dir / "limbo-settings.svg", mimetype="image/svg+xml"
-            )
-
-    for rule in upstream_app.app.url_map.iter_rules():
-        if rule.rule == "/assets/limbo-dark.svg":
-            break
-    else:
-
-        @upstream_app.app.route("/assets/limbo-dark.svg", methods=["GET"])
-        async def _limbo_dark_icon():
-            return await send_file(
-                assets_dir / "limbo-dark.svg", mimetype="image/svg+xml"
-            )
-
-    for rule in upstream_app.app.url_map.iter_rules():
-        if rule.rule == "/assets/limbo-light.svg":
-            break
-    else:
-
-        @upstream_app.app.route("/assets/limbo-light.svg", methods=["GET"])
-        async def _limbo_light_icon():
-            return await send_file(
-                assets_dir / "limbo-light.svg", mimetype="image/svg+xml"
-            )
-
-    for rule in upstream_app.app.url_map.iter_rules():
-        if rule.rule == "/assets/limbo-tall-arrow.svg":
-            break
-    else:
-
-        @upstream_app.app.route("/assets/limbo-tall-arrow.svg", methods=["GET"])
-        async def _limbo_tall_arrow():
-            return await send_file(
-                assets_dir / "limbo-tall-arrow.svg", mimetype="image/svg+xml"
-            )
-
-    for rule in upstream_app.app.url_map.iter_rules():
-        if rule.rule == "/assets/root.css":
-            break
-    else:
-
-        @upstream_app.app.route("/assets/root.css", methods=["GET"])
-        async def _limbo_root_css():
-            return await send_file(assets_dir / "root.css", mimetype="text/css")
+    static_assets.register_asset_routes()
+    status_poller.register_status_poller()
 
     if not upstream_app.app.config.get("LIMBO_CAPTURE_LIDARR_VERSION"):
         upstream_app.app.config["LIMBO_CAPTURE_LIDARR_VERSION"] = True
@@ -679,8 +526,11 @@ def register_root_route() -> None:
                 "LIMBO_APIKEY"
             ):
                 return jsonify("Unauthorized"), 401
-            result = await _clear_all_cache_tables()
-            return jsonify(result)
+            job = cache_jobs.start_clear()
+            if _wants_wait(request):
+                await jobs.wait(job)
+                return jsonify(job["result"] or {"error": job["error"]})
+            return jsonify({"ok": True, "job": jobs.describe(job)}), 202
 
     for rule in upstream_app.app.url_map.iter_rules():
         if rule.rule == "/cache/expire":
@@ -693,8 +543,11 @@ def register_root_route() -> None:
                 "LIMBO_APIKEY"
             ):
                 return jsonify("Unauthorized"), 401
-            result = await _expire_all_cache_tables()
-            return jsonify(result)
+            job = cache_jobs.start_expire()
+            if _wants_wait(request):
+                await jobs.wait(job)
+                return jsonify(job["result"] or {"error": job["error"]})
+            return jsonify({"ok": True, "job": jobs.describe(job)}), 202
 
     for rule in upstream_app.app.url_map.iter_rules():
         if rule.rule == "/replication/start":
@@ -718,25 +571,25 @@ def register_root_route() -> None:
                 start_url,
             )
             if use_remote:
-                if aiohttp is None:
+                if not http_client.is_available():
                     return jsonify({"ok": False, "error": "aiohttp not installed"}), 500
                 headers = {}
                 if header_pair and ":" in header_pair:
                     name, value = header_pair.split(":", 1)
                     headers[name] = value
                 try:
-                    timeout = aiohttp.ClientTimeout(total=4)
-                    async with aiohttp.ClientSession(timeout=timeout) as session:
-                        async with session.post(start_url, headers=headers) as resp:
-                            data = await resp.text()
-                            if resp.status >= 400:
-                                return (
-                                    jsonify({"ok": False, "error": data}),
-                                    resp.status,
-                                )
-                            return jsonify({"ok": True, "remote": True})
+                    result = await http_client.request(
+                        "POST", start_url, headers=headers, timeout=4, read="text"
+                    )
                 except Exception as exc:
                     return jsonify({"ok": False, "error": str(exc)}), 500
+                if result.status >= 400:
+                    return (
+                        jsonify({"ok": False, "error": result.data}),
+                        result.status,
+                    )
+                status_poller.request_refresh("replication")
+                return jsonify({"ok": True, "remote": True})
 
             script_path = os.getenv(
                 "LIMBO_REPLICATION_SCRIPT", "/admin/replicate-now"
@@ -760,10 +613,13 @@ def register_root_route() -> None:
                 )
 
             try:
+                import subprocess
+
                 subprocess.Popen(["/bin/bash", str(script)], cwd=str(script.parent))
             except Exception as exc:
                 return jsonify({"ok": False, "error": str(exc)}), 500
 
+            status_poller.request_refresh("replication")
             return jsonify({"ok": True, "script": str(script)})
 
     for rule in upstream_app.app.url_map.iter_rules():
@@ -773,6 +629,9 @@ def register_root_route() -> None:
 
         @upstream_app.app.route("/replication/status", methods=["GET"])
         async def _limbo_replication_status():
+            state = status_poller.get_value("replication")
+            if state is not None:
+                return jsonify(replication_payload(state))
             use_remote, _start_url, status_url, header_pair = (
                 _replication_remote_config()
             )
@@ -814,8 +673,13 @@ def register_root_route() -> None:
                 payload["finished_at"] = datetime.now(timezone.utc).isoformat()
             payload["finished_label"] = _format_replication_date(payload["finished_at"])
             _write_replication_notify_state(payload)
+            status_poller.request_refresh("replication")
+            status_poller.request_refresh("vintage")
             upstream_app.app.logger.info("Replication notify received: %s", payload)
-            return jsonify({"ok": True})
+            job = replication_invalidation.start_invalidation(payload)
+            if job is None:
+                return jsonify({"ok": True})
+            return jsonify({"ok": True, "job": jobs.describe(job)})
 
     for rule in upstream_app.app.url_map.iter_rules():
         if rule.rule == "/theme":
@@ -839,30 +703,15 @@ def register_root_route() -> None:
             return jsonify({"ok": True, "theme": theme})
 
     async def _limbo_root_route():
-        replication_date = None
-        try:
-            vintage_providers = provider.get_providers_implementing(
-                provider.DataVintageMixin
-            )
-            if vintage_providers:
-                replication_date = await _maybe_await(
-                    vintage_providers[0].data_vintage()
-                )
-        except Exception:
-            replication_date = None
+        # Remote lookups are refreshed by status_poller; rendering only reads its snapshot.
+        replication_date = status_poller.get_value("vintage")
 
         lidarr_version_label = "Lidarr Version (Last Seen)"
         lidarr_version = _read_last_lidarr_version()
-        lidarr_base_url = get_lidarr_base_url()
-        lidarr_api_key = get_lidarr_api_key()
-        if lidarr_base_url and lidarr_api_key:
-            fetched_version = await _fetch_lidarr_version(
-                lidarr_base_url, lidarr_api_key
-            )
-            if fetched_version:
-                lidarr_version_label = "Lidarr Version"
-                lidarr_version = fetched_version
-                set_lidarr_version(fetched_version)
+        fetched_version = status_poller.get_value("lidarr")
+        if fetched_version and get_lidarr_base_url() and get_lidarr_api_key():
+            lidarr_version_label = "Lidarr Version"
+            lidarr_version = fetched_version
 
         def fmt(value: object) -> str:
             if value is None:
@@ -916,17 +765,19 @@ def register_root_route() -> None:
         version_url = f"{base_path}/version" if base_path else "/version"
         cache_clear_url = f"{base_path}/cache/clear" if base_path else "/cache/clear"
         cache_expire_url = f"{base_path}/cache/expire" if base_path else "/cache/expire"
+        jobs_url = f"{base_path}/jobs" if base_path else "/jobs"
+        events_url = f"{base_path}/events" if base_path else "/events"
+        if not any(rule.rule == "/events" for rule in upstream_app.app.url_map.iter_rules()):
+            # Live events are disabled; the page polls instead.
+            events_url = ""
         replication_start_url = (
             f"{base_path}/replication/start" if base_path else "/replication/start"
         )
         replication_status_url = (
             f"{base_path}/replication/status" if base_path else "/replication/status"
         )
-        icon_url = (
-            f"{base_path}/assets/limbo-icon.png"
-            if base_path
-            else "/assets/limbo-icon.png"
-        )
+        icon_url = static_assets.asset_url("limbo-icon.png", base_path)
+        root_css_url = static_assets.asset_url("root.css", base_path)
         lm_repo_url = "https://github.com/HVR88/Limbo"
         mbms_url = "https://github.com/HVR88/MBMS_PLUS"
 
@@ -993,19 +844,25 @@ def register_root_route() -> None:
             ]
         )
 
-        template_path = assets_dir / "root.html"
-        template = template_path.read_text(encoding="utf-8")
-        use_remote, _start_url, status_url, header_pair = _replication_remote_config()
+        cache_stats_html = "\n".join(
+            [
+                '          <div class="config-row">'
+                f'<div class="config-label">{html.escape(label)} cache</div>'
+                '<div class="config-value">'
+                f'<span class="config-value-text">{html.escape(value)}</span>'
+                "</div>"
+                "</div>"
+                for label, value in cache_stats.summary_rows()
+            ]
+        )
+
+        replication_state = status_poller.get_value("replication")
         replication_running = False
         replication_started = ""
-        if use_remote:
-            status_data = await _fetch_replication_status_remote(
-                status_url, header_pair
-            )
-            if status_data and isinstance(status_data, dict):
-                replication_running = bool(status_data.get("running"))
-                replication_started = str(status_data.get("started") or "")
-        if not use_remote:
+        if replication_state:
+            replication_running = bool(replication_state.get("running"))
+            replication_started = str(replication_state.get("started") or "")
+        elif not _replication_remote_config()[0]:
             replication_running, replication_started = _read_replication_status()
         replication_button_label = "Running" if replication_running else "Start"
         replication_button_class = (
@@ -1037,6 +894,7 @@ def register_root_route() -> None:
 
         replacements = {
             "__ICON_URL__": html.escape(icon_url),
+            "__ROOT_CSS_URL__": html.escape(root_css_url),
             "__LM_VERSION__": safe["version"],
             "__LM_PLUGIN_VERSION__": safe["plugin_version"],
             "__MBMS_PLUS_VERSION__": safe["mbms_plus_version"],
@@ -1052,6 +910,8 @@ def register_root_route() -> None:
             "__VERSION_URL__": html.escape(version_url),
             "__CACHE_CLEAR_URL__": html.escape(cache_clear_url),
             "__CACHE_EXPIRE_URL__": html.escape(cache_expire_url),
+            "__JOBS_URL__": html.escape(jobs_url),
+            "__EVENTS_URL__": html.escape(events_url),
             "__REPLICATION_START_URL__": html.escape(replication_start_url),
             "__REPLICATION_STATUS_URL__": html.escape(replication_status_url),
             "__REPLICATION_BUTTON__": replication_button_html,
@@ -1065,6 +925,7 @@ def register_root_route() -> None:
             "__THEME_ICON_LIGHT__": theme_light_svg,
             "__TALL_ARROW_ICON__": tall_arrow_svg,
             "__CONFIG_HTML__": config_html,
+            "__CACHE_STATS_HTML__": cache_stats_html,
         }
         lidarr_ui_url = get_lidarr_base_url()
         if "last seen" in lidarr_version_label.lower():
@@ -1086,10 +947,9 @@ def register_root_route() -> None:
             f"{lidarr_ui_url.rstrip('/')}/system/plugins" if lidarr_ui_url else ""
         )
 
-        lm_latest, mbms_latest = await asyncio.gather(
-            _fetch_latest_release_version("HVR88", "Limbo"),
-            _fetch_latest_release_version("HVR88", "MBMS_PLUS"),
-        )
+        latest_releases = status_poller.get_value("releases") or {}
+        lm_latest = latest_releases.get("limbo")
+        mbms_latest = latest_releases.get("mbms_plus")
 
         lm_update = (
             lm_latest
@@ -1220,9 +1080,7 @@ def register_root_route() -> None:
             ]
         )
         replacements["__REPLICATION_PILL_HTML__"] = replication_pill_html
-        page = template
-        for key, value in replacements.items():
-            page = page.replace(key, value)
+        page = root_template.get_template("root.html").render(replacements)
         return Response(page, mimetype="text/html")
 
     wrapped = no_cache(_limbo_root_route)
@@ -0,0 +1,90 @@
+import re
+from pathlib import Path
+from typing import Callable, Dict, List, Mapping, Tuple, TypeVar
+
+from lidarrmetadata.env_utils import env_flag
+
+_ASSETS_DIR = Path(__file__).resolve().parent / "assets"
+_PLACEHOLDER_RE = re.compile(r"__[A-Z][A-Z0-9_]*__")
+_XML_DECL_RE = re.compile(r"<\?xml[^>]*\?>", re.IGNORECASE)
+_LOADED: Dict[str, Tuple[float, object]] = {}
+
+T = TypeVar("T")
+
+
+class CompiledTemplate:
+    """
+    A template split once into literal text and placeholder names, rendered in one join.
+    """
+
+    __slots__ = ("literals", "keys")
+
+    def __init__(self, text: str) -> None:
+        literals: List[str] = []
+        keys: List[str] = []
+        last = 0
+        for match in _PLACEHOLDER_RE.finditer(text):
+            literals.append(text[last : match.start()])
+            keys.append(match.group(0))
+            last = match.end()
+        literals.append(text[last:])
+        self.literals = tuple(literals)
+        self.keys = tuple(keys)
+
+    def render(self, values: Mapping[str, str]) -> str:
+        parts: List[str] = [self.literals[0]]
+        for key, literal in zip(self.keys, self.literals[1:]):
+            parts.append(values.get(key, key))
+            parts.append(literal)
+        return "".join(parts)
+
+
+def _reload_enabled() -> bool:
+    return env_flag("LIMBO_TEMPLATE_RELOAD", False)
+
+
+def _load(name: str, loader: Callable[[Path], T]) -> T:
+    cached = _LOADED.get(name)
+    if cached is not None and not _reload_enabled():
+        return cached[1]  # type: ignore[return-value]
+    path = _ASSETS_DIR / name
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        mtime = -1.0
+    if cached is not None and cached[0] == mtime:
+        return cached[1]  # type: ignore[return-value]
+    value = loader(path)
+    _LOADED[name] = (mtime, value)
+    return value
+
+
+def _load_template(path: Path) -> CompiledTemplate:
+    try:
+        text = path.read_text(encoding="utf-8")
+    except Exception:
+        text = ""
+    return CompiledTemplate(text)
+
+
+def _load_svg(path: Path) -> str:
+    try:
+        content = path.read_text(encoding="utf-8")
+    except Exception:
+        return ""
+    return _XML_DECL_RE.sub("", content).strip()
+
+
+def get_template(name: str) -> CompiledTemplate:
+    return _load(name, _load_template)
+
+
+def inline_svg(name: str) -> str:
+    return _load(name, _load_svg)
+
+
+def preload(template_names: Tuple[str, ...], svg_names: Tuple[str, ...]) -> None:
+    for name in template_names:
+        get_template(name)
+    for name in svg_names:
+        inline_svg(name)
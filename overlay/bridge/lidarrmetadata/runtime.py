@@ -0,0 +1,111 @@
+import asyncio
+import logging
+import platform
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, Optional
+
+from lidarrmetadata.env_utils import env_flag, env_float, env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+_STATE: Dict[str, Any] = {"requested": None, "policy": "asyncio", "error": None}
+_EXECUTOR: Dict[str, Optional[ThreadPoolExecutor]] = {"executor": None}
+_INSTALLED = False
+
+
+def _requested_loop() -> str:
+    """
+    "auto" (uvloop when installed), "uvloop" (warn if missing) or "asyncio".
+    """
+    value = env_str("LIMBO_EVENT_LOOP", "auto").strip().lower()
+    return value if value in {"auto", "uvloop", "asyncio"} else "auto"
+
+
+def install_policy() -> None:
+    """
+    Select the event loop implementation. Call before any loop is created; pre-forked
+    workers inherit the policy.
+    """
+    requested = _requested_loop()
+    _STATE["requested"] = requested
+    if requested == "asyncio":
+        return
+    try:
+        import uvloop
+    except ImportError as exc:
+        _STATE["error"] = str(exc)
+        if requested == "uvloop":
+            logger.warning("Limbo runtime: uvloop requested but not installed; using asyncio")
+        return
+    asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    _STATE["policy"] = "uvloop"
+
+
+def _configure_loop(loop: asyncio.AbstractEventLoop) -> None:
+    workers = env_int("LIMBO_EXECUTOR_WORKERS", 0, 0)
+    if workers > 0:
+        executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="limbo")
+        loop.set_default_executor(executor)
+        _EXECUTOR["executor"] = executor
+    if env_flag("LIMBO_ASYNCIO_DEBUG", False):
+        # Logs callbacks slower than the threshold plus never-awaited coroutines.
+        loop.set_debug(True)
+    loop.slow_callback_duration = env_float("LIMBO_ASYNCIO_SLOW_CALLBACK", 0.1, 0.001)
+
+
+def describe() -> Dict[str, Any]:
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        loop = None
+    loop_module = type(loop).__module__.split(".")[0] if loop is not None else None
+    executor = _EXECUTOR["executor"]
+    info: Dict[str, Any] = {
+        "python": platform.python_version(),
+        "implementation": platform.python_implementation(),
+        "requested_loop": _STATE["requested"] or _requested_loop(),
+        "loop": loop_module or _STATE["policy"],
+        "executor_workers": executor._max_workers if executor is not None else None,
+        "debug": loop.get_debug() if loop is not None else False,
+        "slow_callback_duration": getattr(loop, "slow_callback_duration", None),
+    }
+    if info["loop"] == "uvloop":
+        import uvloop
+
+        info["uvloop_version"] = getattr(uvloop, "__version__", None)
+    elif _STATE["error"] and info["requested_loop"] != "asyncio":
+        info["uvloop_error"] = _STATE["error"]
+    return info
+
+
+def install() -> None:
+    """
+    Apply the executor size and debug settings to the serving loop, whichever entrypoint
+    (upstream server or launcher workers) created it.
+    """
+    global _INSTALLED
+    if _INSTALLED:
+        return
+    _INSTALLED = True
+
+    from lidarrmetadata import app as upstream_app
+
+    app = upstream_app.app
+
+    async def _limbo_runtime_configure():
+        _configure_loop(asyncio.get_running_loop())
+        info = describe()
+        logger.info(
+            "Limbo runtime: %s loop on Python %s (executor workers: %s, debug: %s)",
+            info["loop"],
+            info["python"],
+            info["executor_workers"] or "default",
+            info["debug"],
+        )
+
+    funcs = getattr(app, "before_serving_funcs", None)
+    if isinstance(funcs, list):
+        # Before the other hooks, so their executor work uses the sized pool.
+        funcs.insert(0, _limbo_runtime_configure)
+    else:
+        app.before_serving(_limbo_runtime_configure)
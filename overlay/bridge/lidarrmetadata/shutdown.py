@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import os
+import signal
+import time
+from typing import Any, Callable, Dict, List
+
+from lidarrmetadata.env_utils import env_float
+
+logger = logging.getLogger(__name__)
+
+_STATE: Dict[str, Any] = {"draining": False, "started_at": None, "in_flight": 0}
+_ON_DRAIN: List[Callable[[], None]] = []
+_INSTALLED = False
+
+
+def is_draining() -> bool:
+    return bool(_STATE["draining"])
+
+
+def begin_drain() -> None:
+    """
+    Mark the process as shutting down: ``/ready`` turns 503 and responses ask clients
+    to reconnect, so a load balancer moves traffic before the listener closes.
+    """
+    if _STATE["draining"]:
+        return
+    _STATE["draining"] = True
+    _STATE["started_at"] = time.time()
+    logger.info("Limbo shutdown: draining (%s request(s) in flight)", _STATE["in_flight"])
+    for callback in list(_ON_DRAIN):
+        try:
+            callback()
+        except Exception:
+            logger.warning("Limbo shutdown: drain callback %r failed", callback, exc_info=True)
+
+
+def on_drain(callback: Callable[[], None]) -> None:
+    """
+    Call ``callback`` (synchronously, on the loop) once draining starts.
+    """
+    if callback not in _ON_DRAIN:
+        _ON_DRAIN.append(callback)
+
+
+def drain_delay() -> float:
+    """
+    Seconds to keep serving after SIGTERM, with ``/ready`` failing, before the listener
+    is closed.
+    """
+    return env_float("LIMBO_SHUTDOWN_DELAY", 0.0, 0.0)
+
+
+def _drain_timeout() -> float:
+    return env_float(
+        "LIMBO_SHUTDOWN_DRAIN_TIMEOUT", env_float("LIMBO_HTTP_GRACEFUL_TIMEOUT", 30.0, 0.0), 0.0
+    )
+
+
+def _pool_timeout() -> float:
+    return env_float("LIMBO_SHUTDOWN_POOL_TIMEOUT", 10.0, 0.0)
+
+
+def shutdown_budget() -> float:
+    """
+    Upper bound on a clean stop, for the supervisor's kill deadline.
+    """
+    return drain_delay() + _drain_timeout() + _pool_timeout()
+
+
+def _install_signal_handler() -> None:
+    """
+    Single-process mode: take SIGTERM over from the upstream server so draining starts
+    while the listener is still open, then hand the stop back to the server as SIGINT
+    after ``LIMBO_SHUTDOWN_DELAY``. Quart's ``run`` and Hypercorn's ``serve`` stop
+    gracefully on either signal and install their handlers before serving starts.
+    """
+    loop = asyncio.get_running_loop()
+
+    def _hand_over() -> None:
+        os.kill(os.getpid(), signal.SIGINT)
+
+    def _on_sigterm() -> None:
+        if is_draining():
+            return
+        begin_drain()
+        loop.call_later(drain_delay(), _hand_over)
+
+    try:
+        loop.add_signal_handler(signal.SIGTERM, _on_sigterm)
+    except (NotImplementedError, RuntimeError, ValueError):
+        logger.debug("Limbo shutdown: cannot handle SIGTERM here; draining starts late")
+
+
+async def _wait_in_flight() -> None:
+    deadline = time.monotonic() + _drain_timeout()
+    while _STATE["in_flight"] > 0 and time.monotonic() < deadline:
+        await asyncio.sleep(0.05)
+    if _STATE["in_flight"] > 0:
+        logger.warning(
+            "Limbo shutdown: %s request(s) still in flight after the drain timeout",
+            _STATE["in_flight"],
+        )
+
+
+async def _flush_pending_writes() -> None:
+    from lidarrmetadata import filter_sync
+
+    # A filter change that has not reached the cache DB yet would be lost to peers.
+    try:
+        await asyncio.wait_for(filter_sync.flush(), _pool_timeout())
+    except Exception:
+        logger.warning("Limbo shutdown: pending filter config was not published")
+
+
+async def _close_pool(name: str, pool: Any) -> None:
+    try:
+        await asyncio.wait_for(pool.close(), _pool_timeout())
+    except asyncio.TimeoutError:
+        logger.warning("Limbo shutdown: pool %s did not close in time; terminating", name)
+        pool.terminate()
+    except Exception:
+        logger.warning("Limbo shutdown: closing pool %s failed", name, exc_info=True)
+
+
+async def close_pools() -> None:
+    """
+    Close the MusicBrainz pool, the db_hooks pools and the cache pools.
+    """
+    from lidarrmetadata import cache_tables
+    from lidarrmetadata import db_hooks
+    from lidarrmetadata import provider
+
+    pools = db_hooks.known_pools() + cache_tables.known_pools()
+    if pools:
+        await asyncio.gather(*(_close_pool(name, pool) for name, pool in pools))
+    try:
+        for mb_provider in provider.get_providers_implementing(provider.DataVintageMixin):
+            # db_hooks.get_pool recreates these on demand; never hand out closed ones.
+            if getattr(mb_provider, "_limbo_pools", None):
+                mb_provider._limbo_pools = {}
+    except Exception:
+        pass
+    logger.info("Limbo shutdown: closed %s pool(s)", len(pools))
+
+
+def install() -> None:
+    """
+    Drain in-flight requests before the other after_serving hooks stop background tasks
+    and flush state, then close every pool once they are done. Call after the other
+    install() hooks.
+    """
+    global _INSTALLED
+    if _INSTALLED:
+        return
+    _INSTALLED = True
+
+    from lidarrmetadata import app as upstream_app
+
+    app = upstream_app.app
+
+    async def _limbo_shutdown_request_start():
+        _STATE["in_flight"] += 1
+
+    before = getattr(app, "before_request_funcs", None)
+    if isinstance(before, dict):
+        # First, so a hook that answers early cannot skip the count its teardown undoes.
+        before.setdefault(None, []).insert(0, _limbo_shutdown_request_start)
+    else:
+        app.before_request(_limbo_shutdown_request_start)
+
+    @app.teardown_request
+    async def _limbo_shutdown_request_end(_exc=None):
+        _STATE["in_flight"] = max(0, _STATE["in_flight"] - 1)
+
+    @app.before_serving
+    async def _limbo_shutdown_signals():
+        # Launcher-managed workers install their own handler (see workers._serve_worker).
+        if not os.environ.get("LIMBO_WORKER_ID"):
+            _install_signal_handler()
+
+    @app.after_request
+    async def _limbo_shutdown_connection_close(response):
+        if _STATE["draining"]:
+            response.headers["Connection"] = "close"
+        return response
+
+    async def _limbo_shutdown_drain():
+        begin_drain()
+        await _wait_in_flight()
+        await _flush_pending_writes()
+
+    funcs = getattr(app, "after_serving_funcs", None)
+    if isinstance(funcs, list):
+        # Ahead of the background-task, state-store and HTTP-session teardown hooks.
+        funcs.insert(0, _limbo_shutdown_drain)
+    else:
+        app.after_serving(_limbo_shutdown_drain)
+
+    @app.after_serving
+    async def _limbo_shutdown_close_pools():
+        await close_pools()
@@ -0,0 +1,190 @@
+import importlib.abc
+import logging
+import sys
+import time
+from typing import Any, Dict, List, Optional
+
+from lidarrmetadata.env_utils import env_flag, env_int
+
+logger = logging.getLogger(__name__)
+
+_T0 = time.perf_counter()
+_LAST_MARK = [_T0]
+_IMPORTS: Dict[str, float] = {}
+_STEPS: List[Dict[str, Any]] = []
+_POOLS: List[Dict[str, Any]] = []
+_SERVING: Dict[str, Optional[float]] = {"started": None, "ready": None}
+_INSTALLED = False
+
+
+def is_enabled() -> bool:
+    return env_flag("LIMBO_STARTUP_PROFILE", True)
+
+
+def _time_loader(loader) -> None:
+    """
+    Time ``exec_module`` on this loader instance. The loader object itself is kept, so
+    code that inspects ``module.__loader__`` sees what it expects.
+    """
+    attrs = getattr(loader, "__dict__", None)
+    if isinstance(loader, type) or attrs is None or "exec_module" in attrs:
+        return
+    original = loader.exec_module
+
+    def exec_module(module) -> None:
+        started = time.perf_counter()
+        try:
+            original(module)
+        finally:
+            _IMPORTS[module.__name__] = time.perf_counter() - started
+
+    try:
+        loader.exec_module = exec_module
+    except AttributeError:
+        pass
+
+
+class _TimedFinder(importlib.abc.MetaPathFinder):
+    """
+    Records inclusive exec time per module (nested imports included), the same
+    figure ``python -X importtime`` reports.
+    """
+
+    def find_spec(self, fullname, path, target=None):
+        for finder in sys.meta_path:
+            if finder is self or not hasattr(finder, "find_spec"):
+                continue
+            spec = finder.find_spec(fullname, path, target)
+            if spec is None:
+                continue
+            if spec.loader is not None and hasattr(spec.loader, "exec_module"):
+                _time_loader(spec.loader)
+            return spec
+        return None
+
+
+def install_import_timer() -> None:
+    if is_enabled() and not any(isinstance(f, _TimedFinder) for f in sys.meta_path):
+        sys.meta_path.insert(0, _TimedFinder())
+
+
+def _remove_import_timer() -> None:
+    sys.meta_path[:] = [f for f in sys.meta_path if not isinstance(f, _TimedFinder)]
+
+
+def mark(name: str) -> None:
+    """
+    Close a launcher phase: record the time since the previous mark under ``name``.
+    """
+    now = time.perf_counter()
+    _STEPS.append({"step": name, "seconds": round(now - _LAST_MARK[0], 4)})
+    _LAST_MARK[0] = now
+
+
+def _instrument_pools() -> None:
+    try:
+        from asyncpg.pool import Pool
+    except Exception:
+        return
+    original = getattr(Pool, "_async__init__", None)
+    if original is None or getattr(original, "_limbo_profiled", False):
+        return
+
+    async def _limbo_pool_init(self):
+        started = time.perf_counter()
+        try:
+            return await original(self)
+        finally:
+            if len(_POOLS) < 50:
+                connect_kwargs = getattr(self, "_connect_kwargs", None) or {}
+                _POOLS.append(
+                    {
+                        "database": connect_kwargs.get("database"),
+                        "seconds": round(time.perf_counter() - started, 4),
+                        "at": round(time.perf_counter() - _T0, 3),
+                    }
+                )
+
+    _limbo_pool_init._limbo_profiled = True
+    Pool._async__init__ = _limbo_pool_init
+
+
+def report() -> Dict[str, Any]:
+    top = env_int("LIMBO_STARTUP_PROFILE_TOP", 20, 1)
+    slowest = sorted(_IMPORTS.items(), key=lambda item: item[1], reverse=True)[:top]
+    started, ready = _SERVING["started"], _SERVING["ready"]
+    return {
+        "enabled": is_enabled(),
+        "steps": list(_STEPS),
+        "imports": [
+            {"module": name, "seconds": round(seconds, 4)} for name, seconds in slowest
+        ],
+        "modules_timed": len(_IMPORTS),
+        "pools": list(_POOLS),
+        "serving_startup_seconds": round(ready - started, 4) if started and ready else None,
+        "ready_after_seconds": round(ready - _T0, 4) if ready else None,
+    }
+
+
+def _log_report() -> None:
+    data = report()
+    logger.info(
+        "Limbo startup: ready %.2fs after launch (serving hooks %.2fs)",
+        data["ready_after_seconds"] or 0.0,
+        data["serving_startup_seconds"] or 0.0,
+    )
+    for entry in data["steps"]:
+        logger.info("Limbo startup: step %-24s %.3fs", entry["step"], entry["seconds"])
+    for entry in data["imports"][:10]:
+        logger.info("Limbo startup: import %-40s %.3fs", entry["module"], entry["seconds"])
+    for entry in data["pools"]:
+        logger.info("Limbo startup: pool %s %.3fs", entry["database"], entry["seconds"])
+
+
+def install() -> None:
+    """
+    Time the serving-startup hooks and pool creation, then log the report once the
+    app is ready. Call last, after every other before_serving hook is registered.
+    """
+    global _INSTALLED
+    if _INSTALLED or not is_enabled():
+        return
+    _INSTALLED = True
+
+    from lidarrmetadata import app as upstream_app
+
+    _instrument_pools()
+    app = upstream_app.app
+
+    async def _limbo_profile_serving_start():
+        _SERVING["started"] = time.perf_counter()
+
+    funcs = getattr(app, "before_serving_funcs", None)
+    if isinstance(funcs, list):
+        # First before_serving hook, so the others are inside the measured window.
+        funcs.insert(0, _limbo_profile_serving_start)
+    else:
+        app.before_serving(_limbo_profile_serving_start)
+
+    @app.before_serving
+    async def _limbo_profile_serving_ready():
+        _SERVING["ready"] = time.perf_counter()
+        _remove_import_timer()
+        _log_report()
+
+
+def register_startup_route() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import jsonify, request
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/admin/startup":
+            return
+
+    @upstream_app.app.route("/admin/startup", methods=["GET"])
+    async def _limbo_admin_startup():
+        if request.headers.get("authorization") != upstream_app.app.config.get(
+            "LIMBO_APIKEY"
+        ):
+            return jsonify("Unauthorized"), 401
+        return jsonify(report())
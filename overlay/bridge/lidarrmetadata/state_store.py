@@ -0,0 +1,329 @@
+import asyncio
+import atexit
+import contextlib
+import fcntl
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+from lidarrmetadata import background
+from lidarrmetadata.env_utils import env_float
+
+logger = logging.getLogger(__name__)
+
+
+_ENTRIES: Dict[str, Dict[str, Any]] = {}
+_DIRTY: Set[str] = set()
+# Taken for a flush that has not finished; a re-read now would drop those changes.
+_WRITING: Set[str] = set()
+_FLUSH_TASK_NAME = "state-store:flush"
+_INSTALLED = False
+
+
+def register(
+    key: str,
+    path: Path,
+    kind: str = "json",
+    newline: bool = False,
+    pretty: bool = False,
+    merge: bool = False,
+) -> None:
+    """
+    Declare a state file. ``kind`` is "json" or "text"; text values are stored stripped
+    and written back with a trailing newline when ``newline`` is set. ``pretty`` writes
+    indented, sorted JSON for files people edit by hand. ``merge`` is for JSON objects
+    whose keys several workers own: a flush writes only this process's changed and
+    removed keys into the file as it is on disk, under a file lock.
+    """
+    entry = _ENTRIES.get(key)
+    if entry is not None and entry["path"] == Path(path):
+        return
+    _ENTRIES[key] = {
+        "path": Path(path),
+        "kind": kind,
+        "newline": newline,
+        "pretty": pretty,
+        "merge": merge,
+        "loaded": False,
+        "value": None,
+        "base": {},
+        "written": None,
+        "mtime": None,
+        "checked": 0.0,
+    }
+
+
+def _shared() -> bool:
+    """
+    True under launcher-managed workers, where other processes write the same files.
+    """
+    return bool(os.environ.get("LIMBO_WORKER_ID"))
+
+
+def _copy(value: Any) -> Any:
+    return json.loads(json.dumps(value))
+
+
+def _load(entry: Dict[str, Any]) -> None:
+    entry["loaded"] = True
+    try:
+        entry["mtime"] = entry["path"].stat().st_mtime
+        raw = entry["path"].read_text(encoding="utf-8")
+    except OSError:
+        return
+    entry["written"] = raw
+    if entry["kind"] == "json":
+        try:
+            entry["value"] = json.loads(raw)
+        except ValueError:
+            entry["value"] = None
+        if entry["merge"]:
+            entry["base"] = _copy(entry["value"]) if isinstance(entry["value"], dict) else {}
+    else:
+        entry["value"] = raw.strip() or None
+
+
+def _refresh_if_changed(key: str, entry: Dict[str, Any]) -> None:
+    """
+    Under workers, pick up another process's write (checked at most once a second).
+    """
+    if not _shared() or key in _DIRTY or key in _WRITING:
+        return
+    now = time.monotonic()
+    if now - entry["checked"] < env_float("LIMBO_STATE_RELOAD_INTERVAL", 1.0, 0.0):
+        return
+    entry["checked"] = now
+    try:
+        mtime = entry["path"].stat().st_mtime
+    except OSError:
+        return
+    if mtime != entry["mtime"]:
+        _load(entry)
+
+
+def preload() -> None:
+    """
+    Read every registered file once, at startup, before the loop is serving requests.
+    """
+    for entry in _ENTRIES.values():
+        if not entry["loaded"]:
+            _load(entry)
+
+
+def get(key: str, default: Any = None) -> Any:
+    entry = _ENTRIES[key]
+    if not entry["loaded"]:
+        _load(entry)
+    else:
+        _refresh_if_changed(key, entry)
+    value = entry["value"]
+    return default if value is None else value
+
+
+def reload(key: str, default: Any = None) -> Any:
+    """
+    Re-read a file another process may have written. Pending local writes win.
+    """
+    entry = _ENTRIES[key]
+    if key not in _DIRTY and key not in _WRITING:
+        _load(entry)
+    value = entry["value"]
+    return default if value is None else value
+
+
+def modified_at(key: str) -> Optional[float]:
+    try:
+        return _ENTRIES[key]["path"].stat().st_mtime
+    except OSError:
+        return None
+
+
+def put(key: str, value: Any) -> None:
+    """
+    Update a value in memory and schedule a debounced write-behind flush.
+    """
+    entry = _ENTRIES[key]
+    entry["loaded"] = True
+    entry["value"] = value
+    _DIRTY.add(key)
+    if background.spawn(_FLUSH_TASK_NAME, _flush_later()) is None:
+        # No running loop (startup code): write straight away.
+        flush_sync()
+
+
+def _serialize(entry: Dict[str, Any]) -> Optional[str]:
+    value = entry["value"]
+    if value is None:
+        return None
+    if entry["kind"] == "json":
+        if entry["pretty"]:
+            return json.dumps(value, indent=2, sort_keys=True) + "\n"
+        return json.dumps(value)
+    text = str(value)
+    return text + "\n" if entry["newline"] else text
+
+
+def _write_file(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(path.suffix + f".{os.getpid()}.tmp")
+    tmp_path.write_text(text, encoding="utf-8")
+    tmp_path.replace(path)
+
+
+@contextlib.contextmanager
+def _locked(path: Path) -> Iterator[None]:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path.with_suffix(path.suffix + ".lock"), "a") as lock_file:
+        fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+class _Merge:
+    """
+    One process's changes to a merge entry since it last synced with the file.
+    """
+
+    __slots__ = ("snapshot", "changed", "removed")
+
+    def __init__(self, entry: Dict[str, Any]) -> None:
+        value = entry["value"] if isinstance(entry["value"], dict) else {}
+        base = entry["base"]
+        self.snapshot = _copy(value)
+        self.changed = {k: v for k, v in self.snapshot.items() if k not in base or base[k] != v}
+        self.removed = [k for k in base if k not in self.snapshot]
+
+    def write(self, entry: Dict[str, Any]) -> Tuple[Dict[str, Any], str]:
+        path = entry["path"]
+        with _locked(path):
+            try:
+                current = json.loads(path.read_text(encoding="utf-8"))
+            except (OSError, ValueError):
+                current = {}
+            if not isinstance(current, dict):
+                current = {}
+            current.update(self.changed)
+            for key in self.removed:
+                current.pop(key, None)
+            text = _serialize({**entry, "value": current}) or "{}"
+            _write_file(path, text)
+        return current, text
+
+    def fold(self, entry: Dict[str, Any], merged: Dict[str, Any]) -> None:
+        """
+        Adopt other processes' keys without undoing local changes made meanwhile.
+        """
+        value = entry["value"] if isinstance(entry["value"], dict) else {}
+        for key, item in merged.items():
+            if key not in self.snapshot and key not in value:
+                value[key] = item
+        for key in list(value):
+            if key not in merged and key in self.snapshot and value[key] == self.snapshot[key]:
+                value.pop(key)
+        entry["value"] = value
+        entry["base"] = _copy(merged)
+
+
+def _take_dirty() -> List[Tuple[str, Path, Any]]:
+    pending: List[Tuple[str, Path, Any]] = []
+    for key in sorted(_DIRTY):
+        entry = _ENTRIES[key]
+        if entry["merge"]:
+            pending.append((key, entry["path"], _Merge(entry)))
+            continue
+        text = _serialize(entry)
+        if text is None or text == entry["written"]:
+            continue
+        pending.append((key, entry["path"], text))
+    _WRITING.update(key for key, _path, _item in pending)
+    _DIRTY.clear()
+    return pending
+
+
+def _write_pending(key: str, path: Path, item: Any) -> Any:
+    if isinstance(item, _Merge):
+        return item.write(_ENTRIES[key])
+    _write_file(path, item)
+    return item
+
+
+def _mark_written(key: str, item: Any, result: Any) -> None:
+    _WRITING.discard(key)
+    entry = _ENTRIES[key]
+    if isinstance(item, _Merge):
+        merged, text = result
+        item.fold(entry, merged)
+        result = text
+    entry["written"] = result
+    try:
+        entry["mtime"] = entry["path"].stat().st_mtime
+    except OSError:
+        pass
+
+
+def _write_failed(key: str, path: Path) -> None:
+    # Keep the change pending: a retry writes it, and reload() will not discard it.
+    _WRITING.discard(key)
+    _DIRTY.add(key)
+    logger.exception("Limbo state store: failed to write %s", path)
+
+
+async def flush() -> bool:
+    """
+    Write every dirty entry now, off the event loop. False if any write failed.
+    """
+    loop = asyncio.get_running_loop()
+    ok = True
+    for key, path, item in _take_dirty():
+        try:
+            result = await loop.run_in_executor(None, _write_pending, key, path, item)
+            _mark_written(key, item, result)
+        except Exception:
+            _write_failed(key, path)
+            ok = False
+    return ok
+
+
+def flush_sync() -> bool:
+    ok = True
+    for key, path, item in _take_dirty():
+        try:
+            _mark_written(key, item, _write_pending(key, path, item))
+        except Exception:
+            _write_failed(key, path)
+            ok = False
+    return ok
+
+
+async def _flush_later() -> None:
+    base_delay = env_float("LIMBO_STATE_FLUSH_DELAY", 0.5, 0.0)
+    max_delay = env_float("LIMBO_STATE_RETRY_MAX_DELAY", 30.0, 1.0)
+    delay = base_delay
+    while _DIRTY:
+        await asyncio.sleep(delay)
+        if await flush():
+            delay = base_delay
+        else:
+            # Failing writes (full or read-only disk) back off instead of spinning.
+            delay = min(max(delay, 0.5) * 2, max_delay)
+
+
+def install() -> None:
+    global _INSTALLED
+    if _INSTALLED:
+        return
+    _INSTALLED = True
+
+    from lidarrmetadata import app as upstream_app
+
+    preload()
+    atexit.register(flush_sync)
+
+    @upstream_app.app.after_serving
+    async def _limbo_state_store_flush():
+        await flush()
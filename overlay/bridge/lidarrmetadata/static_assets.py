@@ -0,0 +1,171 @@
+import gzip
+import hashlib
+import mimetypes
+from pathlib import Path
+from typing import Dict, Optional
+
+from lidarrmetadata.env_utils import env_flag, env_int
+
+try:
+    import brotli
+except Exception:  # pragma: no cover - optional dependency
+    brotli = None
+
+_ASSETS_DIR = Path(__file__).resolve().parent / "assets"
+_SKIP_SUFFIXES = {".html"}
+_COMPRESSIBLE_TYPES = {
+    "text/css",
+    "text/plain",
+    "image/svg+xml",
+    "application/javascript",
+    "application/json",
+}
+_IMMUTABLE = "public, max-age=31536000, immutable"
+_ASSETS: Dict[str, "StaticAsset"] = {}
+
+
+class StaticAsset:
+    """
+    One file under assets/, held in memory with its content hash and encoded variants.
+    """
+
+    __slots__ = ("name", "mimetype", "mtime", "digest", "variants")
+
+    def __init__(self, name: str, data: bytes, mtime: float) -> None:
+        self.name = name
+        self.mtime = mtime
+        mimetype, _ = mimetypes.guess_type(name)
+        if name.endswith(".svg"):
+            mimetype = "image/svg+xml"
+        self.mimetype = mimetype or "application/octet-stream"
+        self.digest = hashlib.sha256(data).hexdigest()[:16]
+        self.variants: Dict[str, bytes] = {"identity": data}
+        if self.mimetype in _COMPRESSIBLE_TYPES:
+            gzipped = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(gzipped) < len(data):
+                self.variants["gzip"] = gzipped
+            if brotli is not None:
+                try:
+                    compressed = brotli.compress(data)
+                except Exception:
+                    compressed = b""
+                if compressed and len(compressed) < len(data):
+                    self.variants["br"] = compressed
+
+    def select(self, accept_encoding: str) -> str:
+        tokens = {
+            part.split(";", 1)[0].strip().lower()
+            for part in (accept_encoding or "").split(",")
+            if part.strip()
+        }
+        for encoding in ("br", "gzip"):
+            if encoding in self.variants and encoding in tokens:
+                return encoding
+        return "identity"
+
+    def etag(self, encoding: str) -> str:
+        """
+        Strong validator for one encoded variant; each encoding has different bytes.
+        """
+        if encoding == "identity":
+            return f'"{self.digest}"'
+        return f'"{self.digest}-{encoding}"'
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """
+    If-None-Match uses the weak comparison (RFC 7232 section 3.2): ``W/`` is ignored.
+    """
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag == "*" or tag == etag:
+            return True
+        if tag.startswith("W/") and tag[2:] == etag:
+            return True
+    return False
+
+
+def _load_asset(path: Path) -> Optional[StaticAsset]:
+    try:
+        data = path.read_bytes()
+        mtime = path.stat().st_mtime
+    except OSError:
+        return None
+    return StaticAsset(path.relative_to(_ASSETS_DIR).as_posix(), data, mtime)
+
+
+def load_all() -> None:
+    _ASSETS.clear()
+    if not _ASSETS_DIR.is_dir():
+        return
+    for path in sorted(_ASSETS_DIR.rglob("*")):
+        if not path.is_file() or path.suffix.lower() in _SKIP_SUFFIXES:
+            continue
+        asset = _load_asset(path)
+        if asset is not None:
+            _ASSETS[asset.name] = asset
+
+
+def get_asset(name: str) -> Optional[StaticAsset]:
+    asset = _ASSETS.get(name)
+    if asset is None or not env_flag("LIMBO_TEMPLATE_RELOAD", False):
+        return asset
+    path = _ASSETS_DIR / name
+    try:
+        mtime = path.stat().st_mtime
+    except OSError:
+        return asset
+    if mtime != asset.mtime:
+        reloaded = _load_asset(path)
+        if reloaded is not None:
+            _ASSETS[name] = reloaded
+            return reloaded
+    return asset
+
+
+def asset_url(name: str, base_path: str = "") -> str:
+    """
+    Return the fingerprinted URL for an asset; the hash changes whenever the file does.
+    """
+    url = f"{base_path}/assets/{name}"
+    asset = get_asset(name)
+    if asset is None:
+        return url
+    return f"{url}?v={asset.digest}"
+
+
+def register_asset_routes() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import Response, request
+
+    load_all()
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/assets/<path:filename>":
+            return
+
+    @upstream_app.app.route("/assets/<path:filename>", methods=["GET", "HEAD"])
+    async def _limbo_asset(filename):
+        asset = get_asset(filename)
+        if asset is None:
+            return Response("Not Found", status=404, mimetype="text/plain")
+
+        if request.args.get("v") == asset.digest:
+            cache_control = _IMMUTABLE
+        else:
+            max_age = env_int("LIMBO_ASSET_MAX_AGE", 3600, 0)
+            cache_control = f"public, max-age={max_age}"
+        encoding = asset.select(request.headers.get("Accept-Encoding") or "")
+        headers = {
+            "Cache-Control": cache_control,
+            "ETag": asset.etag(encoding),
+            "Vary": "Accept-Encoding",
+        }
+
+        if _etag_matches(request.headers.get("If-None-Match") or "", headers["ETag"]):
+            return Response(b"", status=304, headers=headers)
+
+        if encoding != "identity":
+            headers["Content-Encoding"] = encoding
+        body = asset.variants[encoding]
+        return Response(body, status=200, headers=headers, mimetype=asset.mimetype)
@@ -0,0 +1,184 @@
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from lidarrmetadata import background
+from lidarrmetadata.env_utils import env_float
+from lidarrmetadata.json_utils import jsonable
+
+_SNAPSHOT: Dict[str, Dict[str, Any]] = {}
+_WAKE: Dict[str, asyncio.Event] = {}
+_SOURCES: Dict[str, Dict[str, Any]] = {}
+
+
+def _source(name: str, default_interval: float, default_timeout: float):
+    """
+    Register a status source polled every LIMBO_STATUS_<NAME>_INTERVAL seconds.
+    """
+
+    def decorator(func: Callable[[], Awaitable[Any]]):
+        key = name.upper()
+        _SOURCES[name] = {
+            "fetch": func,
+            "interval": env_float(f"LIMBO_STATUS_{key}_INTERVAL", default_interval, 1.0),
+            "timeout": env_float(f"LIMBO_STATUS_{key}_TIMEOUT", default_timeout, 0.1),
+        }
+        return func
+
+    return decorator
+
+
+@_source("vintage", 300.0, 10.0)
+async def _poll_vintage() -> Any:
+    from lidarrmetadata import cache_tables
+    from lidarrmetadata import provider
+
+    vintage_providers = provider.get_providers_implementing(provider.DataVintageMixin)
+    if not vintage_providers:
+        return None
+    return await cache_tables.maybe_await(vintage_providers[0].data_vintage())
+
+
+@_source("lidarr", 60.0, 2.0)
+async def _poll_lidarr() -> Optional[str]:
+    from lidarrmetadata import root_patch
+
+    base_url = root_patch.get_lidarr_base_url()
+    api_key = root_patch.get_lidarr_api_key()
+    if not base_url or not api_key:
+        return None
+    version = await root_patch._fetch_lidarr_version(base_url, api_key)
+    if version:
+        root_patch.set_lidarr_version(version)
+    return version
+
+
+@_source("replication", 15.0, 2.0)
+async def _poll_replication() -> Dict[str, Any]:
+    from lidarrmetadata import root_patch
+
+    use_remote, _start_url, status_url, header_pair = root_patch._replication_remote_config()
+    if use_remote:
+        data = await root_patch._fetch_replication_status_remote(status_url, header_pair)
+        if data and isinstance(data, dict):
+            return {
+                "running": bool(data.get("running")),
+                "started": str(data.get("started") or ""),
+                "remote": True,
+                "raw": data,
+            }
+        return {"running": False, "started": "", "remote": True, "raw": None}
+    running, started = root_patch._read_replication_status()
+    return {"running": running, "started": started, "remote": False, "raw": None}
+
+
+@_source("releases", 1800.0, 10.0)
+async def _poll_releases() -> Dict[str, Optional[str]]:
+    from lidarrmetadata import root_patch
+
+    limbo_latest, mbms_latest = await asyncio.gather(
+        root_patch._fetch_latest_release_version("HVR88", "Limbo"),
+        root_patch._fetch_latest_release_version("HVR88", "MBMS_PLUS"),
+    )
+    return {"limbo": limbo_latest, "mbms_plus": mbms_latest}
+
+
+@_source("cache", 300.0, 30.0)
+async def _poll_cache() -> Dict[str, Dict[str, Any]]:
+    from lidarrmetadata import cache_stats
+
+    return await cache_stats.collect_table_stats()
+
+
+async def refresh(name: str) -> None:
+    source = _SOURCES[name]
+    entry = _SNAPSHOT.setdefault(name, {"value": None, "updated": None, "error": None})
+    started = time.monotonic()
+    try:
+        value = await asyncio.wait_for(source["fetch"](), source["timeout"])
+    except asyncio.CancelledError:
+        raise
+    except asyncio.TimeoutError:
+        entry["error"] = f"timed out after {source['timeout']:g}s"
+    except Exception as exc:
+        entry["error"] = str(exc) or exc.__class__.__name__
+    else:
+        entry["value"] = value
+        entry["error"] = None
+        entry["updated"] = time.time()
+    entry["duration_ms"] = round((time.monotonic() - started) * 1000.0, 1)
+
+
+async def _poll_loop(name: str) -> None:
+    wake = _WAKE.setdefault(name, asyncio.Event())
+    while True:
+        wake.clear()
+        await refresh(name)
+        try:
+            await asyncio.wait_for(wake.wait(), _SOURCES[name]["interval"])
+        except asyncio.TimeoutError:
+            pass
+
+
+def request_refresh(name: str) -> None:
+    """
+    Wake a source's poll loop early (e.g. right after a replication was started).
+    """
+    event = _WAKE.get(name)
+    if event is not None:
+        event.set()
+
+
+def get_value(name: str, default: Any = None) -> Any:
+    entry = _SNAPSHOT.get(name)
+    if not entry or entry.get("updated") is None:
+        return default
+    return entry.get("value")
+
+
+def get_snapshot() -> Dict[str, Dict[str, Any]]:
+    return {name: dict(entry) for name, entry in _SNAPSHOT.items()}
+
+
+def build_status() -> Dict[str, Any]:
+    import lidarrmetadata
+    from lidarrmetadata import root_patch
+    from lidarrmetadata.version_patch import _read_version
+
+    fetched_lidarr = get_value("lidarr")
+    replication = dict(get_value("replication") or {})
+    replication.pop("raw", None)
+    return jsonable(
+        {
+            "version": _read_version(),
+            "plugin_version": root_patch._read_last_plugin_version(),
+            "mbms_plus_version": root_patch._read_mbms_plus_version(),
+            "metadata_version": getattr(lidarrmetadata, "__version__", None),
+            "lidarr_version": fetched_lidarr or root_patch._read_last_lidarr_version(),
+            "lidarr_version_live": bool(fetched_lidarr),
+            "replication_date": get_value("vintage"),
+            "replication": replication,
+            "latest_releases": get_value("releases") or {},
+            "uptime_seconds": int(time.time() - root_patch._START_TIME),
+            "sources": {
+                name: {key: value for key, value in entry.items() if key != "value"}
+                for name, entry in get_snapshot().items()
+            },
+        }
+    )
+
+
+def register_status_poller() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import jsonify
+
+    for name in _SOURCES:
+        background.register(f"status:{name}", lambda name=name: _poll_loop(name))
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/status":
+            return
+
+    @upstream_app.app.route("/status", methods=["GET"])
+    async def _limbo_status():
+        return jsonify(build_status())
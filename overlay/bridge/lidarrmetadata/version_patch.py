@@ -24,4 +24,6 @@ def register_version_route() -> None:
 
     @upstream_app.app.route("/version", methods=["GET"])
     async def _limbo_version_route():
-        return jsonify({"version": _read_version()})
+        from lidarrmetadata import runtime
+
+        return jsonify({"version": _read_version(), "runtime": runtime.describe()})
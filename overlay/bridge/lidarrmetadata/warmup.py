@@ -0,0 +1,190 @@
+import asyncio
+import logging
+import os
+import re
+import time
+from typing import Any, Dict, List, Tuple
+
+from lidarrmetadata import background
+from lidarrmetadata import cache_tables
+from lidarrmetadata import shutdown
+from lidarrmetadata.env_utils import env_flag, env_float, env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+_TASK_NAME = "warmup"
+_POOL_ENV = re.compile(r"^LIMBO_DB_POOL_(\w+)_HOST$")
+_STATE: Dict[str, Any] = {
+    "ready": False,
+    "started_at": None,
+    "finished_at": None,
+    "attempts": 0,
+    "steps": {},
+}
+
+
+def is_enabled() -> bool:
+    return env_flag("LIMBO_WARMUP_ENABLED", True)
+
+
+def is_ready() -> bool:
+    if shutdown.is_draining():
+        return False
+    return bool(_STATE["ready"]) or not is_enabled()
+
+
+def _extra_pool_keys() -> List[str]:
+    """
+    Alternate MusicBrainz pools configured for db_hooks (``LIMBO_DB_POOL_<KEY>_HOST``).
+    """
+    keys = []
+    for name in os.environ:
+        match = _POOL_ENV.match(name)
+        if match and os.environ.get(name) and match.group(1).lower() != "default":
+            keys.append(match.group(1).lower())
+    return sorted(keys)
+
+
+async def _touch_connections(pool) -> int:
+    """
+    Hold several connections at once so each is opened and authenticated now rather
+    than on the first burst of Lidarr requests.
+    """
+    count = env_int("LIMBO_WARMUP_CONNECTIONS", 4, 1)
+    if hasattr(pool, "get_max_size"):
+        count = min(count, pool.get_max_size())
+    held = []
+    try:
+        for _ in range(count):
+            held.append(await pool.acquire())
+        for conn in held:
+            await conn.fetchval("SELECT 1")
+    finally:
+        for conn in held:
+            await pool.release(conn)
+    return len(held)
+
+
+async def _prewarm_relations(pool) -> Dict[str, Any]:
+    relations = [
+        name.strip()
+        for name in env_str(
+            "LIMBO_WARMUP_RELATIONS",
+            "release_group,release,medium,artist,artist_credit_name,release_group_meta",
+        ).split(",")
+        if name.strip()
+    ]
+    loaded: Dict[str, Any] = {}
+    async with pool.acquire() as conn:
+        for relation in relations:
+            try:
+                loaded[relation] = await conn.fetchval(
+                    "SELECT pg_prewarm($1::regclass)", relation, timeout=300
+                )
+            except Exception as exc:
+                # pg_prewarm is an optional extension; missing it never blocks readiness.
+                loaded[relation] = str(exc) or exc.__class__.__name__
+    return loaded
+
+
+async def _warm_musicbrainz() -> Dict[str, Any]:
+    from lidarrmetadata import db_hooks
+    from lidarrmetadata import provider
+
+    providers = provider.get_providers_implementing(provider.DataVintageMixin)
+    if not providers or not hasattr(providers[0], "_get_pool"):
+        return {"skipped": "no MusicBrainz database provider"}
+    mb_provider = providers[0]
+    pool = await mb_provider._get_pool()
+    result: Dict[str, Any] = {"connections": await _touch_connections(pool)}
+    for key in _extra_pool_keys():
+        extra = await db_hooks.get_pool(mb_provider, key)
+        result[f"pool:{key}"] = await _touch_connections(extra)
+    if env_flag("LIMBO_WARMUP_PREWARM", False):
+        result["prewarm"] = await _prewarm_relations(pool)
+    return result
+
+
+async def _warm_cache() -> Dict[str, Any]:
+    result: Dict[str, Any] = {}
+    pools_seen = set()
+    for name, cache in cache_tables.postgres_cache_targets():
+        pool = await cache_tables.get_pool(cache)
+        if id(pool) not in pools_seen:
+            pools_seen.add(id(pool))
+            result["connections"] = result.get("connections", 0) + await _touch_connections(pool)
+        async with pool.acquire() as conn:
+            # Pull the top of the key index into shared buffers.
+            await conn.fetchval(
+                f"SELECT count(*) FROM (SELECT key FROM {cache._db_table} "
+                f"ORDER BY key LIMIT $1) AS head",
+                env_int("LIMBO_WARMUP_CACHE_ROWS", 1000, 0),
+            )
+        result[name] = "ok"
+    return result or {"skipped": "no Postgres cache"}
+
+
+_STEPS: Tuple[Tuple[str, Any], ...] = (
+    ("musicbrainz", _warm_musicbrainz),
+    ("cache", _warm_cache),
+)
+
+
+async def _run_step(name: str, step) -> bool:
+    started = time.monotonic()
+    entry: Dict[str, Any] = {"ok": False}
+    try:
+        entry["result"] = await step()
+        entry["ok"] = True
+    except Exception as exc:
+        entry["error"] = str(exc) or exc.__class__.__name__
+        logger.warning("Limbo warm-up: %s failed: %s", name, entry["error"])
+    entry["seconds"] = round(time.monotonic() - started, 3)
+    _STATE["steps"][name] = entry
+    return entry["ok"]
+
+
+async def _warm_loop() -> None:
+    _STATE["started_at"] = time.time()
+    retry = env_float("LIMBO_WARMUP_RETRY", 5.0, 0.5)
+    pending = list(_STEPS)
+    while pending:
+        _STATE["attempts"] += 1
+        results = await asyncio.gather(*(_run_step(name, step) for name, step in pending))
+        pending = [entry for entry, ok in zip(pending, results) if not ok]
+        if pending:
+            await asyncio.sleep(retry)
+    _STATE["ready"] = True
+    _STATE["finished_at"] = time.time()
+    logger.info(
+        "Limbo warm-up: ready after %.2fs", _STATE["finished_at"] - _STATE["started_at"]
+    )
+
+
+def get_status() -> Dict[str, Any]:
+    return {
+        "enabled": is_enabled(),
+        "ready": is_ready(),
+        "draining": shutdown.is_draining(),
+        "started_at": _STATE["started_at"],
+        "finished_at": _STATE["finished_at"],
+        "attempts": _STATE["attempts"],
+        "steps": _STATE["steps"],
+    }
+
+
+def register_warmup() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import jsonify
+
+    if is_enabled():
+        background.register(_TASK_NAME, _warm_loop)
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/ready":
+            return
+
+    @upstream_app.app.route("/ready", methods=["GET"])
+    async def _limbo_ready():
+        status = get_status()
+        return jsonify(status), 200 if status["ready"] else 503
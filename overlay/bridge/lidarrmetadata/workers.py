@@ -0,0 +1,323 @@
+import asyncio
+import json
+import logging
+import os
+import shutil
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from lidarrmetadata import background
+from lidarrmetadata import shutdown
+from lidarrmetadata.env_utils import env_flag, env_float, env_int, env_str
+
+logger = logging.getLogger(__name__)
+
+_STATE_DIR = Path(os.environ.get("LIMBO_WORKER_STATE_DIR", "/tmp/limbo-workers"))
+_HEARTBEAT_TASK_NAME = "worker-heartbeat"
+_STARTED_AT = time.time()
+
+
+def configured_workers() -> int:
+    """
+    Number of launcher-managed workers; 0 leaves serving to the upstream entrypoint.
+    """
+    return env_int("LIMBO_WORKERS", 0, 0)
+
+
+def worker_id() -> Optional[int]:
+    value = os.environ.get("LIMBO_WORKER_ID")
+    return int(value) if value and value.isdigit() else None
+
+
+def shared_dir(name: str) -> Optional[Path]:
+    """
+    Directory the workers share for ``name``; None outside launcher-managed workers.
+    """
+    if worker_id() is None:
+        return None
+    return _STATE_DIR / name
+
+
+def _parse_bind(value: str) -> Tuple[str, int]:
+    host, _, port = value.strip().rpartition(":")
+    return host.strip("[]") or "0.0.0.0", int(port or 5001)
+
+
+def _reuse_port() -> bool:
+    return hasattr(socket, "SO_REUSEPORT") and env_flag("LIMBO_HTTP_REUSE_PORT", True)
+
+
+def _listen_socket(host: str, port: int, reuse_port: bool) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    if reuse_port:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+    sock.bind((host, port))
+    sock.listen(env_int("LIMBO_HTTP_BACKLOG", 2048, 1))
+    sock.set_inheritable(True)
+    return sock
+
+
+def _server_config(sock: socket.socket):
+    from hypercorn.config import Config
+
+    config = Config()
+    config.bind = [f"fd://{sock.fileno()}"]
+    config.backlog = env_int("LIMBO_HTTP_BACKLOG", 2048, 1)
+    config.keep_alive_timeout = env_float("LIMBO_HTTP_KEEP_ALIVE", 5.0, 0.0)
+    config.graceful_timeout = env_float("LIMBO_HTTP_GRACEFUL_TIMEOUT", 30.0, 0.0)
+    if not env_flag("LIMBO_HTTP_H2", True):
+        config.alpn_protocols = ["http/1.1"]
+    return config
+
+
+def _heartbeat_path(index: int) -> Path:
+    return _STATE_DIR / f"worker-{index}.json"
+
+
+def _write_heartbeat(index: int) -> None:
+    loop_lag = None
+    if env_flag("LIMBO_LOOP_MONITOR_ENABLED", True):
+        from lidarrmetadata import loop_monitor
+
+        loop_lag = loop_monitor.get_lag()
+    payload = {
+        "worker": index,
+        "pid": os.getpid(),
+        "started_at": _STARTED_AT,
+        "updated_at": time.time(),
+        "loop_lag": loop_lag,
+    }
+    path = _heartbeat_path(index)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_suffix(".tmp")
+    tmp_path.write_text(json.dumps(payload), encoding="utf-8")
+    tmp_path.replace(path)
+
+
+async def _heartbeat() -> None:
+    index = worker_id()
+    if index is None:
+        return
+    interval = env_float("LIMBO_WORKER_HEARTBEAT", 5.0, 0.5)
+    loop = asyncio.get_running_loop()
+    while True:
+        try:
+            await loop.run_in_executor(None, _write_heartbeat, index)
+        except Exception:
+            logger.debug("Limbo workers: heartbeat write failed", exc_info=True)
+        await asyncio.sleep(interval)
+
+
+def _health_timeout() -> float:
+    return env_float("LIMBO_WORKER_HEALTH_TIMEOUT", 60.0, 5.0)
+
+
+def read_workers() -> List[Dict[str, Any]]:
+    now = time.time()
+    workers = []
+    for path in sorted(_STATE_DIR.glob("worker-*.json")):
+        try:
+            data = json.loads(path.read_text(encoding="utf-8"))
+        except (OSError, ValueError):
+            continue
+        data["age"] = round(now - float(data.get("updated_at") or 0), 3)
+        data["healthy"] = data["age"] <= _health_timeout()
+        workers.append(data)
+    return workers
+
+
+async def _serve_worker(sock: socket.socket) -> None:
+    from hypercorn.asyncio import serve
+    from lidarrmetadata import app as upstream_app
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+
+    def _on_signal() -> None:
+        # Fail /ready first; the listener closes after the delay and Hypercorn drains.
+        shutdown.begin_drain()
+        loop.call_later(shutdown.drain_delay(), stop.set)
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(signum, _on_signal)
+    await serve(upstream_app.app, _server_config(sock), shutdown_trigger=stop.wait)
+
+
+def _run_worker(index: int, shared: Optional[socket.socket], host: str, port: int) -> None:
+    global _STARTED_AT
+    os.environ["LIMBO_WORKER_ID"] = str(index)
+    _STARTED_AT = time.time()
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.SIG_DFL)
+    sock = shared if shared is not None else _listen_socket(host, port, True)
+    code = 0
+    try:
+        asyncio.run(_serve_worker(sock))
+    except Exception:
+        logger.exception("Limbo worker %s crashed", index)
+        code = 1
+    finally:
+        sys.stdout.flush()
+        sys.stderr.flush()
+    os._exit(code)
+
+
+class _Supervisor:
+    def __init__(self, count: int) -> None:
+        self.count = count
+        self.host, self.port = _parse_bind(env_str("LIMBO_HTTP_BIND", "0.0.0.0:5001"))
+        # Without SO_REUSEPORT the workers share one socket bound here instead.
+        self.shared = None if _reuse_port() else _listen_socket(self.host, self.port, False)
+        self.pids: Dict[int, int] = {}
+        self.started: Dict[int, float] = {}
+        self.backoff: Dict[int, float] = {}
+        self.stopping = False
+
+    def spawn(self, index: int) -> None:
+        pid = os.fork()
+        if pid == 0:
+            _run_worker(index, self.shared, self.host, self.port)
+        self.pids[index] = pid
+        self.started[index] = time.time()
+        logger.info("Limbo workers: started worker %s (pid %s)", index, pid)
+
+    def _index_for(self, pid: int) -> Optional[int]:
+        for index, worker_pid in self.pids.items():
+            if worker_pid == pid:
+                return index
+        return None
+
+    def _stop(self, signum, _frame) -> None:
+        self.stopping = True
+
+    def _reap(self) -> List[int]:
+        exited = []
+        while self.pids:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if pid == 0:
+                break
+            index = self._index_for(pid)
+            if index is None:
+                continue
+            del self.pids[index]
+            exited.append(index)
+            if not self.stopping:
+                logger.warning(
+                    "Limbo workers: worker %s (pid %s) exited with status %s",
+                    index,
+                    pid,
+                    status,
+                )
+        return exited
+
+    def _check_health(self) -> None:
+        timeout = _health_timeout()
+        now = time.time()
+        for index, pid in list(self.pids.items()):
+            if now - self.started[index] < timeout:
+                continue
+            try:
+                updated = float(json.loads(_heartbeat_path(index).read_text())["updated_at"])
+            except (OSError, ValueError, KeyError):
+                updated = 0.0
+            if now - updated > timeout:
+                logger.warning(
+                    "Limbo workers: worker %s (pid %s) is unresponsive; killing", index, pid
+                )
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except ProcessLookupError:
+                    pass
+
+    def run(self) -> int:
+        signal.signal(signal.SIGTERM, self._stop)
+        signal.signal(signal.SIGINT, self._stop)
+        for index in range(self.count):
+            self.spawn(index)
+        restart_at: Dict[int, float] = {}
+        while not self.stopping:
+            time.sleep(1.0)
+            for index in self._reap():
+                # Crash loops back off up to 30s; a worker that ran a while restarts at once.
+                uptime = time.time() - self.started.get(index, 0.0)
+                if uptime > 30.0:
+                    delay = 0.0
+                else:
+                    delay = min(30.0, max(1.0, self.backoff.get(index, 0.5) * 2))
+                self.backoff[index] = delay
+                restart_at[index] = time.time() + delay
+            for index, due in list(restart_at.items()):
+                if not self.stopping and time.time() >= due:
+                    del restart_at[index]
+                    self.spawn(index)
+            self._check_health()
+        return self.shutdown()
+
+    def shutdown(self) -> int:
+        logger.info("Limbo workers: stopping %s worker(s)", len(self.pids))
+        for pid in self.pids.values():
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.time() + shutdown.shutdown_budget() + 5.0
+        while self.pids and time.time() < deadline:
+            self._reap()
+            time.sleep(0.2)
+        for pid in self.pids.values():
+            try:
+                os.kill(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+        return 0
+
+
+def run() -> int:
+    """
+    Pre-fork ``LIMBO_WORKERS`` workers after all overlay patches are applied, so each
+    child inherits the patched app, and supervise them until SIGTERM.
+    """
+    try:
+        import hypercorn.asyncio  # noqa: F401
+    except ImportError:
+        logger.error("Limbo workers: hypercorn is not installed; using the upstream server")
+        from lidarrmetadata.server import main as upstream_main
+
+        return upstream_main()
+    for path in _STATE_DIR.glob("worker-*.json"):
+        try:
+            path.unlink()
+        except OSError:
+            pass
+    shutil.rmtree(_STATE_DIR / "jobs", ignore_errors=True)
+    return _Supervisor(configured_workers()).run()
+
+
+def register_worker_routes() -> None:
+    from lidarrmetadata import app as upstream_app
+    from quart import jsonify
+
+    background.register(_HEARTBEAT_TASK_NAME, _heartbeat)
+
+    for rule in upstream_app.app.url_map.iter_rules():
+        if rule.rule == "/workers":
+            return
+
+    @upstream_app.app.route("/workers", methods=["GET"])
+    async def _limbo_workers():
+        return jsonify(
+            {
+                "configured": configured_workers(),
+                "worker": worker_id(),
+                "workers": read_workers() if configured_workers() else [],
+            }
+        )
@@ -13,7 +13,6 @@ def build_preview_html() -> str:
         root / "overlay" / "bridge" / "lidarrmetadata" / "assets" / "root.html"
     )
     template = template_path.read_text(encoding="utf-8")
-    template = template.replace('href="/assets/root.css"', 'href="assets/root.css"')
     svg_dir = template_path.parent
 
     def read_svg(name: str) -> str:
@@ -36,6 +35,13 @@ def build_preview_html() -> str:
         ]
     )
 
+    cache_stats_html = "\n".join(
+        [
+            '          <div class="config-row"><div class="config-label">Artist cache</div><div class="config-value"><span class="config-value-text">12,345 rows · 48.2 MB · 3% expired · 91% hit</span></div></div>',
+            '          <div class="config-row"><div class="config-label">Album cache</div><div class="config-value"><span class="config-value-text">98,765 rows · 1.2 GB · 7% expired · 84% hit</span></div></div>',
+        ]
+    )
+
     mbms_pills = "\n".join(
         [
             '          <button type="button" class="pill has-action" data-pill-href="https://github.com/HVR88/MBMS_PLUS">',
@@ -59,6 +65,7 @@ def build_preview_html() -> str:
 
     replacements = {
         "__ICON_URL__": "limbo-icon.png",
+        "__ROOT_CSS_URL__": "assets/root.css",
         "__LM_VERSION__": "1.9.7.10",
         "__LM_PLUGIN_VERSION__": "1.9.7.10",
         "__LM_PLUGIN_LABEL__": "Limbo Plugin",
@@ -113,6 +120,8 @@ def build_preview_html() -> str:
         "__VERSION_URL__": "/version",
         "__CACHE_CLEAR_URL__": "/cache/clear",
         "__CACHE_EXPIRE_URL__": "/cache/expire",
+        "__JOBS_URL__": "/jobs",
+        "__EVENTS_URL__": "",
         "__REPLICATION_START_URL__": "/replication/start",
         "__REPLICATION_STATUS_URL__": "/replication/status",
         "__THEME__": "dark",
@@ -128,6 +137,7 @@ def build_preview_html() -> str:
         "__TALL_ARROW_ICON__": read_svg("limbo-tall-arrow.svg"),
         "__MBMS_URL__": "https://github.com/HVR88/MBMS_PLUS",
         "__CONFIG_HTML__": config_html,
+        "__CACHE_STATS_HTML__": cache_stats_html,
         "__MBMS_PILLS__": mbms_pills,
     }
 
@@ -0,0 +1,261 @@
+"""
+Lidarr ID index against a stand-in Lidarr that serves /api/v1/artist and /api/v1/album.
+
+Run from the repo root: ``python -m unittest discover -s tests``.
+"""
+import asyncio
+import json
+import os
+import sys
+import tempfile
+import threading
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from unittest import mock
+from urllib.parse import parse_qs, urlparse
+
+_OVERLAY = str(Path(__file__).resolve().parents[1] / "overlay" / "bridge")
+_STATE_DIR = tempfile.mkdtemp(prefix="limbo-test-")
+os.environ.setdefault("LIMBO_INIT_STATE_DIR", _STATE_DIR)
+os.environ.setdefault("LIMBO_HTTP_RETRIES", "0")
+if _OVERLAY not in sys.path:
+    sys.path.insert(0, _OVERLAY)
+
+import lidarrmetadata  # noqa: E402
+
+if _OVERLAY + "/lidarrmetadata" not in list(lidarrmetadata.__path__):
+    # An installed upstream package shadows the overlay directory; add it back.
+    lidarrmetadata.__path__.insert(0, _OVERLAY + "/lidarrmetadata")
+
+from lidarrmetadata import http_client  # noqa: E402
+from lidarrmetadata import lidarr_index  # noqa: E402
+from lidarrmetadata import lidarr_refresh  # noqa: E402
+
+_API_KEY = "test-key"
+_ARTIST_A = "a0000000-0000-0000-0000-000000000001"
+_ARTIST_B = "b0000000-0000-0000-0000-000000000002"
+_ALBUM_1 = "10000000-0000-0000-0000-000000000001"
+_ALBUM_2 = "20000000-0000-0000-0000-000000000002"
+_ALBUM_3 = "30000000-0000-0000-0000-000000000003"
+
+
+class FakeLidarr:
+    """
+    Serves the artist and album listings Limbo reads, from in-memory lists.
+    """
+
+    def __init__(self) -> None:
+        self.artists = [{"id": 1, "foreignArtistId": _ARTIST_A}]
+        self.albums = [
+            {"id": 11, "foreignAlbumId": _ALBUM_1, "artistId": 1},
+            {"id": 12, "foreignAlbumId": _ALBUM_2, "artistId": 1},
+        ]
+        self.requests = []
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *_args) -> None:
+                pass
+
+            def do_GET(self) -> None:  # noqa: N802
+                url = urlparse(self.path)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                fake.requests.append((url.path, query))
+                if self.headers.get("X-Api-Key") != _API_KEY:
+                    self._send(401, {"error": "unauthorized"})
+                elif url.path == "/api/v1/artist":
+                    items = fake.artists
+                    if "mbId" in query:
+                        items = [a for a in items if a["foreignArtistId"] == query["mbId"]]
+                    self._send(200, items)
+                elif url.path == "/api/v1/album":
+                    items = fake.albums
+                    if "artistId" in query:
+                        items = [a for a in items if str(a["artistId"]) == query["artistId"]]
+                    if "foreignAlbumId" in query:
+                        items = [a for a in items if a["foreignAlbumId"] == query["foreignAlbumId"]]
+                    self._send(200, items)
+                else:
+                    self._send(404, {})
+
+            def _send(self, status: int, body) -> None:
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+
+    def paths(self):
+        return [path for path, _query in self.requests]
+
+    def close(self) -> None:
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def _run(coro):
+    async def _main():
+        try:
+            return await coro
+        finally:
+            await http_client.close()
+
+    return asyncio.run(_main())
+
+
+class _IndexTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        lidarr_index._swap({}, {}, {}, base_url=None, synced_at=None, refreshed_at=None)
+        snapshot = Path(tempfile.mkdtemp(prefix="limbo-index-")) / "lidarr_index.json"
+        patcher = mock.patch.object(lidarr_index, "_SNAPSHOT_FILE", snapshot)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.snapshot = snapshot
+
+    def use_lidarr(self, base_url: str) -> None:
+        patcher = mock.patch.object(
+            lidarr_index,
+            "_credentials",
+            return_value={"base_url": base_url, "api_key": _API_KEY},
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+
+class IndexFoldingTests(_IndexTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        lidarr_index._swap(
+            {_ALBUM_1: [11]},
+            {_ARTIST_A: [1]},
+            {1: [11]},
+            base_url="http://lidarr:8686",
+            synced_at=1.0,
+            refreshed_at=1.0,
+        )
+
+    def test_ready_only_for_indexed_lidarr(self) -> None:
+        self.assertTrue(lidarr_index.is_ready("http://lidarr:8686/"))
+        self.assertFalse(lidarr_index.is_ready("http://other:8686"))
+
+    def test_lookup_is_case_insensitive(self) -> None:
+        self.assertEqual(lidarr_index.lookup_album(_ALBUM_1.upper()), [11])
+        self.assertEqual(lidarr_index.lookup_artist(_ARTIST_A), [1])
+        self.assertEqual(lidarr_index.lookup_album(_ALBUM_2), [])
+
+    def test_remember_album_folds_into_known_artist(self) -> None:
+        lidarr_index.remember_album(_ALBUM_2, 12, artist_id=1)
+        lidarr_index.remember_album(_ALBUM_2, 12, artist_id=1)
+        self.assertEqual(lidarr_index.lookup_album(_ALBUM_2), [12])
+        self.assertEqual(lidarr_index.artist_albums(1), [11, 12])
+
+    def test_remember_album_does_not_invent_artists(self) -> None:
+        lidarr_index.remember_album(_ALBUM_3, 31, artist_id=3)
+        self.assertEqual(lidarr_index.lookup_album(_ALBUM_3), [31])
+        self.assertIsNone(lidarr_index.artist_albums(3))
+
+    def test_remember_artist_and_albums(self) -> None:
+        lidarr_index.remember_artist(_ARTIST_B, 2)
+        lidarr_index.remember_artist_albums(2, [21, 22])
+        self.assertEqual(lidarr_index.lookup_artist(_ARTIST_B), [2])
+        self.assertEqual(lidarr_index.artist_albums(2), [21, 22])
+
+    def test_resolve_mbid_answers_from_index(self) -> None:
+        async def _resolve():
+            # Nothing listens here: any HTTP call would fail the lookup.
+            lidarr = lidarr_refresh._Lidarr("http://lidarr:8686", _API_KEY)
+            return (
+                await lidarr_refresh._resolve_mbid(lidarr, _ALBUM_1),
+                await lidarr_refresh._resolve_mbid(lidarr, _ARTIST_A),
+                await lidarr_refresh._artist_albums(lidarr, 1),
+            )
+
+        album, artist, albums = asyncio.run(_resolve())
+        self.assertEqual(album, {"album_ids": [11], "indexed": True})
+        self.assertEqual(artist, {"artist_ids": [1], "indexed": True})
+        self.assertEqual(albums, {"album_ids": [11]})
+
+    def test_snapshot_round_trip(self) -> None:
+        async def _round_trip():
+            await lidarr_index._save_snapshot()
+            lidarr_index._swap({}, {}, {}, base_url=None, synced_at=None)
+            return await lidarr_index.load_snapshot()
+
+        self.assertTrue(asyncio.run(_round_trip()))
+        self.assertTrue(lidarr_index.is_ready("http://lidarr:8686"))
+        self.assertEqual(lidarr_index.lookup_album(_ALBUM_1), [11])
+        self.assertEqual(lidarr_index.artist_albums(1), [11])
+
+
+@unittest.skipUnless(http_client.is_available(), "aiohttp is not installed")
+class FakeLidarrTests(_IndexTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        self.lidarr = FakeLidarr()
+        self.addCleanup(self.lidarr.close)
+        self.use_lidarr(self.lidarr.base_url)
+
+    def test_sync_builds_index_from_bulk_listings(self) -> None:
+        status = _run(lidarr_index.sync())
+        self.assertTrue(status["ready"])
+        self.assertEqual(status["albums"], 2)
+        self.assertEqual(lidarr_index.lookup_album(_ALBUM_2), [12])
+        self.assertEqual(lidarr_index.lookup_artist(_ARTIST_A), [1])
+        self.assertEqual(lidarr_index.artist_albums(1), [11, 12])
+        self.assertEqual(sorted(self.lidarr.paths()), ["/api/v1/album", "/api/v1/artist"])
+        self.assertTrue(self.snapshot.exists())
+
+    def test_refresh_fetches_only_changed_artists(self) -> None:
+        _run(lidarr_index.sync())
+        self.lidarr.requests.clear()
+        self.lidarr.artists = [{"id": 2, "foreignArtistId": _ARTIST_B}]
+        self.lidarr.albums = [{"id": 21, "foreignAlbumId": _ALBUM_3, "artistId": 2}]
+
+        status = _run(lidarr_index.refresh())
+
+        self.assertEqual(status["source"], "incremental")
+        self.assertEqual(
+            self.lidarr.requests,
+            [("/api/v1/artist", {}), ("/api/v1/album", {"artistId": "2"})],
+        )
+        self.assertEqual(lidarr_index.lookup_album(_ALBUM_3), [21])
+        self.assertEqual(lidarr_index.lookup_album(_ALBUM_1), [])
+        self.assertEqual(lidarr_index.lookup_artist(_ARTIST_A), [])
+        self.assertIsNone(lidarr_index.artist_albums(1))
+
+    def test_refresh_without_index_runs_full_sync(self) -> None:
+        status = _run(lidarr_index.refresh())
+        self.assertEqual(status["source"], "full")
+        self.assertEqual(lidarr_index.lookup_album(_ALBUM_1), [11])
+
+    def test_sync_failure_keeps_previous_index(self) -> None:
+        _run(lidarr_index.sync())
+        self.use_lidarr(self.lidarr.base_url + "/missing")
+        with self.assertRaises(RuntimeError):
+            _run(lidarr_index.sync())
+        self.assertEqual(lidarr_index.lookup_album(_ALBUM_1), [11])
+        self.assertIn("status 404", lidarr_index.get_status()["last_error"])
+
+    def test_resolve_mbid_falls_back_to_lidarr_and_remembers(self) -> None:
+        _run(lidarr_index.sync())
+        self.lidarr.albums.append({"id": 13, "foreignAlbumId": _ALBUM_3, "artistId": 1})
+        self.lidarr.requests.clear()
+
+        async def _resolve():
+            lidarr = lidarr_refresh._Lidarr(self.lidarr.base_url, _API_KEY)
+            return await lidarr_refresh._resolve_mbid(lidarr, _ALBUM_3)
+
+        self.assertEqual(_run(_resolve()), {"album_ids": [13]})
+        self.assertEqual(self.lidarr.requests, [("/api/v1/album", {"foreignAlbumId": _ALBUM_3})])
+        self.assertEqual(lidarr_index.lookup_album(_ALBUM_3), [13])
+
+
+if __name__ == "__main__":
+    unittest.main()
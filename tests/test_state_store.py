@@ -0,0 +1,122 @@
+"""
+State files shared by several workers: merge-on-flush and re-reading foreign writes.
+
+Run from the repo root: ``python -m unittest discover -s tests``.
+"""
+import json
+import os
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+_OVERLAY = str(Path(__file__).resolve().parents[1] / "overlay" / "bridge")
+if _OVERLAY not in sys.path:
+    sys.path.insert(0, _OVERLAY)
+
+import lidarrmetadata  # noqa: E402
+
+if _OVERLAY + "/lidarrmetadata" not in list(lidarrmetadata.__path__):
+    # An installed upstream package shadows the overlay directory; add it back.
+    lidarrmetadata.__path__.insert(0, _OVERLAY + "/lidarrmetadata")
+
+from lidarrmetadata import state_store  # noqa: E402
+
+
+class _StateTestCase(unittest.TestCase):
+    def setUp(self) -> None:
+        self.dir = Path(tempfile.mkdtemp(prefix="limbo-state-"))
+        self.key = f"test-{self.id()}"
+        self.path = self.dir / "state.json"
+        env = mock.patch.dict(
+            os.environ, {"LIMBO_WORKER_ID": "1", "LIMBO_STATE_RELOAD_INTERVAL": "0"}
+        )
+        env.start()
+        self.addCleanup(env.stop)
+
+    def write_elsewhere(self, value) -> None:
+        # Another worker's write; bump the mtime so the change is always visible.
+        text = value if isinstance(value, str) else json.dumps(value)
+        self.path.write_text(text, encoding="utf-8")
+        stat = self.path.stat()
+        os.utime(self.path, (stat.st_atime, stat.st_mtime + 5))
+
+    def on_disk(self):
+        return json.loads(self.path.read_text(encoding="utf-8"))
+
+
+class MergeTests(_StateTestCase):
+    def setUp(self) -> None:
+        super().setUp()
+        state_store.register(self.key, self.path, merge=True)
+
+    def test_flush_keeps_other_workers_keys(self) -> None:
+        state_store.put(self.key, {"a": {"ids": [1]}})
+        self.write_elsewhere({"a": {"ids": [1]}, "b": {"ids": [2]}})
+        pending = state_store.get(self.key)
+        pending["c"] = {"ids": [3]}
+        state_store.put(self.key, pending)
+
+        self.assertEqual(sorted(self.on_disk()), ["a", "b", "c"])
+        self.assertEqual(sorted(state_store.get(self.key)), ["a", "b", "c"])
+
+    def test_removal_only_drops_local_key(self) -> None:
+        state_store.put(self.key, {"a": {"ids": [1]}})
+        self.write_elsewhere({"a": {"ids": [1]}, "b": {"ids": [2]}})
+        pending = state_store.get(self.key)
+        pending.pop("a")
+        state_store.put(self.key, pending)
+
+        self.assertEqual(self.on_disk(), {"b": {"ids": [2]}})
+
+    def test_nested_change_is_written(self) -> None:
+        state_store.put(self.key, {"a": {"ids": [1]}})
+        pending = state_store.get(self.key)
+        pending["a"]["ids"].append(4)
+        state_store.put(self.key, pending)
+
+        self.assertEqual(self.on_disk(), {"a": {"ids": [1, 4]}})
+
+
+class FailedWriteTests(_StateTestCase):
+    def test_failed_write_is_kept_and_retried(self) -> None:
+        state_store.register(self.key, self.path)
+        self.write_elsewhere({"version": 1})
+        real_write = state_store._write_file
+        failures = [OSError("disk full")]
+
+        def _write_once_failing(path, text):
+            if failures:
+                raise failures.pop()
+            real_write(path, text)
+
+        with mock.patch.object(state_store, "_write_file", side_effect=_write_once_failing):
+            with self.assertLogs(state_store.logger, "ERROR"):
+                state_store.put(self.key, {"version": 2})
+            self.assertEqual(self.on_disk(), {"version": 1})
+            # A reload (e.g. the filter file watch) must not replace the unsaved change.
+            self.assertEqual(state_store.reload(self.key), {"version": 2})
+            self.assertTrue(state_store.flush_sync())
+        self.assertEqual(self.on_disk(), {"version": 2})
+
+
+class ReloadTests(_StateTestCase):
+    def test_get_sees_another_workers_write(self) -> None:
+        state_store.register(self.key, self.path, "text")
+        self.write_elsewhere("dark")
+        self.assertEqual(state_store.get(self.key), "dark")
+        self.write_elsewhere("light")
+        self.assertEqual(state_store.get(self.key), "light")
+
+    def test_single_process_reads_once(self) -> None:
+        state_store.register(self.key, self.path, "text")
+        self.write_elsewhere("dark")
+        with mock.patch.dict(os.environ, {"LIMBO_WORKER_ID": ""}):
+            self.assertEqual(state_store.get(self.key), "dark")
+            self.write_elsewhere("light")
+            self.assertEqual(state_store.get(self.key), "dark")
+
+
+if __name__ == "__main__":
+    unittest.main()